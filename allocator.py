@@ -0,0 +1,70 @@
+class BuddyAllocator:
+    """Power-of-two buddy allocator over a range of fixed-size pages.
+
+    Hands out offsets only; the caller owns the memory (here, ranges of a GPU
+    vertex buffer). Blocks are split in halves on allocation and merged with
+    their free buddy on release, so freed space coalesces without a separate
+    compaction pass. Lower offsets are preferred, which keeps live blocks
+    packed towards the start of the range.
+    """
+    def __init__(self, capacity_pages):
+        if capacity_pages <= 0 or capacity_pages & (capacity_pages - 1):
+            raise ValueError("capacity_pages must be a power of two")
+        self.capacity_pages = capacity_pages
+        self.max_order = capacity_pages.bit_length() - 1
+        # Free block offsets per order (a block of order k spans 2**k pages)
+        self.free_blocks = [set() for _ in range(self.max_order + 1)]
+        self.free_blocks[self.max_order].add(0)
+        self.allocated = {}  # offset -> order
+        self.used_pages = 0
+
+    @staticmethod
+    def order_for(pages):
+        """Smallest order whose block holds the given number of pages"""
+        return max(pages - 1, 0).bit_length()
+
+    def allocate(self, pages):
+        """Reserve at least `pages` pages; returns the offset or None when no block is large enough"""
+        order = self.order_for(pages)
+        if order > self.max_order:
+            return None
+        # Find the smallest free block that fits, then split it down
+        for block_order in range(order, self.max_order + 1):
+            if self.free_blocks[block_order]:
+                break
+        else:
+            return None
+        offset = min(self.free_blocks[block_order])
+        self.free_blocks[block_order].remove(offset)
+        while block_order > order:
+            block_order -= 1
+            self.free_blocks[block_order].add(offset + (1 << block_order))
+        self.allocated[offset] = order
+        self.used_pages += 1 << order
+        return offset
+
+    def free(self, offset):
+        """Release a block, merging it with its buddy as far up as possible"""
+        order = self.allocated.pop(offset)
+        self.used_pages -= 1 << order
+        while order < self.max_order:
+            buddy = offset ^ (1 << order)
+            if buddy not in self.free_blocks[order]:
+                break
+            self.free_blocks[order].remove(buddy)
+            offset = min(offset, buddy)
+            order += 1
+        self.free_blocks[order].add(offset)
+
+    def block_pages(self, offset):
+        """Size in pages of an allocated block"""
+        return 1 << self.allocated[offset]
+
+    def largest_free_pages(self):
+        for order in range(self.max_order, -1, -1):
+            if self.free_blocks[order]:
+                return 1 << order
+        return 0
+
+    def free_pages(self):
+        return self.capacity_pages - self.used_pages
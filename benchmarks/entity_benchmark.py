@@ -0,0 +1,71 @@
+"""Measure entity physics throughput for growing entity counts.
+
+Drops a mix of mobs and items over generated terrain, lets them fall and
+settle, then times steady-state steps (gravity, friction, voxel collision
+and mob separation for every entity). Finally times steps for two small
+groups of mobs --far-apart blocks apart on both axes, one high in the air, which
+should cost about as much as the groups alone.
+
+    python benchmarks/entity_benchmark.py --counts 1000 5000 --steps 120 --far-apart 4000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from entities import ENTITY_ITEM, ENTITY_MOB, EntitySystem
+from world import World
+
+def run(world, count, steps, seed):
+    rng = np.random.default_rng(seed)
+    entities = EntitySystem(world)
+    positions = np.column_stack([rng.uniform(-48, 48, count), rng.uniform(80, 100, count), rng.uniform(-48, 48, count)])
+    mobs = count // 2
+    entities.spawn_many(ENTITY_MOB, positions[:mobs], 0.6, 1.8)
+    entities.spawn_many(ENTITY_ITEM, positions[mobs:], 0.25, 0.25,
+                        velocities=rng.uniform(-3, 3, (count - mobs, 3)), block_type=3)
+    falling = time.perf_counter()
+    for _ in range(steps):
+        entities.step(1 / 60)
+    falling = (time.perf_counter() - falling) / steps
+    settled = time.perf_counter()
+    for _ in range(steps):
+        entities.step(1 / 60)
+    settled = (time.perf_counter() - settled) / steps
+    return falling, settled
+
+def run_far_apart(world, distance, steps, seed):
+    rng = np.random.default_rng(seed)
+    entities = EntitySystem(world)
+    far_chunk = distance // 16
+    world.get_full_chunks([(far_chunk + dx, far_chunk + dz) for dx in (-1, 0, 1) for dz in (-1, 0, 1)])
+    # One group on the ground at the origin, the other diagonally across and high in the air
+    for center, height in ((8, 2), (far_chunk * 16 + 8, 100)):
+        y = world.surface_height(center, center) + height
+        entities.spawn_many(ENTITY_MOB, np.column_stack([center + rng.uniform(-4, 4, 8), np.full(8, y),
+                                                         center + rng.uniform(-4, 4, 8)]), 0.6, 1.8)
+    started = time.perf_counter()
+    for _ in range(steps):
+        entities.step(1 / 60)
+    return (time.perf_counter() - started) / steps
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[500, 1000, 2000, 5000])
+    parser.add_argument("--steps", type=int, default=120, help="Steps timed per phase")
+    parser.add_argument("--far-apart", type=int, default=4000, help="Blocks between the two groups of the far-apart run")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    world = World(seed=args.seed)
+    world.get_visible_chunks(0, 0)
+    for count in args.counts:
+        falling, settled = run(world, count, args.steps, args.seed)
+        print(f"{count:>6} entities: {falling * 1000:.2f} ms/step while falling, {settled * 1000:.2f} ms/step settled")
+    far = run_far_apart(world, args.far_apart, args.steps, args.seed)
+    print(f"    16 entities {args.far_apart} blocks apart: {far * 1000:.2f} ms/step")
+    world.generator.shutdown()
@@ -0,0 +1,57 @@
+"""Measure chunk meshing throughput with different worker pools.
+
+Generates a square grid of chunks, then meshes all of them synchronously,
+on MeshBuilder thread pools and on a process pool, reporting chunks/s.
+
+    python benchmarks/mesh_benchmark.py --grid 12 --workers 1 2 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mesher import BYTES_PER_VERTEX, MeshBuilder, build_chunk_mesh
+from world import World
+
+def build_world(grid, seed):
+    world = World(seed=seed)
+    world.get_full_chunks([(x, z) for x in range(grid) for z in range(grid)])
+    return world, [world.chunks[(x, z)] for x in range(grid) for z in range(grid)]
+
+def run_sync(world, chunks):
+    start = time.perf_counter()
+    vertices = sum(build_chunk_mesh(world, chunk).vertex_count for chunk in chunks)
+    return time.perf_counter() - start, vertices
+
+def run_pool(world, chunks, workers, use_processes):
+    builder = MeshBuilder(workers=workers, use_processes=use_processes)
+    start = time.perf_counter()
+    for chunk in chunks:
+        builder.submit(world, chunk)
+    vertices = 0
+    while builder.pending_count():
+        vertices += sum(mesh.vertex_count for mesh in builder.completed())
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    builder.shutdown()
+    return elapsed, vertices
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grid", type=int, default=12, help="Chunks per side of the square grid")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    world, chunks = build_world(args.grid, args.seed)
+    results = [("synchronous",) + run_sync(world, chunks)]
+    for workers in args.workers:
+        results.append((f"{workers} threads",) + run_pool(world, chunks, workers, False))
+        results.append((f"{workers} processes",) + run_pool(world, chunks, workers, True))
+    world.generator.shutdown()
+
+    for label, elapsed, vertices in results:
+        print(f"{label:>13}: {len(chunks)} chunks in {elapsed:.2f} s -> {len(chunks) / elapsed:.0f} chunks/s, "
+              f"{vertices // 6} quads, {vertices * BYTES_PER_VERTEX / 1e6:.1f} MB of vertex data")
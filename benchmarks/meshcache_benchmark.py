@@ -0,0 +1,47 @@
+"""Measure how much meshing a MeshCache saves on a restart and on revisits.
+
+Meshes a square grid of chunks into an empty cache, reopens the cache the
+way a restarted game would and meshes the same chunks again, then reports
+both runs along with the cache's hit rate.
+
+    python benchmarks/meshcache_benchmark.py --grid 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from meshcache import MeshCache
+from mesher import build_chunk_mesh
+from world import World
+
+def mesh_all(world, chunks, cache):
+    started = time.perf_counter()
+    for chunk in chunks:
+        build_chunk_mesh(world, chunk, cache)
+    return time.perf_counter() - started
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grid", type=int, default=10, help="Chunks per side of the square grid")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    world = World(seed=args.seed)
+    world.get_full_chunks([(x, z) for x in range(args.grid) for z in range(args.grid)])
+    chunks = [world.chunks[(x, z)] for x in range(args.grid) for z in range(args.grid)]
+    with tempfile.TemporaryDirectory() as directory:
+        uncached = mesh_all(world, chunks, None)
+        cache = MeshCache(directory)
+        cold = mesh_all(world, chunks, cache)
+        cache.close()
+        cache = MeshCache(directory)  # As after a restart
+        warm = mesh_all(world, chunks, cache)
+        for label, seconds in (("no cache", uncached), ("cold cache", cold), ("warm cache", warm)):
+            print(f"{label:>10}: {len(chunks)} chunks in {seconds * 1000:.0f} ms -> {len(chunks) / seconds:.0f} chunks/s")
+        print(f"Warm cache: {cache.summary()}")
+        cache.close()
+    world.generator.shutdown()
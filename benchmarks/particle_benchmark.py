@@ -0,0 +1,49 @@
+"""Measure particle physics throughput for growing particle counts.
+
+Breaks blocks on the terrain surface until the requested number of debris
+particles is in flight, then times steps (gravity, bouncing, wall stops and
+fading for every particle) while they fall and land. The default step count
+stays within the shortest particle lifetime, so every particle is alive for
+every timed step.
+
+    python benchmarks/particle_benchmark.py --counts 10000 50000 --steps 30
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from block import STONE
+from particles import ParticleSystem
+from world import World
+
+BURST = 64  # Particles per broken block
+
+def run(world, count, steps, seed):
+    rng = np.random.default_rng(seed)
+    particles = ParticleSystem(world, capacity=max(count, 1 << 16), seed=seed)
+    for _ in range(count // BURST):
+        x, z = (int(value) for value in rng.integers(-40, 40, 2))
+        particles.burst_block(x, world.surface_height(x, z) + 1, z, STONE.id, BURST)
+    started = time.perf_counter()
+    for _ in range(steps):
+        particles.step(1 / 60)
+    return (time.perf_counter() - started) / steps, len(particles)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--steps", type=int, default=30, help="Steps timed per count")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    world = World(seed=args.seed)
+    world.get_visible_chunks(0, 0)
+    for count in args.counts:
+        seconds, alive = run(world, count, args.steps, args.seed)
+        print(f"{count:>6} particles: {seconds * 1000:.2f} ms/step ({alive} still alive)")
+    world.generator.shutdown()
@@ -0,0 +1,76 @@
+"""Measure path query throughput over generated terrain.
+
+Builds walk grids for the spawn area, then times queries between random
+surface points at growing distances, both synchronously and through the
+worker thread the game uses.
+
+    python benchmarks/pathfinding_benchmark.py --distances 16 48 96 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from camera import Camera
+from pathfinding import AgentShape, Pathfinder
+from world import World
+
+def random_queries(world, rng, count, distance, extent):
+    """Pairs of surface feet cells roughly distance blocks apart"""
+    def feet(x, z):
+        return (x, world.generator.surface_height(x, z) + 1, z)
+    queries = []
+    while len(queries) < count:
+        x, z = rng.randint(-extent, extent), rng.randint(-extent, extent)
+        dx = rng.randint(-distance, distance)
+        dz = rng.choice((-1, 1)) * (distance - abs(dx))
+        if abs(x + dx) <= extent and abs(z + dz) <= extent:
+            queries.append((feet(x, z), feet(x + dx, z + dz)))
+    return queries
+
+def run_sync(pathfinder, queries):
+    started = time.perf_counter()
+    results = [pathfinder.find_path(start, goal) for start, goal in queries]
+    return time.perf_counter() - started, results
+
+def run_async(pathfinder, queries):
+    started = time.perf_counter()
+    requests = [pathfinder.request(start, goal) for start, goal in queries]
+    while pathfinder.pending_count():
+        pathfinder.update()
+    results = [request.result() for request in requests]
+    return time.perf_counter() - started, results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--distances", type=int, nargs="+", default=[16, 48, 96])
+    parser.add_argument("--queries", type=int, default=200, help="Queries per distance")
+    parser.add_argument("--render-distance", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    world = World(seed=args.seed)
+    world.render_distance = args.render_distance
+    world.pregenerate(0, 0)
+    pathfinder = Pathfinder(world, AgentShape.from_camera(Camera()))
+    started = time.perf_counter()
+    for coords in list(world.chunks):
+        pathfinder.grid(*coords)
+    grids = pathfinder.stats()["grids"]
+    print(f"Built {grids} walk grids in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    rng = random.Random(args.seed)
+    extent = (args.render_distance - 2) * 16  # Stay inside fully generated chunks
+    for distance in args.distances:
+        queries = random_queries(world, rng, args.queries, distance, extent)
+        for name, run in (("sync", run_sync), ("worker", run_async)):
+            seconds, results = run(pathfinder, queries)
+            found = [result for result in results if result.found]
+            expanded = sum(result.expanded for result in results) / len(results)
+            print(f"{distance:>4} blocks {name:>6}: {len(queries) / seconds:7.1f} queries/s, "
+                  f"{len(found)}/{len(results)} found, {expanded:.0f} nodes expanded on average")
+    pathfinder.shutdown()
+    world.generator.shutdown()
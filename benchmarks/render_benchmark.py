@@ -0,0 +1,82 @@
+"""Measure rendering frame times offscreen, without a window or a GPU.
+
+Creates an offscreen GL context (EGL or OSMesa; on Mesa without a GPU both
+rasterize in software), starts the game in it and flies the camera along a
+scripted path, calling MinecraftGame.render() every frame. Reports frame
+times and the chunk draw calls and triangles per frame, so renderer changes
+can be compared on machines without a display.
+
+    python benchmarks/render_benchmark.py --frames 300 --render-distance 6 --screenshot frame.png
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from offscreen import OFFSCREEN_PLATFORMS, OffscreenContext, select_offscreen_platform
+
+def camera_path(generator, frames, speed, height, dt):
+    """(x, y, z, yaw, pitch) per frame: a straight flight east over the terrain while looking around"""
+    path = []
+    for frame in range(frames):
+        x = speed * frame * dt
+        z = 0.0
+        y = generator.surface_height(math.floor(x), math.floor(z)) + height
+        yaw = 60 * math.sin(frame * dt * 0.5)
+        pitch = -15 + 10 * math.sin(frame * dt * 0.3)
+        path.append((x, y, z, yaw, pitch))
+    return path
+
+def mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--render-distance", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--speed", type=float, default=8.0, help="Camera speed in blocks per second")
+    parser.add_argument("--height", type=float, default=6.0, help="Camera height above the terrain")
+    parser.add_argument("--platform", choices=OFFSCREEN_PLATFORMS, default="egl")
+    parser.add_argument("--no-occlusion-culling", action="store_true")
+    parser.add_argument("--timings", metavar="FILE", help="Write per-frame timings as CSV")
+    parser.add_argument("--screenshot", metavar="FILE", help="Save the last frame as an image")
+    args = parser.parse_args()
+
+    select_offscreen_platform(args.platform)
+    context = OffscreenContext(800, 600, args.platform)
+    import pygame
+    from minecraft11 import MinecraftGame
+    from timing import format_frame_summary, summarize_frame_times, write_frame_times
+
+    game = MinecraftGame(seed=args.seed, render_distance=args.render_distance, offscreen=True)
+    game.chunk_renderer.occlusion_culling = not args.no_occlusion_culling
+    dt = 1 / 60
+    frame_times, draw_calls, triangles = [], [], []
+    for x, y, z, yaw, pitch in camera_path(game.world.generator, args.frames, args.speed, args.height, dt):
+        game.camera.x, game.camera.y, game.camera.z = x, y, z
+        game.camera.yaw, game.camera.pitch = yaw, pitch
+        started = time.perf_counter()
+        game.render()
+        frame_times.append(time.perf_counter() - started)
+        stats = game.chunk_renderer.stats()
+        draw_calls.append(stats["draw_calls"] + stats["transparent_draw_calls"])
+        triangles.append(stats["triangles"] + stats["transparent_triangles"])
+
+    renderer = game.chunk_renderer.stats()
+    print(f"{args.platform} {context.width}x{context.height}, render distance {args.render_distance}, "
+          f"{args.frames} frames over {args.speed * args.frames * dt:.0f} blocks")
+    print(f"Frame times: {format_frame_summary(summarize_frame_times(frame_times))}")
+    print(f"Draw calls per frame: mean {mean(draw_calls):.1f}, max {max(draw_calls)}")
+    print(f"Chunk triangles per frame: mean {mean(triangles) / 1000:.0f}k, max {max(triangles) / 1000:.0f}k")
+    print(f"Arenas: {renderer['arenas']} ({renderer['used_bytes'] / 1e6:.1f} MB used), "
+          f"{renderer['transparent_sorts']} transparent sorts, {game.mesh_backlog} chunks still waiting for a mesh")
+    if args.timings:
+        write_frame_times(args.timings, frame_times)
+    if args.screenshot:
+        pygame.image.save(pygame.surfarray.make_surface(context.read_pixels().swapaxes(0, 1)), args.screenshot)
+    game.close()
+    context.close()
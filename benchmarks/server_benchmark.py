@@ -0,0 +1,61 @@
+"""Estimate how many bot clients one server core can sustain.
+
+The server runs in this process and the bots in a child process, so the
+process CPU time measured here belongs to the server alone.
+
+    python benchmarks/server_benchmark.py --bots 16 32 64 --duration 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from server import GameServer
+from botclient import run_bots
+
+def bot_process(count, duration, port):
+    asyncio.run(run_bots(count, duration, port=port))
+
+async def measure(count, duration, port):
+    server = GameServer()
+    await server.start(port=port)
+    ticker = asyncio.ensure_future(server.run())
+
+    bots = multiprocessing.Process(target=bot_process, args=(count, duration, port))
+    bots.start()
+    # Let the bots connect and the initial chunk burst settle before measuring
+    await asyncio.sleep(min(2.0, duration / 4))
+    server.tick_times.clear()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    while bots.is_alive():
+        await asyncio.sleep(0.1)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    server.stop()
+    await ticker
+    stats = server.stats()
+    utilization = cpu / wall if wall > 0 else 0.0
+    return {
+        "bots": count,
+        "mean_tick_ms": stats["mean_tick"] * 1000,
+        "max_tick_ms": stats["max_tick"] * 1000,
+        "cpu_utilization": utilization,
+        "clients_per_core": count / utilization if utilization > 0 else float("inf"),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bots", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=25599)
+    args = parser.parse_args()
+
+    for count in args.bots:
+        result = asyncio.run(measure(count, args.duration, args.port))
+        print(f"{result['bots']:4d} bots: tick mean {result['mean_tick_ms']:.2f} ms, "
+              f"max {result['max_tick_ms']:.2f} ms, server CPU {result['cpu_utilization'] * 100:.1f}%, "
+              f"~{result['clients_per_core']:.0f} clients/core")
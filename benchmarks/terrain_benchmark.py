@@ -0,0 +1,42 @@
+"""Measure terrain generation throughput over a large grid of chunks.
+
+Runs the terrain stage (height noise, biome blending, cave carving and
+layering) for every chunk of a square grid, first on one thread and then on
+the generator's thread pool.
+
+    python benchmarks/terrain_benchmark.py --grid 32 --seed 1
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from world import World
+
+def run(grid, seed, threaded):
+    world = World(seed=seed)
+    chunks = [world.create_chunk(x, z) for x in range(grid) for z in range(grid)]
+    start = time.perf_counter()
+    if threaded:
+        list(world.generator.executor.map(world.generator.generate_terrain, chunks))
+    else:
+        for chunk in chunks:
+            world.generator.generate_terrain(chunk)
+    elapsed = time.perf_counter() - start
+    blocks = sum(chunk.block_count() for chunk in chunks)
+    world.generator.shutdown()
+    return elapsed, len(chunks), blocks
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grid", type=int, default=32, help="Chunks per side of the square grid")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for threaded in (False, True):
+        elapsed, count, blocks = run(args.grid, args.seed, threaded)
+        label = "thread pool" if threaded else "single thread"
+        print(f"{label:>13}: {count} chunks in {elapsed:.2f} s -> {elapsed / count * 1000:.2f} ms/chunk, "
+              f"{count / elapsed:.0f} chunks/s, {blocks / elapsed / 1e6:.1f} M blocks/s")
@@ -1,10 +1,111 @@
+# Texture layers in the procedural atlas (see texture.py)
+TEX_GRASS_TOP = 0
+TEX_GRASS_SIDE = 1
+TEX_DIRT = 2
+TEX_STONE = 3
+TEX_LEAVES = 4
+TEX_LOG_SIDE = 5
+TEX_LOG_TOP = 6
+TEX_MISSING = 7
+TEX_SAND = 8
+TEXTURE_LAYER_COUNT = 9
+
+AIR = 0  # Type id stored in chunks for empty space
+
+class BlockType:
+    """Shared, immutable definition of a block type (flyweight).
+
+    Chunks store only the type id per voxel; everything else about a block
+    lives here once per type.
+    """
+    __slots__ = ("id", "name", "color", "textures", "solid", "transparent", "hardness", "light_level")
+
+    def __init__(self, block_id, name, color, textures, solid=True, transparent=False, hardness=1, light_level=0):
+        object.__setattr__(self, "id", block_id)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "color", color)
+        object.__setattr__(self, "textures", textures)  # (top, side, bottom) texture layers
+        object.__setattr__(self, "solid", solid)
+        object.__setattr__(self, "transparent", transparent)
+        object.__setattr__(self, "hardness", hardness)
+        object.__setattr__(self, "light_level", light_level)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("BlockType is immutable")
+
+    def __repr__(self):
+        return f"BlockType({self.id}, {self.name!r})"
+
+    @property
+    def texture_id(self):
+        return self.textures[1]
+
+    def face_texture(self, normal):
+        """Texture layer for the face with the given normal"""
+        top, side, bottom = self.textures
+        if normal[1] > 0:
+            return top
+        if normal[1] < 0:
+            return bottom
+        return side
+
+UNKNOWN_BLOCK_TYPE = BlockType(-1, "unknown", (0.5, 0.5, 0.5), (TEX_MISSING, TEX_MISSING, TEX_MISSING))
+
+# Block type registry: type id -> shared BlockType
+BLOCK_TYPES = {}
+# Same registry as a list indexed by the uint8 ids stored in chunks (None for air)
+BLOCK_TYPE_TABLE = [None] + [UNKNOWN_BLOCK_TYPE] * 255
+
+def register_block_type(block_type):
+    BLOCK_TYPES[block_type.id] = block_type
+    BLOCK_TYPE_TABLE[block_type.id] = block_type
+    return block_type
+
+GRASS = register_block_type(BlockType(1, "grass", (0.2, 0.8, 0.2), (TEX_GRASS_TOP, TEX_GRASS_SIDE, TEX_DIRT), hardness=0.6))
+LEAVES = register_block_type(BlockType(2, "leaves", (0.1, 0.6, 0.1), (TEX_LEAVES, TEX_LEAVES, TEX_LEAVES), transparent=True, hardness=0.2))
+STONE = register_block_type(BlockType(3, "stone", (0.6, 0.6, 0.6), (TEX_STONE, TEX_STONE, TEX_STONE), hardness=1.5))
+LOG = register_block_type(BlockType(4, "log", (0.4, 0.2, 0.1), (TEX_LOG_TOP, TEX_LOG_SIDE, TEX_LOG_TOP), hardness=2.0))
+DIRT = register_block_type(BlockType(5, "dirt", (0.55, 0.38, 0.22), (TEX_DIRT, TEX_DIRT, TEX_DIRT), hardness=0.5))
+SAND = register_block_type(BlockType(6, "sand", (0.86, 0.8, 0.55), (TEX_SAND, TEX_SAND, TEX_SAND), hardness=0.5))
+
+def get_block_type(block_type):
+    """Look up the shared BlockType for a type id"""
+    return BLOCK_TYPES.get(block_type, UNKNOWN_BLOCK_TYPE)
+
+def get_face_texture(block_type, normal):
+    """Texture layer for the face of a block type id with the given normal"""
+    return get_block_type(block_type).face_texture(normal)
+
 class Block:
-    def __init__(self, x, y, z, block_type=1, texture_id = 0, solid = True, transparent = False, hardness = 1, light_level = 0):
+    """Lightweight view of one voxel: its coordinates plus its shared BlockType"""
+    __slots__ = ("x", "y", "z", "type")
+
+    def __init__(self, x, y, z, block_type=1):
         self.x = x
         self.y = y
         self.z = z
         self.type = block_type
-        self.texture_id = texture_id
-        self.transparent = transparent
-        self.hardness = hardness
-        self.light_level = light_level
+
+    @property
+    def block_type(self):
+        return get_block_type(self.type)
+
+    @property
+    def texture_id(self):
+        return self.block_type.texture_id
+
+    @property
+    def solid(self):
+        return self.block_type.solid
+
+    @property
+    def transparent(self):
+        return self.block_type.transparent
+
+    @property
+    def hardness(self):
+        return self.block_type.hardness
+
+    @property
+    def light_level(self):
+        return self.block_type.light_level
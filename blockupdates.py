@@ -0,0 +1,207 @@
+import heapq
+
+import numpy as np
+
+from block import *
+
+TICKS_PER_SECOND = 20
+MAX_TICKS_PER_UPDATE = 2  # Ticks run per update() at most, so a long frame cannot snowball
+
+# The six face neighbours plus the block itself: an edit may wake any of them
+WAKE_OFFSETS = np.array([(0, 0, 0), (1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)],
+                        dtype=np.int64)
+
+# Woken cells are packed into one int64 key (x and z 26 bits, y 10 bits) so duplicates drop with a 1D unique
+KEY_XZ_BIAS = 1 << 25
+KEY_Y_BIAS = 1  # Neighbours of the bottom layer sit at y = -1
+
+# Which block types cover the block below them (TickView.covered)
+OPAQUE = np.array([block_type is not None and not block_type.transparent for block_type in BLOCK_TYPE_TABLE])
+
+class BlockRule:
+    """How one block type behaves when its scheduled update runs.
+
+    update(view, x, y, z) returns {(x, y, z): block_type} edits to apply (or
+    None); delay is how many ticks after being woken by a nearby edit the
+    update runs. ready(world, xs, ys, zs), if given, is a vectorized check of
+    which woken blocks' update could do anything right now; the rest are not
+    queued, since any edit that would change that wakes them again.
+    """
+    def __init__(self, update, delay, ready=None):
+        self.update = update
+        self.delay = delay
+        self.ready = ready
+
+class TickView:
+    """Block reads during a tick, seeing the edits earlier updates in the same tick made"""
+    def __init__(self, world):
+        self.world = world
+        self.edits = {}
+
+    def get(self, x, y, z):
+        block_type = self.edits.get((x, y, z))
+        if block_type is None:
+            block_type = self.world.get_block_type_id(x, y, z)
+        return block_type
+
+    def covered(self, x, y, z):
+        """Whether an opaque block sits on top of (x, y, z)"""
+        above = BLOCK_TYPE_TABLE[self.get(x, y + 1, z)]
+        return above is not None and not above.transparent
+
+def fall(view, x, y, z):
+    """Falling blocks drop one cell whenever there is air below"""
+    if y > 0 and view.get(x, y - 1, z) == AIR:
+        return {(x, y, z): AIR, (x, y - 1, z): view.get(x, y, z)}
+    return None
+
+def fall_ready(world, xs, ys, zs):
+    return (ys > 0) & (world.block_type_ids(xs, ys - 1, zs) == AIR)
+
+def grass_update(view, x, y, z):
+    """Grass under an opaque block dies back to dirt"""
+    if view.covered(x, y, z):
+        return {(x, y, z): DIRT.id}
+    return None
+
+def grass_ready(world, xs, ys, zs):
+    return OPAQUE[world.block_type_ids(xs, ys + 1, zs)]
+
+def dirt_update(view, x, y, z):
+    """Uncovered dirt next to grass grows grass"""
+    if view.covered(x, y, z):
+        return None
+    for dx, dy, dz in WAKE_OFFSETS[1:].tolist():
+        if view.get(x + dx, y + dy, z + dz) == GRASS.id:
+            return {(x, y, z): GRASS.id}
+    return None
+
+def dirt_ready(world, xs, ys, zs):
+    ready = ~OPAQUE[world.block_type_ids(xs, ys + 1, zs)]
+    uncovered = np.flatnonzero(ready)
+    near_grass = np.zeros(len(uncovered), dtype=bool)
+    for dx, dy, dz in WAKE_OFFSETS[1:].tolist():
+        near_grass |= world.block_type_ids(xs[uncovered] + dx, ys[uncovered] + dy, zs[uncovered] + dz) == GRASS.id
+    ready[uncovered] = near_grass
+    return ready
+
+class BlockUpdateScheduler:
+    """Runs delayed updates for dynamic blocks (falling sand, spreading grass).
+
+    Edits to the world wake the edited blocks and their face neighbours
+    (for bulk region edits, only around the surface of the changed volume).
+    Those whose type has a rule that could fire right now get an update
+    queued on a tick-ordered heap and recorded in their chunk's active set;
+    buried dirt or sand resting on something is never queued. Each tick
+    pops due updates up to a budget, collects their edits and writes them
+    with one World.set_blocks call, so every chunk is remeshed at most once
+    per tick. Those writes wake further blocks in turn. Work therefore
+    scales with the size of an edit's surface and the number of blocks that
+    actually change, never with world size.
+    """
+    def __init__(self, world, budget=256):
+        self.world = world
+        self.budget = budget          # Updates run per tick at most; the rest wait for the next tick
+        self.rules = {}               # Block type id -> BlockRule
+        self.has_rule = np.zeros(256, dtype=bool)
+        self.queue = []               # Heap of (due tick, sequence, (x, y, z))
+        self.scheduled = {}           # (x, y, z) -> due tick of its pending update
+        self.active = {}              # Chunk coords -> positions with pending updates
+        self.sequence = 0
+        self.tick = 0
+        self.time_banked = 0.0
+        self.updates_run = 0
+        world.edit_listeners.append(self.on_edit)
+        world.unload_listeners.append(self.on_unload)
+        self.register(SAND.id, BlockRule(fall, 2, fall_ready))
+        self.register(GRASS.id, BlockRule(grass_update, 40, grass_ready))
+        self.register(DIRT.id, BlockRule(dirt_update, 60, dirt_ready))
+
+    def register(self, block_type, rule):
+        self.rules[block_type] = rule
+        self.has_rule[block_type] = True
+
+    def pending_count(self):
+        return len(self.scheduled)
+
+    def schedule(self, x, y, z, delay):
+        """Queue an update for a block, unless an earlier one is already pending"""
+        self.schedule_many([(x, y, z)], delay)
+
+    def schedule_many(self, positions, delay):
+        """schedule() for a list of (x, y, z), pushed onto the heap in one batch"""
+        due = self.tick + delay
+        entries = []
+        for position in positions:
+            position = tuple(position)
+            if self.scheduled.get(position, due + 1) <= due:
+                continue
+            self.scheduled[position] = due
+            self.sequence += 1
+            entries.append((due, self.sequence, position))
+            self.active.setdefault(self.world.get_chunk_coords(position[0], position[2]), set()).add(position)
+        if len(entries) > len(self.queue):
+            self.queue.extend(entries)
+            heapq.heapify(self.queue)
+        else:
+            for entry in entries:
+                heapq.heappush(self.queue, entry)
+
+    def on_edit(self, xs, ys, zs):
+        """Wake the edited blocks and their neighbours whose rules could fire"""
+        xs, ys, zs = (np.asarray(values, dtype=np.int64) for values in (xs, ys, zs))
+        keys = ((xs + KEY_XZ_BIAS) << 36) | ((zs + KEY_XZ_BIAS) << 10) | (ys + KEY_Y_BIAS)
+        offsets = (WAKE_OFFSETS[:, 0] << 36) | (WAKE_OFFSETS[:, 2] << 10)
+        keys = np.sort((keys[:, None] + offsets + WAKE_OFFSETS[:, 1]).ravel())
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        xs = (keys >> 36) - KEY_XZ_BIAS
+        zs = ((keys >> 10) & ((1 << 26) - 1)) - KEY_XZ_BIAS
+        ys = (keys & 0x3FF) - KEY_Y_BIAS
+        types = self.world.block_type_ids(xs, ys, zs)
+        for block_type in np.unique(types[self.has_rule[types]]).tolist():
+            rule = self.rules[block_type]
+            selected = np.flatnonzero(types == block_type)
+            if rule.ready is not None:
+                selected = selected[rule.ready(self.world, xs[selected], ys[selected], zs[selected])]
+            self.schedule_many(zip(xs[selected].tolist(), ys[selected].tolist(), zs[selected].tolist()), rule.delay)
+
+    def on_unload(self, chunk):
+        """Forget pending updates in a chunk that is being dropped"""
+        for position in self.active.pop((chunk.chunk_x, chunk.chunk_z), ()):
+            del self.scheduled[position]
+
+    def run_tick(self):
+        """Advance one tick; returns the {(x, y, z): block_type} edits it applied"""
+        self.tick += 1
+        view = TickView(self.world)
+        ran = 0
+        while self.queue and self.queue[0][0] <= self.tick and ran < self.budget:
+            due, _, position = heapq.heappop(self.queue)
+            if self.scheduled.get(position) != due:
+                continue  # Superseded by an earlier update, or its chunk unloaded
+            del self.scheduled[position]
+            coords = self.world.get_chunk_coords(position[0], position[2])
+            active = self.active[coords]
+            active.discard(position)
+            if not active:
+                del self.active[coords]
+            rule = self.rules.get(view.get(*position))
+            if rule is None:
+                continue
+            edits = rule.update(view, *position)
+            if edits:
+                view.edits.update(edits)
+            ran += 1
+        if view.edits:
+            self.world.set_blocks(view.edits)
+        self.updates_run += ran
+        return view.edits
+
+    def update(self, dt):
+        """Run the ticks that dt seconds of game time add up to; returns the final type of every block they changed"""
+        self.time_banked = min(self.time_banked + dt, MAX_TICKS_PER_UPDATE / TICKS_PER_SECOND)
+        edits = {}
+        while self.time_banked >= 1 / TICKS_PER_SECOND:
+            self.time_banked -= 1 / TICKS_PER_SECOND
+            edits.update(self.run_tick())
+        return edits
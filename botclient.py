@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import math
+import random
+
+from protocol import *
+
+class BotClient:
+    """Scripted client for exercising the server: walks in a circle and edits blocks"""
+    def __init__(self, name="bot", radius=24.0, speed=4.3, edit_chance=0.05, seed=None):
+        self.name = name
+        self.radius = radius
+        self.speed = speed            # Blocks per second along the circle
+        self.edit_chance = edit_chance  # Chance per tick of placing or removing a block
+        self.random = random.Random(seed)
+        self.client_id = None
+        self.chunks = {}              # (chunk_x, chunk_z) -> voxel array
+        self.deltas_received = 0
+        self.bytes_received = 0
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host="127.0.0.1", port=25565, unix=None):
+        if unix:
+            self.reader, self.writer = await asyncio.open_unix_connection(unix)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.send(MSG_HELLO, self.name.encode("utf-8"))
+
+    def send(self, msg_type, payload=b""):
+        self.writer.write(encode_frame(msg_type, payload))
+
+    async def receive_loop(self):
+        try:
+            while True:
+                msg_type, payload = await read_frame(self.reader)
+                self.bytes_received += FRAME_HEADER.size + len(payload)
+                self.handle_message(msg_type, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def handle_message(self, msg_type, payload):
+        if msg_type == MSG_WELCOME:
+            self.client_id, _ = WELCOME.unpack(payload)
+        elif msg_type == MSG_CHUNK:
+            chunk_x, chunk_z, voxels = decode_chunk(payload)
+            self.chunks[(chunk_x, chunk_z)] = voxels.copy()
+        elif msg_type == MSG_UNLOAD:
+            self.chunks.pop(CHUNK_COORDS.unpack(payload), None)
+        elif msg_type == MSG_BLOCK_DELTA:
+            for x, y, z, block_type in decode_deltas(payload):
+                coords = (x // CHUNK_SIZE, z // CHUNK_SIZE)
+                if coords in self.chunks:
+                    self.chunks[coords][x % CHUNK_SIZE, y, z % CHUNK_SIZE] = block_type
+                self.deltas_received += 1
+
+    def surface_y(self, x, z):
+        """Highest non-air y in the bot's copy of the world, or None if the chunk is not loaded"""
+        voxels = self.chunks.get((x // CHUNK_SIZE, z // CHUNK_SIZE))
+        if voxels is None:
+            return None
+        column = voxels[x % CHUNK_SIZE, :, z % CHUNK_SIZE].nonzero()[0]
+        return int(column[-1]) if len(column) else None
+
+    async def run(self, duration, tick_rate=20):
+        """Walk and edit for `duration` seconds"""
+        receiver = asyncio.ensure_future(self.receive_loop())
+        angle = self.random.uniform(0, 2 * math.pi)
+        ticks = int(duration * tick_rate)
+        for _ in range(ticks):
+            angle += self.speed / self.radius / tick_rate
+            x = math.cos(angle) * self.radius
+            z = math.sin(angle) * self.radius
+            self.send(MSG_POSITION, POSITION.pack(x, 20.0, z))
+
+            if self.random.random() < self.edit_chance:
+                block_x, block_z = int(math.floor(x)), int(math.floor(z))
+                top = self.surface_y(block_x, block_z)
+                if top is not None:
+                    if self.random.random() < 0.5:
+                        self.send(MSG_SET_BLOCK, SET_BLOCK.pack(block_x, top + 1, block_z, 3))
+                    else:
+                        self.send(MSG_SET_BLOCK, SET_BLOCK.pack(block_x, top, block_z, 0))
+            await self.writer.drain()
+            await asyncio.sleep(1.0 / tick_rate)
+        self.writer.close()
+        await receiver
+
+async def run_bots(count, duration, host="127.0.0.1", port=25565, unix=None):
+    bots = [BotClient(f"bot{i}", radius=16.0 + i % 32, seed=i) for i in range(count)]
+    for bot in bots:
+        await bot.connect(host, port, unix)
+    await asyncio.gather(*(bot.run(duration) for bot in bots))
+    return bots
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scripted bot clients for the PhilCraft server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=25565)
+    parser.add_argument("--unix", help="Connect to a Unix socket path instead of TCP")
+    parser.add_argument("--bots", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    bots = asyncio.run(run_bots(args.bots, args.duration, args.host, args.port, args.unix))
+    for bot in bots:
+        print(f"{bot.name}: {len(bot.chunks)} chunks loaded, {bot.deltas_received} deltas, {bot.bytes_received} bytes received")
@@ -1,10 +1,20 @@
-import pygame
-import numpy as np
-from OpenGL.GL import *
-from OpenGL.GLU import *
 import math
-import random
-from collections import defaultdict
+
+# Survival physics shared by the player and other entities (see entities.py)
+GRAVITY = -32.0             # Minecraft-like gravity
+TERMINAL_VELOCITY = -78.4   # Maximum falling speed
+GROUND_FRICTION = 0.91      # Horizontal velocity multiplier per frame on the ground
+AIR_RESISTANCE = 0.98       # Horizontal velocity multiplier per frame in the air
+
+MOVEMENT_KEYS = None  # pygame codes of W, S, A, D, space and left shift, looked up on first use
+
+def movement_keys():
+    """The movement key codes, importing pygame only the first time a camera moves"""
+    global MOVEMENT_KEYS
+    if MOVEMENT_KEYS is None:
+        import pygame  # Deferred so camera.py (and the physics constants) load without pygame
+        MOVEMENT_KEYS = (pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d, pygame.K_SPACE, pygame.K_LSHIFT)
+    return MOVEMENT_KEYS
 
 class Camera:
     def __init__(self):
@@ -20,9 +30,9 @@ class Camera:
         self.velocity_y = 0.0
         self.velocity_z = 0.0
         self.on_ground = False
-        self.gravity = -32.0  # Minecraft-like gravity
+        self.gravity = GRAVITY
         self.jump_force = 8.5  # Minecraft jump height
-        self.terminal_velocity = -78.4  # Maximum falling speed
+        self.terminal_velocity = TERMINAL_VELOCITY
         
         # Player collision box (Minecraft dimensions)
         self.player_height = 1.8
@@ -30,8 +40,8 @@ class Camera:
         self.player_eye_height = 1.62
         
         # Movement physics
-        self.ground_friction = 0.91  # Ground friction multiplier
-        self.air_resistance = 0.98   # Air resistance multiplier
+        self.ground_friction = GROUND_FRICTION
+        self.air_resistance = AIR_RESISTANCE
         self.acceleration = 10.0     # Ground acceleration
         self.air_acceleration = 2.0  # Air acceleration (much lower)
         
@@ -82,10 +92,10 @@ class Camera:
         min_block_z = int(math.floor(bbox['min_z']))
         max_block_z = int(math.floor(bbox['max_z']))
         
-        # Check each potentially intersecting block
+        # Check each potentially intersecting block, skipping the air above each column's top block
         for bx in range(min_block_x, max_block_x + 1):
-            for by in range(min_block_y, max_block_y + 1):
-                for bz in range(min_block_z, max_block_z + 1):
+            for bz in range(min_block_z, max_block_z + 1):
+                for by in range(min_block_y, min(max_block_y, world.surface_height(bx, bz)) + 1):
                     if world.get_block(bx, by, bz):
                         # Check if player bounding box intersects with block
                         if (bbox['min_x'] < bx + 1 and bbox['max_x'] > bx and
@@ -111,7 +121,7 @@ class Camera:
             if not collides_step and self.on_ground:
                 # Check if there's ground to step onto
                 ground_check_y = step_up_y - 0.1
-                for check_y in range(int(step_up_y), int(old_y), -1):
+                for check_y in range(min(int(step_up_y), world.surface_height(int(new_x), int(old_z))), int(old_y), -1):
                     if world.get_block(int(new_x), check_y, int(old_z)):
                         final_x = new_x
                         final_y = check_y + 1
@@ -130,7 +140,7 @@ class Camera:
                 collides_step, _ = self.check_collision_at_position(final_x, step_up_y, new_z, world)
                 if not collides_step and self.on_ground:
                     # Check if there's ground to step onto
-                    for check_y in range(int(step_up_y), int(final_y), -1):
+                    for check_y in range(min(int(step_up_y), world.surface_height(int(final_x), int(new_z))), int(final_y), -1):
                         if world.get_block(int(final_x), check_y, int(new_z)):
                             final_z = new_z
                             final_y = check_y + 1
@@ -161,11 +171,12 @@ class Camera:
     def update_survival(self, keys, dt, world):
         """Improved survival mode movement with better physics"""
         # Input handling for movement direction
-        move_forward = keys[pygame.K_w]
-        move_backward = keys[pygame.K_s]
-        move_left = keys[pygame.K_a]
-        move_right = keys[pygame.K_d]
-        jump = keys[pygame.K_SPACE]
+        key_forward, key_backward, key_left, key_right, key_jump, _ = movement_keys()
+        move_forward = keys[key_forward]
+        move_backward = keys[key_backward]
+        move_left = keys[key_left]
+        move_right = keys[key_right]
+        jump = keys[key_jump]
         
         # Calculate movement direction based on camera yaw
         yaw_rad = math.radians(self.yaw)
@@ -251,10 +262,11 @@ class Camera:
             min_block_z = int(math.floor(bbox['min_z']))
             max_block_z = int(math.floor(bbox['max_z']))
             
+            ground_y = int(math.floor(ground_check_y))
             ground_found = False
             for bx in range(min_block_x, max_block_x + 1):
                 for bz in range(min_block_z, max_block_z + 1):
-                    if world.get_block(bx, int(math.floor(ground_check_y)), bz):
+                    if ground_y <= world.surface_height(bx, bz) and world.get_block(bx, ground_y, bz):
                         ground_found = True
                         break
                 if ground_found:
@@ -265,6 +277,7 @@ class Camera:
 
     def update_creative(self, keys, dt):
         """Creative mode movement (flying) with improved physics"""
+        key_forward, key_backward, key_left, key_right, key_up, key_down = movement_keys()
         move_speed = self.speed * dt
         
         # Calculate horizontal movement vectors (no pitch for horizontal movement)
@@ -277,23 +290,23 @@ class Camera:
         right_z = math.sin(yaw_rad)
         
         # Apply horizontal movement
-        if keys[pygame.K_w]:
+        if keys[key_forward]:
             self.x += forward_x * move_speed
             self.z += forward_z * move_speed
-        if keys[pygame.K_s]:
+        if keys[key_backward]:
             self.x -= forward_x * move_speed
             self.z -= forward_z * move_speed
-        if keys[pygame.K_a]:
+        if keys[key_left]:
             self.x -= right_x * move_speed
             self.z -= right_z * move_speed
-        if keys[pygame.K_d]:
+        if keys[key_right]:
             self.x += right_x * move_speed
             self.z += right_z * move_speed
         
         # Apply vertical movement (independent of camera pitch)
-        if keys[pygame.K_SPACE]:
+        if keys[key_up]:
             self.y += move_speed
-        if keys[pygame.K_LSHIFT]:
+        if keys[key_down]:
             self.y -= move_speed
 
     def update(self, keys, mouse_rel, dt, world):
@@ -361,6 +374,10 @@ class Camera:
             return camera_x, camera_y, camera_z
 
     def apply_transform(self):
+        # GL is imported here so the camera's movement and collision code runs without it
+        from OpenGL.GL import glLoadIdentity, glRotatef, glTranslatef
+        from OpenGL.GLU import gluLookAt
+        
         glLoadIdentity()
         
         if self.view_mode == "first_person":
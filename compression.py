@@ -0,0 +1,44 @@
+import numpy as np
+
+class CompressedVoxels:
+    """Column-wise run-length encoding of a chunk's voxel array.
+
+    Voxels are walked column by column (all of y for one x, z before the
+    next), so each run is a vertical stretch of one block type. Generated
+    terrain is a few such stretches per column (stone, dirt, grass, air),
+    which typically shrinks a 64 KB chunk to a few KB.
+    """
+    __slots__ = ("shape", "values", "run_last")
+
+    def __init__(self, shape, values, run_last):
+        self.shape = shape        # Shape of the original [x, y, z] array
+        self.values = values      # uint8 block type of each run
+        self.run_last = run_last  # Index of each run's last voxel in column order
+
+    @classmethod
+    def from_array(cls, voxels):
+        columns = voxels.transpose(0, 2, 1).ravel()  # [x, z, y] order
+        run_starts = np.flatnonzero(columns[1:] != columns[:-1]) + 1
+        values = columns[np.concatenate(([0], run_starts))]
+        # A 16x256x16 chunk has 65536 voxels, so last indices fit in 16 bits
+        index_type = np.uint16 if columns.size <= 1 << 16 else np.uint32
+        run_last = np.append(run_starts - 1, columns.size - 1).astype(index_type)
+        return cls(voxels.shape, values, run_last)
+
+    def decompress(self):
+        size_x, height, size_z = self.shape
+        lengths = np.diff(self.run_last.astype(np.int64), prepend=-1)
+        columns = np.repeat(self.values, lengths).reshape(size_x, size_z, height)
+        return np.ascontiguousarray(columns.transpose(0, 2, 1))
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.run_last.nbytes
+
+    @property
+    def raw_nbytes(self):
+        return int(np.prod(self.shape))  # One byte per voxel
+
+    @property
+    def ratio(self):
+        return self.raw_nbytes / self.nbytes
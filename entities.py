@@ -0,0 +1,497 @@
+import numpy as np
+
+from block import *
+from mcchunk import CHUNK_HEIGHT, STAGE_EMPTY, STAGE_FULL
+from camera import GRAVITY, TERMINAL_VELOCITY, GROUND_FRICTION, AIR_RESISTANCE
+
+# Entity kinds
+ENTITY_MOB = 0
+ENTITY_ITEM = 1           # Dropped block; disappears after ITEM_LIFETIME
+ENTITY_FALLING_BLOCK = 2  # Turns back into a block where it lands
+
+ITEM_LIFETIME = 300.0    # Seconds before a dropped item despawns
+MAX_STEP_DISTANCE = 0.5  # Largest move per collision substep, so nothing tunnels through a block
+COLLISION_MARGIN = 0.001
+MIN_SPEED = 0.01         # Horizontal speeds below this (blocks per second) are rounded down to rest
+VOID_Y = -64             # Entities falling below this are removed
+CLUSTER_SIZE = 64.0      # Entities are grouped per cube of this size, each group getting its own voxel window...
+WINDOW_SLACK = 1 << 16   # ...unless merging two groups' windows copies at most this many extra voxels
+WINDOW_PADDING = 4       # Blocks added around each window so it can be reused while its entities stay inside
+
+# Spatial hash cell coordinates are packed into one int64 key, 21 bits per axis
+CELL_BITS = 21
+CELL_BIAS = 1 << (CELL_BITS - 1)
+
+# Per-entity arrays: name, shape of one entry, dtype
+ENTITY_FIELDS = (
+    ("ids", (), np.int64),
+    ("kind", (), np.int8),
+    ("position", (3,), np.float64),    # x, z at the centre, y at the feet
+    ("velocity", (3,), np.float64),
+    ("half_width", (), np.float64),
+    ("height", (), np.float64),
+    ("block_type", (), np.uint8),      # Carried block for items and falling blocks
+    ("on_ground", (), bool),
+    ("age", (), np.float64),           # Seconds since spawning
+)
+
+def solid_block_table():
+    """Boolean lookup indexed by block type id: which types entities collide with"""
+    return np.array([block_type is not None and block_type.solid for block_type in BLOCK_TYPE_TABLE])
+
+def merge_boxes(mins, maxs, slack):
+    """Greedily merge boxes (rows of mins/maxs) while a union adds at most slack volume; returns a group per box"""
+    groups = np.arange(len(mins))
+    mins, maxs = mins.copy(), maxs.copy()
+    alive = np.arange(len(mins))
+    while len(alive) > 1:
+        low, high = mins[alive], maxs[alive]
+        volumes = (high - low).prod(axis=1)
+        union = (np.maximum(high[:, None], high[None]) - np.minimum(low[:, None], low[None])).prod(axis=2)
+        waste = union - volumes[:, None] - volumes[None, :]
+        np.fill_diagonal(waste, np.inf)
+        first, second = np.unravel_index(np.argmin(waste), waste.shape)
+        if waste[first, second] > slack:
+            break
+        keep, drop = alive[first], alive[second]
+        mins[keep] = np.minimum(mins[keep], mins[drop])
+        maxs[keep] = np.maximum(maxs[keep], maxs[drop])
+        groups[groups == drop] = keep
+        alive = np.delete(alive, second)
+    return groups
+
+def forward_offsets():
+    """Half of the 26 neighbouring cell offsets, one of each opposite pair"""
+    return np.array([offset for offset in ((dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1))
+                     if offset > (0, 0, 0)], dtype=np.int64)
+
+PAIR_OFFSETS = np.concatenate((np.zeros((1, 3), dtype=np.int64), forward_offsets()))  # A cell itself first
+
+class SpatialHash:
+    """Uniform grid over entity positions for neighbour queries.
+
+    Each position's cell is packed into an int64 key; keys are sorted once
+    per build, so finding everything in a cell is a binary search and all
+    pairs closer than the cell size come out of one batch of lookups
+    (every occupied cell against itself and half of its neighbours).
+    """
+    def __init__(self, cell_size=2.0):
+        self.cell_size = cell_size
+        self.positions = np.zeros((0, 3))
+        self.order = np.zeros(0, dtype=np.int64)
+        self.sorted_keys = np.zeros(0, dtype=np.int64)
+
+    def cell_keys(self, cells):
+        cells = cells + CELL_BIAS
+        return (cells[..., 0] << (2 * CELL_BITS)) | (cells[..., 1] << CELL_BITS) | cells[..., 2]
+
+    def cells_of(self, positions):
+        return np.floor(positions / self.cell_size).astype(np.int64)
+
+    def build(self, positions):
+        self.positions = positions
+        keys = self.cell_keys(self.cells_of(positions))
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+
+    def cell_ranges(self, keys):
+        """(starts, counts) into the sorted order for each key"""
+        starts = np.searchsorted(self.sorted_keys, keys, side="left")
+        ends = np.searchsorted(self.sorted_keys, keys, side="right")
+        return starts, ends - starts
+
+    def query(self, center, radius):
+        """Indices of positions within radius of center"""
+        low = self.cells_of(np.asarray(center, dtype=np.float64) - radius)
+        high = self.cells_of(np.asarray(center, dtype=np.float64) + radius)
+        grid = np.stack(np.meshgrid(*[np.arange(low[axis], high[axis] + 1) for axis in range(3)],
+                                    indexing="ij"), axis=-1).reshape(-1, 3)
+        starts, counts = self.cell_ranges(self.cell_keys(grid))
+        candidates = [self.order[start:start + count] for start, count in zip(starts, counts) if count]
+        if not candidates:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.concatenate(candidates)
+        distance_sq = ((self.positions[candidates] - center) ** 2).sum(axis=1)
+        return np.sort(candidates[distance_sq <= radius * radius])
+
+    def pairs(self, radius):
+        """(i, j) index arrays, i < j, of every two positions within radius (at most the cell size)"""
+        if radius > self.cell_size:
+            raise ValueError("pair radius must not exceed the cell size")
+        # Work on occupied cells: each is a run of the sorted order
+        keys = self.sorted_keys
+        run_starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        run_counts = np.diff(np.append(run_starts, len(keys)))
+        cell_keys = keys[run_starts]
+        cells = self.cells_of(self.positions[self.order[run_starts]])
+        wanted = self.cell_keys(cells[:, None, :] + PAIR_OFFSETS).ravel()
+        neighbour = np.minimum(np.searchsorted(cell_keys, wanted), len(cell_keys) - 1)
+        occupied = np.flatnonzero(cell_keys[neighbour] == wanted)
+        # Every member of each occupied cell against every member of its neighbour
+        own = occupied // len(PAIR_OFFSETS)
+        other = neighbour[occupied]
+        own_counts = run_counts[own]
+        other_counts = run_counts[other]
+        pair_counts = own_counts * other_counts
+        total = int(pair_counts.sum())
+        within = np.arange(total) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+        own_member = within // np.repeat(other_counts, pair_counts)
+        other_member = within % np.repeat(other_counts, pair_counts)
+        first = self.order[np.repeat(run_starts[own], pair_counts) + own_member]
+        second = self.order[np.repeat(run_starts[other], pair_counts) + other_member]
+        # Within one cell, take each pair once
+        keep = (first < second) | np.repeat(occupied % len(PAIR_OFFSETS) != 0, pair_counts)
+        first, second = np.minimum(first[keep], second[keep]), np.maximum(first[keep], second[keep])
+        distance_sq = ((self.positions[first] - self.positions[second]) ** 2).sum(axis=1)
+        close = distance_sq <= radius * radius
+        return first[close], second[close]
+
+class VoxelWindow:
+    """Solidity of a box of world voxels, copied out of the chunks in one pass.
+
+    Collision checks during a step index this array directly instead of
+    looking blocks up chunk by chunk. Columns outside generated chunks are
+    air. The chunks it was copied from are remembered with their version and
+    stage, so the copy can be reused until one of them changes.
+    """
+    def __init__(self, world, mins, maxs):
+        self.origin = np.floor(mins).astype(np.int64)
+        end = np.floor(maxs).astype(np.int64) + 1
+        x0, y0, z0 = self.origin.tolist()
+        x1, y1, z1 = end.tolist()
+        self.solid = np.zeros((x1 - x0, y1 - y0, z1 - z0), dtype=bool)
+        solid = solid_block_table()
+        low_y, high_y = max(y0, 0), min(y1, CHUNK_HEIGHT)
+        self.sources = []  # (coords, chunk or None, version, stage) per chunk the window overlaps
+        for coords, (bx0, bz0, bx1, bz1) in world.region_chunks(x0, z0, x1 - 1, z1 - 1):
+            chunk = world.chunks.get(coords)
+            self.sources.append((coords, chunk, None, None) if chunk is None else (coords, chunk, chunk.version, chunk.stage))
+            if chunk is None or chunk.stage == STAGE_EMPTY:
+                continue
+            columns = (slice(bx0 - x0, bx1 - x0 + 1), slice(bz0 - z0, bz1 - z0 + 1))
+            if low_y < high_y:
+                self.solid[columns[0], low_y - y0:high_y - y0, columns[1]] = solid[chunk.voxels[
+                    bx0 - chunk.origin_x:bx1 - chunk.origin_x + 1, low_y:high_y,
+                    bz0 - chunk.origin_z:bz1 - chunk.origin_z + 1]]
+
+    def current(self, world):
+        """Whether no chunk under the window has been loaded, unloaded, edited or advanced a stage since the copy"""
+        for coords, chunk, version, stage in self.sources:
+            loaded = world.chunks.get(coords)
+            if loaded is not chunk or (chunk is not None and (chunk.version != version or chunk.stage != stage)):
+                return False
+        return True
+
+    def contains(self, mins, maxs):
+        """Whether the box from mins to maxs lies inside the window"""
+        return bool((np.floor(mins) >= self.origin).all() and (np.floor(maxs) < self.origin + self.solid.shape).all())
+
+    def solid_at(self, cells):
+        """Solidity of integer world cells (array with a last axis of x, y, z); outside the window is air"""
+        local = cells - self.origin
+        inside = ((local >= 0) & (local < self.solid.shape)).all(axis=-1)
+        local = np.where(inside[..., None], local, 0)
+        return self.solid[local[..., 0], local[..., 1], local[..., 2]] & inside
+
+class VoxelWindowSet:
+    """Several VoxelWindows, each serving its own group of entities, looked up in one batch.
+
+    The windows are flattened into one array; owners maps every entity
+    index to its window (-1 for entities without one) and is reassigned
+    each step the set is reused.
+    """
+    def __init__(self, world, boxes, owners):
+        windows = [VoxelWindow(world, mins, maxs) for mins, maxs in boxes]
+        self.windows = windows
+        self.owners = owners
+        self.origins = np.array([window.origin for window in windows], dtype=np.int64).reshape(-1, 3)
+        self.shapes = np.array([window.solid.shape for window in windows], dtype=np.int64).reshape(-1, 3)
+        sizes = self.shapes.prod(axis=1)
+        self.bases = np.cumsum(sizes) - sizes
+        self.solid = np.concatenate([window.solid.ravel() for window in windows] + [np.zeros(1, dtype=bool)])  # Never empty
+
+    def homes(self, world, boxes):
+        """Index of a window containing each of boxes, or None if one fits nowhere or a window is out of date"""
+        if not all(window.current(world) for window in self.windows):
+            return None
+        homes = []
+        for mins, maxs in boxes:
+            home = next((index for index, window in enumerate(self.windows) if window.contains(mins, maxs)), None)
+            if home is None:
+                return None
+            homes.append(home)
+        return np.array(homes, dtype=np.int64)
+
+    def solid_at(self, cells, owners):
+        """Solidity of integer world cells, each looked up in its owner's window; outside it is air"""
+        local = cells - self.origins[owners]
+        shape = self.shapes[owners]
+        x, y, z = local[..., 0], local[..., 1], local[..., 2]
+        # Per-axis comparisons; reducing a short last axis with all() is much slower
+        inside = (x >= 0) & (x < shape[..., 0]) & (y >= 0) & (y < shape[..., 1]) & (z >= 0) & (z < shape[..., 2])
+        flat = self.bases[owners] + (x * shape[..., 1] + y) * shape[..., 2] + z
+        return self.solid[np.where(inside, flat, 0)] & inside
+
+class EntitySystem:
+    """Every entity in the world, stored as parallel NumPy arrays (structure of arrays).
+
+    Entities are boxes standing on their position (x, z centre, y at the
+    feet). step() integrates gravity and friction for all of them at once
+    and resolves voxel collisions axis by axis in batches, using the same
+    constants as the player's survival physics. Entities in chunks that are
+    not loaded (or not FULL yet) are frozen until their chunk returns.
+    Entities are collided in clusters of nearby ones, each against a voxel
+    window around just that cluster, so entities far apart never make one
+    huge window. The windows are padded and kept across steps until an
+    entity leaves them or a chunk under them changes.
+    """
+    def __init__(self, world, capacity=256, cell_size=2.0):
+        self.world = world
+        self.count = 0
+        self.next_id = 1
+        self.allocate(capacity)
+        self.spatial_hash = SpatialHash(cell_size)
+        self.mob_hash = SpatialHash(cell_size)  # Mobs only, rebuilt every step for push_mobs_apart
+        self.cluster_hash = SpatialHash(CLUSTER_SIZE)  # Active entities, rebuilt every step to split them into clusters
+        self.windows = None                            # The last step's VoxelWindowSet
+        self.windows_built = 0
+        self.hash_stale = True
+        self.mob_push = 8.0  # Velocity change per second that pushes overlapping mobs apart
+
+    def allocate(self, capacity):
+        """(Re)size every array to capacity, keeping the live entities"""
+        for name, shape, dtype in ENTITY_FIELDS:
+            grown = np.zeros((capacity,) + shape, dtype=dtype)
+            if self.count:
+                grown[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def spawn_many(self, kind, positions, width, height, velocities=None, block_type=AIR):
+        """Add entities at an (n, 3) array of positions; returns their ids"""
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        n = len(positions)
+        if self.count + n > self.capacity:
+            self.allocate(max(self.capacity * 2, self.count + n))
+        new = slice(self.count, self.count + n)
+        ids = np.arange(self.next_id, self.next_id + n, dtype=np.int64)
+        self.ids[new] = ids
+        self.kind[new] = kind
+        self.position[new] = positions
+        self.velocity[new] = 0 if velocities is None else velocities
+        self.half_width[new] = width / 2
+        self.height[new] = height
+        self.block_type[new] = block_type
+        self.on_ground[new] = False
+        self.age[new] = 0
+        self.count += n
+        self.next_id += n
+        self.hash_stale = True
+        return ids
+
+    def spawn(self, kind, x, y, z, width, height, velocity=(0.0, 0.0, 0.0), block_type=AIR):
+        """Add one entity; returns its id"""
+        return int(self.spawn_many(kind, [(x, y, z)], width, height, [velocity], block_type)[0])
+
+    def index_of(self, entity_id):
+        found = np.flatnonzero(self.ids[:self.count] == entity_id)
+        return int(found[0]) if len(found) else None
+
+    def remove_indices(self, indices):
+        """Drop the entities at the given indices, keeping the rest packed and in order"""
+        if len(indices) == 0:
+            return
+        keep = np.ones(self.count, dtype=bool)
+        keep[indices] = False
+        remaining = int(keep.sum())
+        for name, _, _ in ENTITY_FIELDS:
+            array = getattr(self, name)
+            array[:remaining] = array[:self.count][keep]
+        self.count = remaining
+        self.hash_stale = True
+
+    def despawn(self, entity_id):
+        index = self.index_of(entity_id)
+        if index is not None:
+            self.remove_indices([index])
+
+    def boxes_collide(self, mins, maxs, window, owners, axis, rising):
+        """Whether boxes just moved along axis (rows of mins/maxs) ran into a solid voxel, in one batch.
+
+        The boxes were clear before a move of under one block, so only the
+        layer of cells at their leading face can have become occupied.
+        """
+        first = np.floor(mins).astype(np.int64)
+        last = np.ceil(maxs).astype(np.int64) - 1
+        first[:, axis] = np.where(rising, last[:, axis], first[:, axis])
+        span = last - first + 1
+        span[:, axis] = 1
+        extent = span.max(axis=0)
+        offsets = np.stack(np.meshgrid(*[np.arange(size) for size in extent], indexing="ij"),
+                           axis=-1).reshape(-1, 3)
+        cells = first[:, None, :] + offsets[None, :, :]
+        inside = ((offsets[None, :, 0] < span[:, None, 0]) & (offsets[None, :, 1] < span[:, None, 1])
+                  & (offsets[None, :, 2] < span[:, None, 2]))
+        return (window.solid_at(cells, owners[:, None]) & inside).any(axis=1)
+
+    def bounds(self, indices, positions):
+        """Box corners for the given entities placed at positions"""
+        extent = np.stack([self.half_width[indices], np.zeros(len(indices)), self.half_width[indices]], axis=1)
+        mins = positions - extent
+        maxs = positions + extent
+        maxs[:, 1] = positions[:, 1] + self.height[indices]
+        return mins, maxs
+
+    def move_axis(self, axis, delta, indices, window):
+        """Move entities along one axis by delta, stopping flush against any solid voxel they would enter"""
+        moving = delta != 0
+        indices, delta = indices[moving], delta[moving]
+        if len(indices) == 0:
+            return
+        moved = self.position[indices].copy()
+        moved[:, axis] += delta
+        mins, maxs = self.bounds(indices, moved)
+        rising = delta > 0
+        hit = self.boxes_collide(mins, maxs, window, window.owners[indices], axis, rising)
+        self.position[indices[~hit], axis] = moved[~hit, axis]
+
+        blocked = indices[hit]
+        rising = rising[hit]
+        low_edge = mins[hit, axis]
+        high_edge = maxs[hit, axis]
+        # Snap the leading face against the voxel boundary it crossed
+        self.position[blocked, axis] = np.where(
+            rising,
+            np.floor(high_edge) - (high_edge - moved[hit, axis]) - COLLISION_MARGIN,
+            np.floor(low_edge) + 1 + (moved[hit, axis] - low_edge))
+        if axis == 1:
+            self.on_ground[blocked[~rising]] = True
+        self.velocity[blocked, axis] = 0
+
+    def step(self, dt):
+        """Advance every entity by dt seconds"""
+        if self.count == 0 or dt <= 0:
+            return
+        self.age[:self.count] += dt
+        active = self.active_indices()
+        if len(active):
+            velocity = self.velocity
+            # Everything the entities can reach this step, copied out of the chunks per cluster when the last copy will not do
+            window = self.cluster_windows(active, dt)
+            friction = np.where(self.on_ground[active], GROUND_FRICTION, AIR_RESISTANCE)
+            velocity[active, 0] *= friction
+            velocity[active, 2] *= friction
+            # Let friction bring entities to a full stop so resting ones skip horizontal collision checks
+            velocity[active[np.abs(velocity[active, 0]) < MIN_SPEED], 0] = 0
+            velocity[active[np.abs(velocity[active, 2]) < MIN_SPEED], 2] = 0
+            velocity[active, 1] = np.maximum(velocity[active, 1] + GRAVITY * dt, TERMINAL_VELOCITY)
+            self.push_mobs_apart(dt)
+
+            # Fast entities move in several substeps so they cannot pass through a block
+            substeps = np.maximum(1, np.ceil(np.abs(velocity[active]).max(axis=1) * dt / MAX_STEP_DISTANCE)).astype(np.int64)
+            self.on_ground[active] = False
+            for substep in range(int(substeps.max())):
+                moving = substeps > substep
+                indices = active[moving]
+                sub_dt = dt / substeps[moving]
+                for axis in (0, 2, 1):  # Horizontal first, like the player
+                    self.move_axis(axis, velocity[indices, axis] * sub_dt, indices, window)
+            self.hash_stale = True
+        self.settle()
+
+    def active_indices(self):
+        """Indices of entities standing in FULL chunks; the rest are frozen this step"""
+        chunk_coords = np.floor(self.position[:self.count][:, [0, 2]] / 16).astype(np.int64) + CELL_BIAS
+        keys, inverse = np.unique(chunk_coords[:, 0] << 32 | chunk_coords[:, 1], return_inverse=True)
+        ready = np.zeros(len(keys), dtype=bool)
+        for index, key in enumerate(keys.tolist()):
+            chunk = self.world.chunks.get(((key >> 32) - CELL_BIAS, (key & 0xFFFFFFFF) - CELL_BIAS))
+            ready[index] = chunk is not None and chunk.stage == STAGE_FULL
+        return np.flatnonzero(ready[inverse])
+
+    def cluster_windows(self, active, dt):
+        """A VoxelWindowSet with a window for each cluster of active entities, covering what they can reach"""
+        reach = (np.abs(self.velocity[active]) + abs(GRAVITY) * dt) * dt + 1
+        mins, maxs = self.bounds(active, self.position[active])
+        mins -= reach
+        maxs += reach
+        self.cluster_hash.build(self.position[active])
+        order, keys = self.cluster_hash.order, self.cluster_hash.sorted_keys
+        edges = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1, [len(keys)]))
+        cell_mins = np.minimum.reduceat(mins[order], edges[:-1])
+        cell_maxs = np.maximum.reduceat(maxs[order], edges[:-1])
+        # Nearby cells share a window; only groups far apart get separate ones
+        groups = np.unique(merge_boxes(cell_mins, cell_maxs, WINDOW_SLACK), return_inverse=True)[1]
+        boxes = [(cell_mins[groups == group].min(axis=0), cell_maxs[groups == group].max(axis=0))
+                 for group in range(int(groups.max()) + 1)]
+        homes = self.windows.homes(self.world, boxes) if self.windows is not None else None
+        if homes is None:
+            self.windows = VoxelWindowSet(self.world, [(mins - WINDOW_PADDING, maxs + WINDOW_PADDING)
+                                                       for mins, maxs in boxes], None)
+            self.windows_built += 1
+            homes = np.arange(len(boxes))
+        owners = np.full(self.count, -1, dtype=np.int64)
+        owners[active[order]] = np.repeat(homes[groups], np.diff(edges))
+        self.windows.owners = owners
+        return self.windows
+
+    def settle(self):
+        """Land falling blocks, and remove expired items and entities lost below the world"""
+        n = self.count
+        kind = self.kind[:n]
+        landed = np.flatnonzero((kind == ENTITY_FALLING_BLOCK) & self.on_ground[:n])
+        for index in landed:
+            x, y, z = np.floor(self.position[index]).astype(np.int64)
+            self.world.add_block(int(x), int(y), int(z), int(self.block_type[index]))
+        remove = (kind == ENTITY_ITEM) & (self.age[:n] > ITEM_LIFETIME)
+        remove |= self.position[:n, 1] < VOID_Y
+        remove[landed] = True
+        self.remove_indices(np.flatnonzero(remove))
+
+    def push_mobs_apart(self, dt):
+        """Entity-entity collision for mobs: overlapping pairs get pushed apart horizontally"""
+        mobs = np.flatnonzero(self.kind[:self.count] == ENTITY_MOB)
+        if len(mobs) < 2:
+            return
+        self.mob_hash.build(self.position[mobs])
+        first, second = self.mob_hash.pairs(self.mob_hash.cell_size)
+        first, second = mobs[first], mobs[second]
+        apart = self.position[first] - self.position[second]
+        apart[:, 1] = 0
+        distance = np.sqrt((apart ** 2).sum(axis=1))
+        reach = self.half_width[first] + self.half_width[second]
+        overlap = (distance < reach) & (distance > 1e-6)
+        if not overlap.any():
+            return
+        push = apart[overlap] / distance[overlap, None] * (self.mob_push * dt)
+        np.add.at(self.velocity, first[overlap], push)
+        np.add.at(self.velocity, second[overlap], -push)
+
+    def refresh_hash(self):
+        if self.hash_stale:
+            self.spatial_hash.build(self.position[:self.count].copy())
+            self.hash_stale = False
+
+    def nearby(self, x, y, z, radius, kind=None):
+        """Ids of entities (optionally of one kind) whose position is within radius"""
+        if self.count == 0:
+            return np.zeros(0, dtype=np.int64)
+        self.refresh_hash()
+        indices = self.spatial_hash.query((x, y, z), radius)
+        if kind is not None:
+            indices = indices[self.kind[indices] == kind]
+        return self.ids[indices]
+
+    def collect(self, x, y, z, radius, kind=ENTITY_ITEM):
+        """Remove entities of a kind near a point (e.g. items the player walks over); returns their block types"""
+        if self.count == 0:
+            return []
+        self.refresh_hash()
+        indices = self.spatial_hash.query((x, y, z), radius)
+        indices = indices[self.kind[indices] == kind]
+        block_types = self.block_type[indices].tolist()
+        self.remove_indices(indices)
+        return block_types
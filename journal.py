@@ -0,0 +1,210 @@
+import os
+import struct
+import time
+
+import numpy as np
+
+# A save directory holds two files:
+#   journal.log:  header (magic, format version, world seed), then fixed-size edit records
+#                 appended as they happen
+#   snapshot.bin: header (magic, format version, world seed, tick), then for each edited
+#                 chunk its coordinates, entry count and (local index, block type) entries
+# Both only describe edits; untouched terrain is regenerated from the seed.
+JOURNAL_MAGIC = b"PCWJ"
+SNAPSHOT_MAGIC = b"PCWS"
+FORMAT_VERSION = 1
+JOURNAL_HEADER = struct.Struct("<4sHq")
+SNAPSHOT_HEADER = struct.Struct("<4sHqI")
+SNAPSHOT_CHUNK = struct.Struct("<iiI")
+RECORD = struct.Struct("<iBiBBI")  # x, y, z, old type, new type, tick: 15 bytes
+RECORD_DTYPE = np.dtype([("x", "<i4"), ("y", "u1"), ("z", "<i4"),
+                         ("old", "u1"), ("new", "u1"), ("tick", "<u4")])  # Same layout, for batches
+ENTRY_DTYPE = np.dtype([("index", "<u2"), ("type", "u1")])
+
+JOURNAL_FILE = "journal.log"
+SNAPSHOT_FILE = "snapshot.bin"
+
+class JournalError(Exception):
+    pass
+
+def local_index(x, y, z, size=16):
+    """Position of a block inside its chunk as one 16-bit number"""
+    return ((x % size) * 256 + y) * size + z % size
+
+def read_header(path, header, magic):
+    with open(path, "rb") as f:
+        data = f.read(header.size)
+    if len(data) < header.size:
+        raise JournalError(f"{path} is too short")
+    fields = header.unpack(data)
+    if fields[0] != magic:
+        raise JournalError(f"{path} is not a world save file")
+    if fields[1] != FORMAT_VERSION:
+        raise JournalError(f"{path} has unsupported version {fields[1]}")
+    return fields
+
+class EditJournal:
+    """Write-ahead log of block edits for one world save directory.
+
+    Edits are appended to an in-memory buffer as compact records and
+    written out in batches by flush(), so logging costs microseconds and a
+    crash loses at most the last flush interval. compact() folds the log
+    into a per-chunk snapshot (written to a temporary file and renamed into
+    place) and starts an empty log; replaying a record twice is harmless
+    because each one stores the block's new type outright.
+    """
+    def __init__(self, directory, seed, flush_interval=0.5, compact_bytes=4 << 20, sync=True):
+        self.directory = directory
+        self.seed = seed
+        self.flush_interval = flush_interval  # Seconds between batched writes
+        self.compact_bytes = compact_bytes    # Log size that triggers compaction
+        self.sync = sync                      # fsync after each flush
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.edits = {}  # (chunk_x, chunk_z) -> {(x, y, z): block type} for every edited block
+        self.tick = 0    # Highest tick seen
+        self.buffer = bytearray()
+        self.last_flush = time.monotonic()
+        self.records_logged = 0
+        os.makedirs(directory, exist_ok=True)
+        self.load()
+        self.file = open(self.journal_path, "ab")
+        self.journal_bytes = self.file.tell()
+        if self.journal_bytes == 0:
+            self.start_journal()
+
+    @staticmethod
+    def saved_seed(directory):
+        """Seed of the world saved in directory, or None if there is no save yet"""
+        for name, header, magic in ((SNAPSHOT_FILE, SNAPSHOT_HEADER, SNAPSHOT_MAGIC),
+                                    (JOURNAL_FILE, JOURNAL_HEADER, JOURNAL_MAGIC)):
+            path = os.path.join(directory, name)
+            if os.path.exists(path) and os.path.getsize(path):
+                return read_header(path, header, magic)[2]
+        return None
+
+    def load(self):
+        """Rebuild the edit state from the snapshot and then the log"""
+        if os.path.exists(self.snapshot_path):
+            self.load_snapshot()
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path):
+            self.load_journal()
+
+    def check_seed(self, path, seed):
+        if seed != self.seed:
+            raise JournalError(f"{path} belongs to a world with seed {seed}, not {self.seed}")
+
+    def load_snapshot(self):
+        _, _, seed, self.tick = read_header(self.snapshot_path, SNAPSHOT_HEADER, SNAPSHOT_MAGIC)
+        self.check_seed(self.snapshot_path, seed)
+        with open(self.snapshot_path, "rb") as f:
+            data = f.read()
+        offset = SNAPSHOT_HEADER.size
+        while offset < len(data):
+            chunk_x, chunk_z, count = SNAPSHOT_CHUNK.unpack_from(data, offset)
+            offset += SNAPSHOT_CHUNK.size
+            entries = np.frombuffer(data, dtype=ENTRY_DTYPE, count=count, offset=offset)
+            offset += entries.nbytes
+            index = entries["index"].astype(np.int64)
+            xs = (index // (256 * 16)) + chunk_x * 16
+            ys = index // 16 % 256
+            zs = index % 16 + chunk_z * 16
+            self.edits[(chunk_x, chunk_z)] = dict(zip(zip(xs.tolist(), ys.tolist(), zs.tolist()),
+                                                      entries["type"].tolist()))
+
+    def load_journal(self):
+        _, _, seed = read_header(self.journal_path, JOURNAL_HEADER, JOURNAL_MAGIC)
+        self.check_seed(self.journal_path, seed)
+        with open(self.journal_path, "rb") as f:
+            data = f.read()
+        count = (len(data) - JOURNAL_HEADER.size) // RECORD_DTYPE.itemsize
+        complete = JOURNAL_HEADER.size + count * RECORD_DTYPE.itemsize
+        if complete < len(data):
+            # A crash mid-write left part of a record at the end; drop it
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(complete)
+        records = np.frombuffer(data, dtype=RECORD_DTYPE, count=count, offset=JOURNAL_HEADER.size)
+        self.apply_records(records["x"], records["y"], records["z"], records["new"])
+        if count:
+            self.tick = max(self.tick, int(records["tick"].max()))
+
+    def apply_records(self, xs, ys, zs, new_types):
+        for x, y, z, block_type in zip(xs.tolist(), ys.tolist(), zs.tolist(), new_types.tolist()):
+            self.edits.setdefault((x // 16, z // 16), {})[(x, y, z)] = block_type
+
+    def start_journal(self):
+        self.file.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, FORMAT_VERSION, self.seed))
+        self.file.flush()
+        self.journal_bytes = JOURNAL_HEADER.size
+
+    def log(self, x, y, z, old_type, new_type, tick):
+        """Record one block changing from old_type to new_type"""
+        self.buffer += RECORD.pack(x, y, z, old_type, new_type, tick)
+        self.edits.setdefault((x // 16, z // 16), {})[(x, y, z)] = new_type
+        self.tick = max(self.tick, tick)
+        self.records_logged += 1
+
+    def log_many(self, xs, ys, zs, old_types, new_types, tick):
+        """Record many block changes at once (equal-length arrays)"""
+        records = np.empty(len(xs), dtype=RECORD_DTYPE)
+        records["x"], records["y"], records["z"] = xs, ys, zs
+        records["old"], records["new"], records["tick"] = old_types, new_types, tick
+        self.buffer += records.tobytes()
+        self.apply_records(records["x"], records["y"], records["z"], records["new"])
+        self.tick = max(self.tick, tick)
+        self.records_logged += len(records)
+
+    def chunk_edits(self, coords):
+        """{(x, y, z): block type} for every saved edit in a chunk, or None"""
+        return self.edits.get(coords)
+
+    def flush(self):
+        """Write buffered records to the log (and to disk if sync is set)"""
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        self.file.write(self.buffer)
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+        self.journal_bytes += len(self.buffer)
+        self.buffer.clear()
+
+    def update(self):
+        """Call once per frame: flushes every flush_interval and compacts an oversized log"""
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+            if self.journal_bytes >= self.compact_bytes:
+                self.compact()
+
+    def compact(self):
+        """Fold everything logged so far into a fresh snapshot and empty the log"""
+        self.flush()
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, FORMAT_VERSION, self.seed, self.tick))
+            for (chunk_x, chunk_z), edits in sorted(self.edits.items()):
+                entries = np.empty(len(edits), dtype=ENTRY_DTYPE)
+                entries["index"] = [local_index(x, y, z) for x, y, z in edits]
+                entries["type"] = list(edits.values())
+                f.write(SNAPSHOT_CHUNK.pack(chunk_x, chunk_z, len(entries)))
+                f.write(entries.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # Only now is it safe to drop the log; a crash before this point replays it onto the new snapshot
+        self.file.close()
+        self.file = open(self.journal_path, "wb")
+        self.start_journal()
+
+    def stats(self):
+        return {
+            "edited_chunks": len(self.edits),
+            "edited_blocks": sum(len(edits) for edits in self.edits.values()),
+            "records_logged": self.records_logged,
+            "journal_bytes": self.journal_bytes + len(self.buffer),
+        }
+
+    def close(self):
+        self.compact()
+        self.file.close()
@@ -1,113 +1,147 @@
-import pygame
+import time
+
 import numpy as np
-from OpenGL.GL import *
-from OpenGL.GLU import *
-import math
-import random
-from collections import defaultdict
 
 from block import *
+from compression import *
+
+CHUNK_HEIGHT = 256
+
+# Generation stages tracked per chunk (see worldgen.py)
+STAGE_EMPTY = 0      # Allocated, no voxels yet
+STAGE_TERRAIN = 1    # Terrain filled in
+STAGE_DECORATED = 2  # Own decorations (trees) written, possibly into neighbours
+STAGE_FULL = 3       # Every neighbour is decorated too, so no more generated blocks will arrive
 
 class Chunk:
     def __init__(self, chunk_x, chunk_z, size=16):
         self.chunk_x = chunk_x
         self.chunk_z = chunk_z
         self.size = size
-        self.blocks = {}
-        self.display_list = None
-        self.needs_update = True
-        self.is_compiled = False
-        self.generate_terrain()
-        
-    def generate_terrain(self):
-        # Simpler, faster terrain generation
-        for x in range(self.size):
-            for z in range(self.size):
-                world_x = self.chunk_x * self.size + x
-                world_z = self.chunk_z * self.size + z
-                
-                # Simple height with less computation
-                height = int(10 + 3 * math.sin(world_x * 0.2) + 2 * math.cos(world_z * 0.2))
-                height = max(1, min(15, height))
-                
-                # Generate terrain layers
-                for y in range(max(0, height - 2), height + 1):
-                    block_type = 1  # Grass/dirt
-                    self.blocks[(world_x, y, world_z)] = Block(world_x, y, world_z, block_type)
-                
-                # Generate trees on top of terrain (2% chance)
-                if random.random() < 0.02:
-                    self.generate_tree(world_x, height + 1, world_z)
-    
-    def generate_tree(self, x, base_y, z):
-        """Generate a simple tree structure"""
-        # Tree trunk height (3-5 blocks)
-        trunk_height = random.randint(3, 5)
-        
-        # Generate trunk
-        for y in range(base_y, base_y + trunk_height):
-            self.blocks[(x, y, z)] = Block(x, y, z, 4)  # Brown trunk blocks
-        
-        # Generate leaves (simple cross pattern around top of trunk)
-        leaf_y = base_y + trunk_height
-        leaf_positions = [
-            # Center leaves
-            (x, leaf_y, z),
-            (x, leaf_y + 1, z),
-            # Cardinal directions
-            (x + 1, leaf_y, z), (x - 1, leaf_y, z),
-            (x, leaf_y, z + 1), (x, leaf_y, z - 1),
-            # Diagonals
-            (x + 1, leaf_y, z + 1), (x - 1, leaf_y, z + 1),
-            (x + 1, leaf_y, z - 1), (x - 1, leaf_y, z - 1),
-            # Some upper leaves
-            (x, leaf_y + 1, z + 1), (x, leaf_y + 1, z - 1),
-            (x + 1, leaf_y + 1, z), (x - 1, leaf_y + 1, z),
-        ]
-        
-        # Add leaf blocks (with some randomness)
-        for leaf_x, leaf_y_pos, leaf_z in leaf_positions:
-            if random.random() < 0.8:  # 80% chance for each leaf block
-                self.blocks[(leaf_x, leaf_y_pos, leaf_z)] = Block(leaf_x, leaf_y_pos, leaf_z, 2)
-    
+        self.origin_x = chunk_x * size
+        self.origin_z = chunk_z * size
+        # Block type ids indexed [local_x, y, local_z]; 0 is air
+        self._voxels = np.zeros((size, CHUNK_HEIGHT, size), dtype=np.uint8)
+        self.compressed = None    # CompressedVoxels while the chunk is cold (then _voxels is None)
+        self.last_used = time.monotonic()  # Last time the chunk was rendered or decompressed
+        self.mesh = None          # GPU mesh handle owned by the renderer
+        self.needs_update = True  # Voxels changed since the last uploaded mesh
+        self.is_compiled = False  # A mesh has been uploaded (possibly stale)
+        self.version = 0          # Bumped on every change so in-flight meshes can be recognised as stale
+        self.stage = STAGE_EMPTY  # Filled in by WorldGenerator
+        # Highest and lowest non-air y of each [local_x, local_z] column (-1 and CHUNK_HEIGHT when empty)
+        self.top = np.full((size, size), -1, dtype=np.int16)
+        self.bottom = np.full((size, size), CHUNK_HEIGHT, dtype=np.int16)
+
+    @property
+    def voxels(self):
+        """Block type ids indexed [local_x, y, local_z], decompressed on first access after compress()"""
+        if self._voxels is None:
+            self._voxels = self.compressed.decompress()
+            self.compressed = None
+            self.last_used = time.monotonic()
+        return self._voxels
+
+    def compress(self):
+        """Swap the voxel array for its run-length encoding; returns whether it got smaller.
+
+        Call from the thread that owns the world, never while generator
+        workers are running; a later access from a worker decompresses as
+        usual because each chunk is written by one worker at a time.
+        """
+        if self._voxels is None:
+            return True
+        compressed = CompressedVoxels.from_array(self._voxels)
+        if compressed.nbytes >= self._voxels.nbytes:
+            return False
+        self.compressed = compressed
+        self._voxels = None
+        return True
+
+    @property
+    def is_compressed(self):
+        return self._voxels is None
+
+    @property
+    def voxel_nbytes(self):
+        """Bytes currently held for block storage"""
+        return self.compressed.nbytes if self._voxels is None else self._voxels.nbytes
+
+    def contains(self, x, z):
+        """Whether world column (x, z) belongs to this chunk"""
+        return 0 <= x - self.origin_x < self.size and 0 <= z - self.origin_z < self.size
+
+    def get_block_type_id(self, x, y, z):
+        """Type id at world coordinates inside this chunk (0 for air)"""
+        return int(self.voxels[x - self.origin_x, y, z - self.origin_z])
+
     def get_block(self, x, y, z):
-        return self.blocks.get((x, y, z))
-    
-    def add_block(self, x, y, z, block_type=1):
-        self.blocks[(x, y, z)] = Block(x, y, z, block_type)
+        """Shared BlockType at world coordinates inside this chunk, or None for air"""
+        return BLOCK_TYPE_TABLE[self.voxels[x - self.origin_x, y, z - self.origin_z]]
+
+    def set_block_type(self, x, y, z, block_type):
+        """Raw voxel write that does not flag the chunk for recompilation"""
+        local_x, local_z = x - self.origin_x, z - self.origin_z
+        self.voxels[local_x, y, local_z] = block_type
+        if block_type:
+            if y > self.top[local_x, local_z]:
+                self.top[local_x, local_z] = y
+            if y < self.bottom[local_x, local_z]:
+                self.bottom[local_x, local_z] = y
+        elif y == self.top[local_x, local_z] or y == self.bottom[local_x, local_z]:
+            self.update_heightmap(local_x, local_z, local_x + 1, local_z + 1)
+
+    def update_heightmap(self, x0=0, z0=0, x1=None, z1=None):
+        """Recompute top and bottom for the local columns [x0, x1) x [z0, z1) (default: all)"""
+        x1 = self.size if x1 is None else x1
+        z1 = self.size if z1 is None else z1
+        filled = self.voxels[x0:x1, :, z0:z1] != AIR
+        any_filled = filled.any(axis=1)
+        self.top[x0:x1, z0:z1] = np.where(any_filled, CHUNK_HEIGHT - 1 - filled[:, ::-1, :].argmax(axis=1), -1)
+        self.bottom[x0:x1, z0:z1] = np.where(any_filled, filled.argmax(axis=1), CHUNK_HEIGHT)
+
+    @property
+    def max_height(self):
+        """Highest non-air y in the chunk, or -1 if it is empty"""
+        return int(self.top.max())
+
+    @property
+    def min_height(self):
+        """Lowest non-air y in the chunk, or CHUNK_HEIGHT if it is empty"""
+        return int(self.bottom.min())
+
+    def mark_dirty(self):
+        """Flag the chunk for remeshing; the old mesh keeps rendering until the new one is uploaded"""
         self.needs_update = True
-    
+        self.version += 1
+
+    def add_block(self, x, y, z, block_type=1):
+        self.set_block_type(x, y, z, block_type)
+        self.mark_dirty()
+
     def remove_block(self, x, y, z):
-        if (x, y, z) in self.blocks:
-            del self.blocks[(x, y, z)]
-            self.needs_update = True
-            self.is_compiled = False
-    
-    def compile_chunk(self, world):
-        """Compile the chunk into a display list for efficient rendering"""
-        if self.display_list is not None:
-            glDeleteLists(self.display_list, 1)
-        
-        self.display_list = glGenLists(1)
-        glNewList(self.display_list, GL_COMPILE)
-        
-        # Render all blocks in this chunk
-        for block in self.blocks.values():
-            if world.is_block_visible(block.x, block.y, block.z):
-                world.draw_cube_for_chunk(block.x, block.y, block.z, block.type, self)
-        
-        glEndList()
-        self.needs_update = False
-        self.is_compiled = True
-    
-    def render(self):
-        """Render the compiled chunk"""
-        if self.display_list is not None and self.is_compiled:
-            glCallList(self.display_list)
-    
-    def cleanup(self):
-        """Clean up OpenGL resources"""
-        if self.display_list is not None:
-            glDeleteLists(self.display_list, 1)
-            self.display_list = None
-            self.is_compiled = False
+        if self.get_block_type_id(x, y, z):
+            self.set_block_type(x, y, z, AIR)
+            self.mark_dirty()
+
+    def set_blocks(self, edits):
+        """Apply {(x, y, z): block_type} edits in one pass; a type of 0 removes the block"""
+        if not edits:
+            return
+        positions = np.array(list(edits.keys()), dtype=np.int64)
+        types = np.array([block_type or AIR for block_type in edits.values()], dtype=np.uint8)
+        local_xs, local_zs = positions[:, 0] - self.origin_x, positions[:, 2] - self.origin_z
+        self.voxels[local_xs, positions[:, 1], local_zs] = types
+        self.update_heightmap(local_xs.min(), local_zs.min(), local_xs.max() + 1, local_zs.max() + 1)
+        self.mark_dirty()
+
+    def block_count(self):
+        """Number of non-air voxels"""
+        return int(np.count_nonzero(self.voxels))
+
+    def iter_blocks(self):
+        """Yield (x, y, z, type_id) in world coordinates for every non-air voxel"""
+        local_x, ys, local_z = np.nonzero(self.voxels)
+        types = self.voxels[local_x, ys, local_z]
+        for lx, y, lz, block_type in zip(local_x.tolist(), ys.tolist(), local_z.tolist(), types.tolist()):
+            yield lx + self.origin_x, y, lz + self.origin_z, block_type
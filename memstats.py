@@ -0,0 +1,110 @@
+import json
+import statistics
+import time
+
+# Categories reported by the world and renderer
+MEM_VOXELS = "voxels"          # Chunk block storage
+MEM_MESH_CPU = "mesh_cpu"      # Finished meshes waiting for upload, and transparent faces kept for sorting
+MEM_GPU_MESH = "gpu_mesh"      # Vertex data uploaded for a chunk
+MEM_GPU_SLACK = "gpu_slack"    # Reserved vertex buffer space not holding vertex data (owned by the renderer)
+
+def format_bytes(nbytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(nbytes) < 1024 or unit == "GB":
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+
+class MemoryTracker:
+    """Byte counts per owner (usually chunk coordinates) in named categories.
+
+    Allocation sites report their own sizes with set()/release(), so totals
+    and high-water marks are always current without walking the world.
+    """
+    def __init__(self):
+        self.usage = {}            # category -> {owner: bytes}
+        self.totals = {}           # category -> bytes
+        self.high_water = {}       # category -> highest total seen
+        self.total = 0
+        self.total_high_water = 0
+
+    def set(self, category, owner, nbytes):
+        """Record that owner currently holds nbytes in category"""
+        if nbytes < 0:
+            raise ValueError(f"{category} usage of {owner!r} would be negative ({nbytes} bytes)")
+        owners = self.usage.setdefault(category, {})
+        delta = nbytes - owners.get(owner, 0)
+        if nbytes:
+            owners[owner] = nbytes
+        else:
+            owners.pop(owner, None)
+        total = self.totals.get(category, 0) + delta
+        self.totals[category] = total
+        self.high_water[category] = max(self.high_water.get(category, 0), total)
+        self.total += delta
+        self.total_high_water = max(self.total_high_water, self.total)
+
+    def add(self, category, owner, nbytes):
+        """Adjust an owner's bytes by a (possibly negative) amount"""
+        self.set(category, owner, self.get(category, owner) + nbytes)
+
+    def get(self, category, owner):
+        return self.usage.get(category, {}).get(owner, 0)
+
+    def release(self, category, owner):
+        self.set(category, owner, 0)
+
+    def release_owner(self, owner):
+        """Forget everything an owner holds (e.g. when its chunk unloads)"""
+        for category, owners in self.usage.items():
+            if owner in owners:
+                self.set(category, owner, 0)
+
+    def owner_usage(self, owner):
+        """Bytes per category held by one owner"""
+        return {category: owners[owner] for category, owners in self.usage.items() if owner in owners}
+
+    def chunk_owners(self):
+        """Every owner that is a chunk coordinate"""
+        owners = set()
+        for category_owners in self.usage.values():
+            owners.update(owner for owner in category_owners if isinstance(owner, tuple))
+        return owners
+
+    def outliers(self, category, factor=3.0, min_bytes=16384):
+        """Chunks holding more than factor x the median chunk in a category, largest first"""
+        owners = {owner: nbytes for owner, nbytes in self.usage.get(category, {}).items()
+                  if isinstance(owner, tuple)}
+        if len(owners) < 2:
+            return []
+        median = statistics.median(owners.values())
+        found = [(owner, nbytes) for owner, nbytes in owners.items()
+                 if nbytes > factor * median and nbytes >= min_bytes]
+        return sorted(found, key=lambda item: -item[1])
+
+    def snapshot(self, outlier_factor=3.0):
+        """JSON-friendly view of every total, high-water mark, chunk and outlier"""
+        chunks = {}
+        for owner in sorted(self.chunk_owners()):
+            chunks[f"{owner[0]},{owner[1]}"] = self.owner_usage(owner)
+        return {
+            "time": time.time(),
+            "total": self.total,
+            "total_high_water": self.total_high_water,
+            "totals": dict(self.totals),
+            "high_water": dict(self.high_water),
+            "chunk_count": len(chunks),
+            "chunks": chunks,
+            "outliers": {category: [{"chunk": list(owner), "bytes": nbytes}
+                                    for owner, nbytes in self.outliers(category, outlier_factor)]
+                         for category in self.usage},
+        }
+
+    def dump(self, path):
+        """Write a snapshot as JSON"""
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def summary(self):
+        """One-line totals for debug output"""
+        parts = [f"{category} {format_bytes(total)}" for category, total in sorted(self.totals.items()) if total]
+        return f"{', '.join(parts)} (total {format_bytes(self.total)}, peak {format_bytes(self.total_high_water)})"
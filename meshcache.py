@@ -0,0 +1,216 @@
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from collections import deque
+
+import numpy as np
+
+from mesher import *
+from memstats import format_bytes
+
+# A cache directory holds two files:
+#   meshes.bin: a fixed-size ring of entries, written through a memory map; each entry is
+#               a header (content key, array lengths) followed by the ChunkMeshData arrays
+#   index.bin:  header (magic, format version, capacity, mesher fingerprint, write position),
+#               then one record per live entry, oldest first
+# The index is rewritten on close. Entries carry their own key, so an index left behind by a
+# crash can at worst point at space that was overwritten since, which reads as a miss.
+INDEX_MAGIC = b"PCMC"
+FORMAT_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sHQ16sQ")
+ENTRY_HEADER = struct.Struct("<16sIIIII")  # Key, connectivity, vertex, section, transparent vertex and section counts
+INDEX_DTYPE = np.dtype([("key", "V16"), ("offset", "<u8"), ("length", "<u4"), ("build_seconds", "<f4")])
+ENTRY_ALIGN = 8
+
+DATA_FILE = "meshes.bin"
+INDEX_FILE = "index.bin"
+
+def mesher_fingerprint():
+    """Hash of everything besides the voxels that decides what build_mesh produces"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(struct.pack("<8I", FORMAT_VERSION, SECTION_SIZE, FACE_SHIFT, U_SHIFT, V_SHIFT,
+                              AO_SHIFT, LAYER_SHIFT, BYTES_PER_VERTEX))
+    hasher.update(OPAQUE_TABLE.tobytes())
+    for table in FACE_LAYER_TABLES:
+        hasher.update(np.ascontiguousarray(table, dtype=np.uint32).tobytes())
+    return hasher.digest()
+
+def content_key(snapshot):
+    """Key of a mesh: a hash of the chunk's voxels plus the neighbour borders around them"""
+    return hashlib.blake2b(np.ascontiguousarray(snapshot.padded), digest_size=16).digest()
+
+class MeshCache:
+    """On-disk store of finished chunk meshes, keyed by the voxels they were built from.
+
+    A chunk that comes back with the same blocks and the same neighbour
+    borders (after a restart, or after walking away and returning) gets its
+    mesh copied out of the memory-mapped data file instead of being meshed
+    again. Entries are written one after another into a ring of capacity
+    bytes; when the ring wraps, the oldest entries are overwritten, so the
+    file never grows past capacity. The cache belongs to the main thread.
+
+    Without a directory the cache lives in a temporary directory that is
+    removed on close, which still saves remeshing on revisits.
+    """
+    def __init__(self, directory=None, capacity=128 << 20):
+        self.temporary = directory is None
+        self.directory = tempfile.mkdtemp(prefix="philcraft-meshes-") if directory is None else directory
+        self.capacity = capacity
+        self.data_path = os.path.join(self.directory, DATA_FILE)
+        self.index_path = os.path.join(self.directory, INDEX_FILE)
+        self.fingerprint = mesher_fingerprint()
+        self.entries = {}     # Key -> (offset, length, build seconds)
+        self.order = deque()  # (key, offset, length) in write order, oldest first
+        self.write_pos = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.seconds_saved = 0.0  # Meshing time the hits would have cost, as measured when they were built
+        os.makedirs(self.directory, exist_ok=True)
+        self.load_index()
+        with open(self.data_path, "a+b") as f:
+            if os.path.getsize(self.data_path) != capacity:
+                f.truncate(capacity)
+                self.clear()
+            self.map = mmap.mmap(f.fileno(), capacity)
+
+    def load_index(self):
+        """Restore the entries of an earlier session; anything that does not match is ignored"""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        if len(data) < INDEX_HEADER.size:
+            return
+        magic, version, capacity, fingerprint, write_pos = INDEX_HEADER.unpack_from(data)
+        if (magic != INDEX_MAGIC or version != FORMAT_VERSION or capacity != self.capacity
+                or fingerprint != self.fingerprint):
+            return  # Another layout or another mesher: none of the old meshes can be trusted
+        count = (len(data) - INDEX_HEADER.size) // INDEX_DTYPE.itemsize
+        records = np.frombuffer(data, dtype=INDEX_DTYPE, count=count, offset=INDEX_HEADER.size)
+        for key, offset, length, build_seconds in zip(records["key"].tolist(), records["offset"].tolist(),
+                                                      records["length"].tolist(), records["build_seconds"].tolist()):
+            self.entries[key] = (offset, length, build_seconds)
+            self.order.append((key, offset, length))
+        self.write_pos = write_pos
+
+    def save_index(self):
+        live = [(key, offset, length, self.entries[key][2]) for key, offset, length in self.order
+                if self.entries.get(key, (None,))[0] == offset]
+        records = np.array(live, dtype=INDEX_DTYPE)
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, FORMAT_VERSION, self.capacity, self.fingerprint, self.write_pos))
+            f.write(records.tobytes())
+        os.replace(temp_path, self.index_path)
+
+    def clear(self):
+        self.entries.clear()
+        self.order.clear()
+        self.write_pos = 0
+
+    def key(self, snapshot):
+        return content_key(snapshot)
+
+    def load(self, key, snapshot):
+        """The cached mesh for key, stamped with the snapshot's chunk and version, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        offset, length, build_seconds = entry
+        stored_key, connectivity_count, vertex_count, section_count, transparent_count, transparent_section_count = \
+            ENTRY_HEADER.unpack_from(self.map, offset)
+        if stored_key != key:
+            # Overwritten after the index was last saved
+            del self.entries[key]
+            self.misses += 1
+            return None
+        offset += ENTRY_HEADER.size
+
+        def read(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(self.map, dtype=dtype, count=count, offset=offset).copy()
+            offset += array.nbytes
+            return array
+
+        connectivity = read("<u8", connectivity_count).tolist()
+        vertices = read("<u4", vertex_count)
+        sections = [tuple(row) for row in read("<i4", section_count * 3).reshape(-1, 3).tolist()]
+        transparent_vertices = read("<u4", transparent_count)
+        transparent_sections = [tuple(row) for row in read("<i4", transparent_section_count * 3).reshape(-1, 3).tolist()]
+        transparent_centers = read("<f4", transparent_count // 6 * 3).reshape(-1, 3)
+        self.hits += 1
+        self.seconds_saved += build_seconds
+        return ChunkMeshData(snapshot.chunk_x, snapshot.chunk_z, snapshot.version, vertices, sections, connectivity,
+                             transparent_vertices, transparent_sections, transparent_centers)
+
+    def store(self, key, mesh):
+        """Write a freshly built mesh into the ring, overwriting the oldest entries it needs space from"""
+        if key in self.entries:
+            return
+        blob = b"".join([
+            ENTRY_HEADER.pack(key, len(mesh.connectivity), len(mesh.vertices), len(mesh.sections),
+                              len(mesh.transparent_vertices), len(mesh.transparent_sections)),
+            np.asarray(mesh.connectivity, dtype="<u8").tobytes(),
+            mesh.vertices.astype("<u4", copy=False).tobytes(),
+            np.asarray(mesh.sections, dtype="<i4").tobytes(),
+            mesh.transparent_vertices.astype("<u4", copy=False).tobytes(),
+            np.asarray(mesh.transparent_sections, dtype="<i4").tobytes(),
+            mesh.transparent_centers.astype("<f4", copy=False).tobytes(),
+        ])
+        length = -(-len(blob) // ENTRY_ALIGN) * ENTRY_ALIGN
+        if length > self.capacity:
+            return
+        if self.write_pos + length > self.capacity:
+            # Wrap: everything between the write position and the end is older than anything before it
+            while self.order and self.order[0][1] >= self.write_pos:
+                self.evict()
+            self.write_pos = 0
+        while self.order and self.write_pos <= self.order[0][1] < self.write_pos + length:
+            self.evict()
+        self.map[self.write_pos:self.write_pos + len(blob)] = blob
+        self.entries[key] = (self.write_pos, length, mesh.build_seconds)
+        self.order.append((key, self.write_pos, length))
+        self.write_pos += length
+        self.stores += 1
+
+    def evict(self):
+        key, offset, _ = self.order.popleft()
+        if self.entries.get(key, (None,))[0] == offset:
+            del self.entries[key]
+        self.evictions += 1
+
+    def used_bytes(self):
+        return sum(length for _, _, length in self.order)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "seconds_saved": self.seconds_saved,
+            "used_bytes": self.used_bytes(),
+            "capacity": self.capacity,
+        }
+
+    def summary(self):
+        stats = self.stats()
+        return (f"{stats['hits']}/{stats['hits'] + stats['misses']} hits ({stats['hit_rate']:.0%}), "
+                f"{stats['seconds_saved']:.2f} s of meshing saved, {stats['entries']} meshes in "
+                f"{format_bytes(stats['used_bytes'])} of {format_bytes(stats['capacity'])}")
+
+    def close(self):
+        self.map.close()
+        if self.temporary:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        else:
+            self.save_index()
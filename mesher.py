@@ -0,0 +1,389 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from block import *
+
+SECTION_SIZE = 16  # Meshes are split into 16x16x16 sections so positions fit in 5 bits per axis
+
+# Packed vertex layout: one uint32 per vertex, decoded by the chunk vertex shader (renderer.py)
+#   bits 0-14   local x, y, z within the section (5 bits each, 0..16)
+#   bits 15-17  face index into FACES
+#   bits 18-19  texture corner (u, v)
+#   bits 20-21  ambient occlusion (0 = fully occluded, 3 = open)
+#   bits 22-29  texture array layer
+FACE_SHIFT = 15
+U_SHIFT = 18
+V_SHIFT = 19
+AO_SHIFT = 20
+LAYER_SHIFT = 22
+BYTES_PER_VERTEX = 4
+
+# Face definitions shared with the original per-cube drawing code:
+# direction offset, corner offsets (counter-clockwise seen from outside), brightness
+FACES = [
+    ((0, 0, -1), [(0, 0, 0), (0, 1, 0), (1, 1, 0), (1, 0, 0)], 0.8),  # Front face
+    ((0, 0, 1),  [(1, 0, 1), (1, 1, 1), (0, 1, 1), (0, 0, 1)], 0.8),  # Back face
+    ((0, -1, 0), [(0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1)], 0.6),  # Bottom face
+    ((0, 1, 0),  [(0, 1, 0), (0, 1, 1), (1, 1, 1), (1, 1, 0)], 1.0),  # Top face
+    ((-1, 0, 0), [(0, 0, 0), (0, 0, 1), (0, 1, 1), (0, 1, 0)], 0.7),  # Left face
+    ((1, 0, 0),  [(1, 0, 0), (1, 1, 0), (1, 1, 1), (1, 0, 1)], 0.9),  # Right face
+]
+
+# Triangles of a quad: split along the 0-2 diagonal, or along 1-3 when that hides AO seams better
+QUAD_TRIANGLES = np.array([0, 1, 2, 0, 2, 3])
+FLIPPED_QUAD_TRIANGLES = np.array([1, 2, 3, 1, 3, 0])
+
+def _face_layer_table(direction):
+    """Texture layer for every possible type id, for faces pointing along direction"""
+    table = np.zeros(256, dtype=np.uint32)
+    for type_id in range(1, 256):
+        table[type_id] = BLOCK_TYPE_TABLE[type_id].face_texture(direction)
+    return table
+
+def _corner_uv_selectors(direction, corners):
+    """For each corner, whether it takes u1 (vs u0) and v1 (vs v0), projecting onto the face plane"""
+    dx, dy, dz = direction
+    selectors = []
+    for cx, cy, cz in corners:
+        if dy != 0:
+            s, t = cx, cz
+        elif dx != 0:
+            s, t = cz, cy
+        else:
+            s, t = cx, cy
+        selectors.append((s, t))
+    return np.array(selectors, dtype=np.uint32)
+
+def _corner_ao_offsets(direction, corners):
+    """For each corner, the offsets (from the block) of its two side neighbours and diagonal neighbour in the layer the face looks into"""
+    normal_axis = [axis for axis in range(3) if direction[axis]][0]
+    axis_a, axis_b = [axis for axis in range(3) if axis != normal_axis]
+    offsets = []
+    for corner in corners:
+        side_a = list(direction)
+        side_a[axis_a] = 1 if corner[axis_a] else -1
+        side_b = list(direction)
+        side_b[axis_b] = 1 if corner[axis_b] else -1
+        diagonal = list(side_a)
+        diagonal[axis_b] = side_b[axis_b]
+        offsets.append((side_a, side_b, diagonal))
+    return np.array(offsets, dtype=np.int64)  # (4 corners, 3 neighbours, xyz)
+
+# Connectivity masks hold bit (a * 6 + b) when faces a and b (FACES indices) are joined through open cells
+ALL_FACES_CONNECTED = (1 << 36) - 1
+NO_LABEL = np.iinfo(np.int32).max
+
+def face_pair_bit(face_a, face_b):
+    return 1 << (face_a * 6 + face_b)
+
+def section_connectivity(open_cells):
+    """Which pairs of section faces are joined through open cells, for every section of a chunk.
+
+    open_cells is a (size, height, size) bool array. Connected components of
+    open cells are labelled for all sections at once by repeatedly taking the
+    minimum label of each cell's neighbours (never across a section boundary)
+    and shortcutting labels through the cell they point at, which converges
+    in a handful of passes even for winding caves. Returns one int mask per
+    section.
+    """
+    size, height, _ = open_cells.shape
+    section_count = height // SECTION_SIZE
+    masks = []
+    mixed = []
+    for section_y in range(section_count):
+        cells = open_cells[:, section_y * SECTION_SIZE:(section_y + 1) * SECTION_SIZE, :]
+        if cells.all():
+            masks.append(ALL_FACES_CONNECTED)
+        elif not cells.any():
+            masks.append(0)
+        else:
+            masks.append(None)
+            mixed.append(section_y)
+    if not mixed:
+        return masks
+
+    # Only the mixed sections need labelling; stack them so one pass handles them all
+    cells = np.concatenate([open_cells[:, section_y * SECTION_SIZE:(section_y + 1) * SECTION_SIZE, :]
+                            for section_y in mixed], axis=1)
+    cell_index = np.arange(cells.size, dtype=np.int32).reshape(cells.shape)
+    labels = np.where(cells, cell_index, NO_LABEL)
+    while True:
+        merged = labels.copy()
+        for axis in range(3):
+            forward = [slice(None)] * 3
+            backward = [slice(None)] * 3
+            forward[axis] = slice(1, None)
+            backward[axis] = slice(None, -1)
+            from_below = labels[tuple(backward)]
+            from_above = labels[tuple(forward)]
+            if axis == 1:
+                # Keep labels inside their own section
+                from_below = from_below.copy()
+                from_above = from_above.copy()
+                from_below[:, SECTION_SIZE - 1::SECTION_SIZE, :] = NO_LABEL
+                from_above[:, SECTION_SIZE - 1::SECTION_SIZE, :] = NO_LABEL
+            np.minimum(merged[tuple(forward)], from_below, out=merged[tuple(forward)])
+            np.minimum(merged[tuple(backward)], from_above, out=merged[tuple(backward)])
+        merged[~cells] = NO_LABEL
+        flat = merged.reshape(-1)
+        has_label = flat != NO_LABEL
+        flat[has_label] = flat[flat[has_label]]
+        if np.array_equal(merged, labels):
+            break
+        labels = merged
+
+    for index, section_y in enumerate(mixed):
+        section = labels[:, index * SECTION_SIZE:(index + 1) * SECTION_SIZE, :]
+        face_labels = [section[:, :, 0], section[:, :, -1], section[:, 0, :],
+                       section[:, -1, :], section[0, :, :], section[-1, :, :]]
+        face_labels = [np.unique(face[face != NO_LABEL]) for face in face_labels]
+        mask = 0
+        for face_a in range(6):
+            for face_b in range(face_a, 6):
+                if len(np.intersect1d(face_labels[face_a], face_labels[face_b], assume_unique=True)):
+                    mask |= face_pair_bit(face_a, face_b) | face_pair_bit(face_b, face_a)
+        masks[section_y] = mask
+    return masks
+
+def padded_voxels(world, chunk):
+    """Chunk voxels with a one-block border borrowed from neighbouring chunks (air above/below the world)"""
+    size = chunk.size
+    height = chunk.voxels.shape[1]
+    padded = np.zeros((size + 2, height + 2, size + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1, 1:-1] = chunk.voxels
+    for dx, dz in [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]:
+        neighbour = world.chunks.get((chunk.chunk_x + dx, chunk.chunk_z + dz))
+        if neighbour is None:
+            continue
+        src_x = slice(size - 1, size) if dx < 0 else slice(0, 1) if dx > 0 else slice(0, size)
+        dst_x = slice(0, 1) if dx < 0 else slice(size + 1, size + 2) if dx > 0 else slice(1, size + 1)
+        src_z = slice(size - 1, size) if dz < 0 else slice(0, 1) if dz > 0 else slice(0, size)
+        dst_z = slice(0, 1) if dz < 0 else slice(size + 1, size + 2) if dz > 0 else slice(1, size + 1)
+        padded[dst_x, 1:-1, dst_z] = neighbour.voxels[src_x, :, src_z]
+    return padded
+
+class MeshSnapshot:
+    """Everything needed to mesh a chunk, copied so it can be meshed off the main thread"""
+    __slots__ = ("chunk_x", "chunk_z", "padded", "version")
+
+    def __init__(self, chunk_x, chunk_z, padded, version):
+        self.chunk_x = chunk_x
+        self.chunk_z = chunk_z
+        self.padded = padded    # Voxels plus a one-block border from the neighbours
+        self.version = version  # Chunk.version when the snapshot was taken
+
+class ChunkMeshData:
+    """CPU-side mesh: packed uint32 vertices (six per quad), grouped by section.
+
+    sections lists (section_y, first_vertex, vertex_count) for every
+    non-empty section; each range is drawn with its section's world origin.
+    Faces of transparent blocks are kept apart in transparent_vertices and
+    transparent_sections, with the chunk-local centre of every quad in
+    transparent_centers (one row per six vertices) so they can be sorted
+    back to front. connectivity holds a face-pair mask per section (see
+    section_connectivity) for occlusion culling. build_seconds is how long
+    meshing took (what loading it from a MeshCache saves).
+    """
+    __slots__ = ("chunk_x", "chunk_z", "version", "vertices", "sections", "connectivity",
+                 "transparent_vertices", "transparent_sections", "transparent_centers", "build_seconds")
+
+    def __init__(self, chunk_x, chunk_z, version, vertices, sections, connectivity,
+                 transparent_vertices, transparent_sections, transparent_centers, build_seconds=0.0):
+        self.chunk_x = chunk_x
+        self.chunk_z = chunk_z
+        self.version = version
+        self.vertices = vertices
+        self.sections = sections
+        self.connectivity = connectivity
+        self.transparent_vertices = transparent_vertices
+        self.transparent_sections = transparent_sections
+        self.transparent_centers = transparent_centers
+        self.build_seconds = build_seconds
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices) + len(self.transparent_vertices)
+
+    @property
+    def nbytes(self):
+        return self.vertices.nbytes + self.transparent_vertices.nbytes + self.transparent_centers.nbytes
+
+def snapshot_chunk(world, chunk):
+    """Copy a chunk and its border voxels; must run on the thread that owns the world"""
+    return MeshSnapshot(chunk.chunk_x, chunk.chunk_z, padded_voxels(world, chunk), chunk.version)
+
+def group_by_section(quads, quad_sections, section_count):
+    """Concatenate per-face quad arrays so each section is one contiguous range.
+
+    Returns the flat vertices, the (section_y, first, count) list and the
+    order applied to the quads (to reorder anything kept per quad).
+    """
+    if not quads:
+        return np.zeros(0, dtype=np.uint32), [], np.zeros(0, dtype=np.int64)
+    quad_sections = np.concatenate(quad_sections)
+    order = np.argsort(quad_sections, kind="stable")
+    vertices = np.concatenate(quads)[order].reshape(-1)
+    counts = np.bincount(quad_sections, minlength=section_count) * 6
+    firsts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sections = [(section_y, int(firsts[section_y]), int(counts[section_y]))
+                for section_y in range(section_count) if counts[section_y]]
+    return vertices, sections, order
+
+def build_mesh(snapshot):
+    """Mesh every exposed block face of a snapshot into packed vertex data.
+
+    Pure CPU work with no world or GL access, so it can run on any thread or
+    in another process. Exposure is found for all voxels at once by comparing
+    the padded volume with itself shifted one cell along each face direction.
+    A face is exposed unless the neighbour it faces is opaque, so blocks
+    behind leaves are still drawn; faces of transparent blocks go into a
+    separate mesh that is drawn blended after everything opaque.
+    """
+    started = time.perf_counter()
+    padded = snapshot.padded
+    inner = padded[1:-1, 1:-1, 1:-1]
+    padded_opaque = OPAQUE_TABLE[padded]
+    solid = inner != AIR
+    section_count = inner.shape[1] // SECTION_SIZE
+    connectivity = section_connectivity(~padded_opaque[1:-1, 1:-1, 1:-1])
+
+    quads = ([], [])          # Opaque, transparent
+    quad_sections = ([], [])
+    centers = []
+    for face_index, (direction, corners, brightness) in enumerate(FACES):
+        dx, dy, dz = direction
+        neighbour_opaque = padded_opaque[1 + dx:padded.shape[0] - 1 + dx,
+                                         1 + dy:padded.shape[1] - 1 + dy,
+                                         1 + dz:padded.shape[2] - 1 + dz]
+        local_x, ys, local_z = np.nonzero(solid & ~neighbour_opaque)
+        if len(local_x) == 0:
+            continue
+        types = inner[local_x, ys, local_z]
+
+        # Ambient occlusion: count opaque blocks around each corner in the layer the face looks into
+        occluders = FACE_AO_OFFSETS[face_index]
+        ao = np.empty((len(types), 4), dtype=np.uint32)
+        for corner in range(4):
+            side_a, side_b, diagonal = [padded_opaque[local_x + 1 + ox, ys + 1 + oy, local_z + 1 + oz]
+                                        for ox, oy, oz in occluders[corner]]
+            ao[:, corner] = np.where(side_a & side_b, 0, 3 - side_a.astype(np.uint32) - side_b - diagonal)
+
+        corner_offsets = np.array(corners, dtype=np.uint32)
+        xs = local_x.astype(np.uint32)[:, None] + corner_offsets[None, :, 0]
+        section_ys = (ys & (SECTION_SIZE - 1)).astype(np.uint32)[:, None] + corner_offsets[None, :, 1]
+        zs = local_z.astype(np.uint32)[:, None] + corner_offsets[None, :, 2]
+        selectors = FACE_UV_SELECTORS[face_index]
+        packed = (xs | (section_ys << 5) | (zs << 10) | np.uint32(face_index << FACE_SHIFT)
+                  | (selectors[None, :, 0] << U_SHIFT) | (selectors[None, :, 1] << V_SHIFT)
+                  | (ao << AO_SHIFT) | (FACE_LAYER_TABLES[face_index][types][:, None] << LAYER_SHIFT))
+
+        # Split each quad along the diagonal that keeps occlusion gradients symmetric
+        flip = (ao[:, 0] + ao[:, 2]) < (ao[:, 1] + ao[:, 3])
+        order = np.where(flip[:, None], FLIPPED_QUAD_TRIANGLES, QUAD_TRIANGLES)
+        face_quads = np.take_along_axis(packed, order, axis=1)
+        face_sections = ys // SECTION_SIZE
+
+        see_through = ~OPAQUE_TABLE[types]
+        if not see_through.any():
+            quads[0].append(face_quads)
+            quad_sections[0].append(face_sections)
+            continue
+        quads[0].append(face_quads[~see_through])
+        quad_sections[0].append(face_sections[~see_through])
+        quads[1].append(face_quads[see_through])
+        quad_sections[1].append(face_sections[see_through])
+        centers.append(np.column_stack([local_x[see_through] + 0.5 + 0.5 * dx, ys[see_through] + 0.5 + 0.5 * dy,
+                                        local_z[see_through] + 0.5 + 0.5 * dz]).astype(np.float32))
+
+    vertices, sections, _ = group_by_section(quads[0], quad_sections[0], section_count)
+    transparent_vertices, transparent_sections, order = group_by_section(quads[1], quad_sections[1], section_count)
+    transparent_centers = np.concatenate(centers)[order] if centers else np.zeros((0, 3), dtype=np.float32)
+    return ChunkMeshData(snapshot.chunk_x, snapshot.chunk_z, snapshot.version, vertices, sections, connectivity,
+                         transparent_vertices, transparent_sections, transparent_centers,
+                         time.perf_counter() - started)
+
+def build_chunk_mesh(world, chunk, cache=None):
+    """Snapshot and mesh a chunk synchronously, through a MeshCache if one is given"""
+    snapshot = snapshot_chunk(world, chunk)
+    if cache is None:
+        return build_mesh(snapshot)
+    key = cache.key(snapshot)
+    mesh = cache.load(key, snapshot)
+    if mesh is None:
+        mesh = build_mesh(snapshot)
+        cache.store(key, mesh)
+    return mesh
+
+class MeshBuilder:
+    """Builds chunk meshes on a worker pool.
+
+    Snapshots are taken on the calling (main) thread; meshing runs on a
+    ThreadPoolExecutor, or a ProcessPoolExecutor with use_processes=True to
+    sidestep the GIL. Each chunk has at most one build in flight. Results
+    carry the chunk version they were built from so the caller can drop
+    meshes that an edit made stale while they were being built.
+
+    With a MeshCache, chunks whose voxels and borders were meshed before
+    are served from it at submit time, and fresh builds are stored in it
+    as they are collected.
+    """
+    def __init__(self, workers=None, use_processes=False, cache=None):
+        workers = workers or os.cpu_count() or 1
+        self.workers = workers
+        if use_processes:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mesher")
+        self.in_flight = {}  # (chunk_x, chunk_z) -> Future
+        self.cache = cache
+        self.cache_keys = {}  # (chunk_x, chunk_z) -> content key of a build to store once it finishes
+
+    def is_building(self, chunk):
+        return (chunk.chunk_x, chunk.chunk_z) in self.in_flight
+
+    def submit(self, world, chunk):
+        """Queue a rebuild of a chunk unless one is already in flight; returns whether it was queued"""
+        coords = (chunk.chunk_x, chunk.chunk_z)
+        if coords in self.in_flight:
+            return False
+        snapshot = snapshot_chunk(world, chunk)
+        if self.cache is not None:
+            key = self.cache.key(snapshot)
+            mesh = self.cache.load(key, snapshot)
+            if mesh is not None:
+                self.in_flight[coords] = Future()
+                self.in_flight[coords].set_result(mesh)
+                return True
+            self.cache_keys[coords] = key
+        self.in_flight[coords] = self.executor.submit(build_mesh, snapshot)
+        return True
+
+    def completed(self):
+        """Collect finished meshes without blocking"""
+        done = [coords for coords, future in self.in_flight.items() if future.done()]
+        meshes = [self.in_flight.pop(coords).result() for coords in done]
+        if self.cache is not None:
+            for coords, mesh in zip(done, meshes):
+                key = self.cache_keys.pop(coords, None)
+                if key is not None:
+                    self.cache.store(key, mesh)
+        return meshes
+
+    def pending_count(self):
+        return len(self.in_flight)
+
+    def wait(self, timeout=None):
+        """Block until at least one in-flight build finishes (or the timeout passes)"""
+        if self.in_flight:
+            wait(list(self.in_flight.values()), timeout=timeout, return_when=FIRST_COMPLETED)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+OPAQUE_TABLE = np.array([block_type is not None and not block_type.transparent for block_type in BLOCK_TYPE_TABLE])
+FACE_LAYER_TABLES = [_face_layer_table(direction) for direction, _, _ in FACES]
+FACE_UV_SELECTORS = [_corner_uv_selectors(direction, corners) for direction, corners, _ in FACES]
+FACE_AO_OFFSETS = [_corner_ao_offsets(direction, corners) for direction, corners, _ in FACES]
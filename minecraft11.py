@@ -1,10 +1,13 @@
+import time
+LAUNCH_TIME = time.perf_counter()  # Taken before the heavy imports so startup timing covers them
+
+import argparse
+import os
 import pygame
-import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import math
-import random
-from collections import defaultdict
+import numpy as np
 
 from raycast import *
 from block import *
@@ -12,39 +15,181 @@ from player import *
 from camera import *
 from mcchunk import *
 from world import *
+from renderer import *
+from timing import *
+from replay import *
+from quality import *
+from entities import *
+from blockupdates import *
+from pathfinding import *
+from meshcache import *
+from particles import *
+
+# Corner order of each cube face for drawing entities (counter-clockwise from outside), with face brightness
+ENTITY_FACES = (
+    (((0, 0, 0), (0, 1, 0), (1, 1, 0), (1, 0, 0)), 0.8),  # Front
+    (((1, 0, 1), (1, 1, 1), (0, 1, 1), (0, 0, 1)), 0.8),  # Back
+    (((0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1)), 0.6),  # Bottom
+    (((0, 1, 0), (0, 1, 1), (1, 1, 1), (1, 1, 0)), 1.0),  # Top
+    (((0, 0, 0), (0, 0, 1), (0, 1, 1), (0, 1, 0)), 0.7),  # Left
+    (((1, 0, 0), (1, 1, 0), (1, 1, 1), (1, 0, 1)), 0.9),  # Right
+)
+ENTITY_CORNERS = np.array([corner for corners, _ in ENTITY_FACES for corner in corners], dtype=np.float32)
+ENTITY_SHADES = np.repeat([brightness for _, brightness in ENTITY_FACES], 4).astype(np.float32)
+MOB_COLOR = (0.8, 0.4, 0.3)
+
+# Held keys captured in input recordings, in bit order
+RECORDED_KEYS = (pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d, pygame.K_SPACE, pygame.K_LSHIFT)
 
 class MinecraftGame:
-    def __init__(self):
+    def __init__(self, seed=None, record_path=None, replay_path=None, headless=False, target_fps=60,
+                 render_distance=None, save_dir=None, mesh_cache_dir=None, offscreen=False):
+        """Start the game; optionally record input to a file or replay it (headless replays skip all rendering).
+
+        With save_dir, block edits are journaled there and a world saved
+        there before is reloaded (its seed replaces the given one).
+
+        Finished chunk meshes are kept in a MeshCache in mesh_cache_dir (by
+        default inside save_dir, or a temporary directory without one).
+        Replays only use a cache when mesh_cache_dir is given, so their
+        timings stay comparable.
+
+        The render distance adapts to hold target_fps unless a fixed
+        render_distance is given; replays always keep it fixed so runs stay
+        comparable.
+
+        With offscreen, no window is opened: the caller has already made an
+        OffscreenContext current (see offscreen.py) and render() draws into
+        it, finishing each frame with glFinish instead of a buffer flip.
+        """
+        self.startup = StartupTimer(LAUNCH_TIME)
+        self.startup.checkpoint("imports")
+        self.replay = InputReplay(replay_path) if replay_path else None
+        if self.replay is not None:
+            seed = self.replay.seed  # A replay only reproduces the world it was recorded in
+        elif headless:
+            raise ValueError("headless mode needs a replay to drive it")
+        elif save_dir is not None:
+            saved_seed = EditJournal.saved_seed(save_dir)
+            if saved_seed is not None:
+                seed = saved_seed
+        self.headless = headless
+        self.offscreen = offscreen
+        self.frame_times = []  # Seconds of work (input + simulation + rendering) per frame
         pygame.init()
         
-        # Initialize display
-        self.width, self.height = 800, 600
-        self.screen = pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF | pygame.OPENGL)
-        pygame.display.set_caption("PhilCraft")
-        
-        # Setup OpenGL
-        self.setup_opengl()
+        if offscreen:
+            self.width, self.height = 800, 600
+            self.setup_opengl()
+        elif not headless:
+            # Initialize display first so the window appears immediately
+            self.width, self.height = 800, 600
+            self.screen = pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF | pygame.OPENGL)
+            pygame.display.set_caption("PhilCraft")
+            self.startup.checkpoint("window")
+            
+            # Setup OpenGL
+            self.setup_opengl()
         
         # Initialize game objects
         self.camera = Camera()
-        self.world = World()
+        self.world = World(seed=seed)
+        if save_dir is not None:
+            self.world.journal = EditJournal(save_dir, self.world.generator.seed)
+            self.world.tick = self.world.journal.tick
+            print(f"World save {save_dir}: {self.world.journal.stats()['edited_blocks']} edited blocks restored")
+        if render_distance is not None:
+            self.world.render_distance = render_distance
+        self.target_fps = target_fps
+        self.quality = None
+        if render_distance is None and self.replay is None:
+            self.quality = QualityController(target_fps, initial_distance=self.world.render_distance)
+        self.mesh_backlog = 0  # Visible chunks still waiting for a mesh
+        if mesh_cache_dir is None and save_dir is not None:
+            mesh_cache_dir = os.path.join(save_dir, "meshcache")
+        self.mesh_cache = None
+        if mesh_cache_dir is not None or self.replay is None:
+            self.mesh_cache = MeshCache(mesh_cache_dir)
+        self.entities = EntitySystem(self.world)
+        self.particles = ParticleSystem(self.world)
+        self.block_updates = BlockUpdateScheduler(self.world)
+        self.pathfinder = Pathfinder(self.world, AgentShape.from_camera(self.camera))
+        self.chunk_renderer = None if headless else ChunkRenderer(self.world, MeshBuilder(cache=self.mesh_cache))
+        self.particle_renderer = None if headless else ParticleRenderer(self.particles.capacity)
         self.player = Player()
         self.clock = pygame.time.Clock()    
+        self.recorder = InputRecorder(record_path, self.world.generator.seed) if record_path else None
+        self.startup.checkpoint("setup")
+        
+        if headless:
+            spawn_chunks = self.world.pregenerate(self.camera.x, self.camera.z)
+            self.startup.checkpoint("spawn terrain")
+            self.place_at_spawn()
+            self.mesh_dirty_chunks(spawn_chunks)
+            self.startup.checkpoint("spawn meshes")
+            return
+        
+        # Generate and mesh the spawn area behind a loading screen, using every worker
+        spawn_chunks = self.world.pregenerate(
+            self.camera.x, self.camera.z,
+            progress=lambda done, total: self.draw_loading_screen("Generating terrain", done / total))
+        self.startup.checkpoint("spawn terrain")
+        self.place_at_spawn()
+        self.chunk_renderer.build_all(
+            spawn_chunks, progress=lambda done, total: self.draw_loading_screen("Building meshes", done / total))
+        self.startup.checkpoint("spawn meshes")
+        pygame.display.set_caption("PhilCraft")
 
-        # Mouse setup
-        pygame.mouse.set_visible(False)
-        pygame.event.set_grab(True)
-        
-        # Colors for different block types
-        self.colors = {
-            1: (0.2, 0.8, 0.2),  # Grass green
-            2: (0.1, 0.6, 0.1),  # Dark green (leaves)
-            3: (0.6, 0.6, 0.6),  # Stone gray
-            4: (0.4, 0.2, 0.1)   # Brown (tree trunk)
-        }
+        # Mouse setup (a replay or offscreen benchmark drives the camera itself)
+        if self.replay is None and not offscreen:
+            pygame.mouse.set_visible(False)
+            pygame.event.set_grab(True)
         
         print("Game initialized successfully!")
         
+    def draw_loading_screen(self, label, fraction):
+        """Draw a progress bar and keep the window responsive during startup work"""
+        pygame.event.pump()
+        pygame.display.set_caption(f"PhilCraft - {label} {fraction:.0%}")
+        
+        glClearColor(0.1, 0.1, 0.12, 1.0)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, self.width, self.height, 0, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        glDisable(GL_DEPTH_TEST)
+        
+        left = self.width * 0.2
+        right = self.width * 0.8
+        top = self.height / 2 - 10
+        bottom = self.height / 2 + 10
+        glColor3f(0.35, 0.75, 0.25)  # Filled part
+        glBegin(GL_QUADS)
+        glVertex2f(left, top)
+        glVertex2f(left, bottom)
+        glVertex2f(left + (right - left) * fraction, bottom)
+        glVertex2f(left + (right - left) * fraction, top)
+        glEnd()
+        glColor3f(1.0, 1.0, 1.0)  # Outline
+        glLineWidth(2.0)
+        glBegin(GL_LINE_LOOP)
+        glVertex2f(left, top)
+        glVertex2f(left, bottom)
+        glVertex2f(right, bottom)
+        glVertex2f(right, top)
+        glEnd()
+        
+        glEnable(GL_DEPTH_TEST)
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        self.present()
+        
     def setup_opengl(self):
         # Enable depth testing
         glEnable(GL_DEPTH_TEST)
@@ -68,44 +213,108 @@ class MinecraftGame:
         glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
         
     def handle_input(self):
-        keys = pygame.key.get_pressed()
-        mouse_rel = pygame.mouse.get_rel()
+        """Get this frame's input (live or replayed), record it if requested and apply it"""
+        if self.replay is not None:
+            if not self.headless:
+                pygame.event.pump()  # Keep the window responsive
+            frame = self.replay.next_frame()
+            if frame is None:
+                return False  # End of the recording
+        else:
+            frame = self.poll_input()
+        if self.recorder is not None:
+            self.recorder.write(frame)
+        return self.apply_input(frame)
+    
+    def poll_input(self):
+        """Collect this frame's input from pygame"""
+        held_keys = pack_held_keys(pygame.key.get_pressed(), RECORDED_KEYS)
+        mouse_dx, mouse_dy = pygame.mouse.get_rel()
+        actions = []
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                return False
+                actions.append(ACTION_QUIT)
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    return False
+                    actions.append(ACTION_QUIT)
                 elif event.key == pygame.K_r:
-                    # Reset camera
-                    self.camera.x = 0
-                    self.camera.y = 20
-                    self.camera.z = 0
-                    self.camera.velocity_y = 0
-                    print(f"Camera reset to: {self.camera.x}, {self.camera.y}, {self.camera.z}")
+                    actions.append(ACTION_RESET_CAMERA)
                 elif event.key == pygame.K_g:
-                    # Toggle game mode
-                    mode = self.camera.toggle_mode()
-                    print(f"Switched to {mode} mode")
+                    actions.append(ACTION_TOGGLE_MODE)
                 elif event.key == pygame.K_f:  # F key to cycle view modes
-                    view_mode = self.camera.cycle_view_mode()
-                    print(f"Switched to {view_mode}")
+                    actions.append(ACTION_CYCLE_VIEW)
+                elif event.key == pygame.K_m:
+                    actions.append(ACTION_DUMP_MEMORY)
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click - remove block
-                    self.raycast_interaction(remove=True)
+                    actions.append(ACTION_REMOVE_BLOCK)
                 elif event.button == 3:  # Right click - place block
-                    self.raycast_interaction(remove=False)
+                    actions.append(ACTION_PLACE_BLOCK)
+        
+        dt = self.clock.get_time() / 1000.0
+        return InputFrame(dt, mouse_dx, mouse_dy, held_keys, actions)
+    
+    def apply_input(self, frame):
+        """Run one frame of input through the game; returns False when the game should stop"""
+        for action in frame.actions:
+            if action == ACTION_QUIT:
+                return False
+            elif action == ACTION_RESET_CAMERA:
+                # Reset camera
+                self.camera.x = 0
+                self.camera.y = self.spawn_y
+                self.camera.z = 0
+                self.camera.velocity_y = 0
+                print(f"Camera reset to: {self.camera.x}, {self.camera.y}, {self.camera.z}")
+            elif action == ACTION_TOGGLE_MODE:
+                # Toggle game mode
+                mode = self.camera.toggle_mode()
+                print(f"Switched to {mode} mode")
+            elif action == ACTION_CYCLE_VIEW:
+                view_mode = self.camera.cycle_view_mode()
+                print(f"Switched to {view_mode}")
+            elif action == ACTION_DUMP_MEMORY:
+                self.dump_memory()
+            elif action == ACTION_REMOVE_BLOCK:
+                self.raycast_interaction(remove=True)
+            elif action == ACTION_PLACE_BLOCK:
+                self.raycast_interaction(remove=False)
 
         # Update camera
-        dt = self.clock.get_time() / 1000.0
-        self.camera.update(keys, mouse_rel, dt, self.world)
+        keys = HeldKeys(frame.held_keys, RECORDED_KEYS)
+        self.camera.update(keys, (frame.mouse_dx, frame.mouse_dy), frame.dt, self.world)
 
         # Update player animation based on camera movement
-        self.player.update_animation(self.camera.is_moving, dt)
+        self.player.update_animation(self.camera.is_moving, frame.dt)
+
+        # Move every entity, then pick up dropped items the player walks over
+        self.entities.step(frame.dt)
+        self.entities.collect(self.camera.x, self.camera.y + 0.5, self.camera.z, 1.5)
+        self.particles.step(frame.dt)
+
+        # Run due block updates (falling sand, spreading grass)
+        self.block_updates.update(frame.dt)
+
+        # Build walk grids for queued path queries and hand them to the search thread
+        self.pathfinder.update()
         
         return True  # Continue running
     
+    def place_at_spawn(self):
+        """Stand the camera on the highest block of the spawn column (the world's heightmap, so trees count)"""
+        self.spawn_y = self.world.surface_height(0, 0) + 1
+        self.camera.y = self.spawn_y
+    
+    def dump_memory(self):
+        """Write a memory accounting snapshot and report outlier chunks"""
+        path = time.strftime("memory-%Y%m%d-%H%M%S.json")
+        self.world.memory.dump(path)
+        print(f"Memory: {self.world.memory.summary()}; snapshot written to {path}")
+        for category in (MEM_VOXELS, MEM_GPU_MESH):
+            for (chunk_x, chunk_z), nbytes in self.world.memory.outliers(category):
+                print(f"  Outlier chunk ({chunk_x}, {chunk_z}): {format_bytes(nbytes)} of {category}")
+    
     def raycast_interaction(self, remove=True):
         # Get the actual camera position based on view mode
         if self.camera.view_mode == "first_person":
@@ -134,8 +343,12 @@ class MinecraftGame:
             hit_x, hit_y, hit_z = result.block_pos
             
             if remove:
-                # Remove the block that was hit
+                # Remove the block that was hit, dropping it as an item
+                block_type = self.world.get_block_type_id(hit_x, hit_y, hit_z)
                 self.world.remove_block(hit_x, hit_y, hit_z)
+                self.entities.spawn(ENTITY_ITEM, hit_x + 0.5, hit_y + 0.25, hit_z + 0.5, 0.25, 0.25,
+                                    velocity=(0.0, 4.0, 0.0), block_type=block_type)
+                self.particles.burst_block(hit_x, hit_y, hit_z, block_type)
                 print(f"Removed block at {hit_x}, {hit_y}, {hit_z}")
             else:
                 # Place block on the face that was hit
@@ -144,8 +357,8 @@ class MinecraftGame:
                 place_y = hit_y + face_normal[1]
                 place_z = hit_z + face_normal[2]
                 
-                # Check if placement position is valid (no existing block)
-                if not self.world.get_block(place_x, place_y, place_z):
+                # Check if placement position is valid (inside the world, no existing block)
+                if 0 <= place_y <= 255 and not self.world.get_block(place_x, place_y, place_z):
                     # Check if the new block would collide with the player
                     # We need to check collision with the player's current position
                     collision, _ = self.camera.check_collision_at_position(
@@ -153,32 +366,21 @@ class MinecraftGame:
                     )
                     
                     # Temporarily place the block to test collision
-                    temp_block = Block(place_x, place_y, place_z, 3)
-                    chunk_x, chunk_z = self.world.get_chunk_coords(place_x, place_z)
-                    if (chunk_x, chunk_z) in self.world.chunks:
-                        self.world.chunks[(chunk_x, chunk_z)].blocks[(place_x, place_y, place_z)] = temp_block
-                    else:
-                        # Create chunk if it doesn't exist
-                        chunk = self.world.get_chunk(chunk_x, chunk_z)
-                        chunk.blocks[(place_x, place_y, place_z)] = temp_block
+                    chunk = self.world.get_chunk(*self.world.get_chunk_coords(place_x, place_z))
+                    chunk.set_block_type(place_x, place_y, place_z, 3)
                     
                     # Test collision with the new block in place
                     would_collide, _ = self.camera.check_collision_at_position(
                         self.camera.x, self.camera.y, self.camera.z, self.world
                     )
+                    chunk.set_block_type(place_x, place_y, place_z, AIR)
                     
                     if not would_collide:
-                        # Safe to place - block is already in world from temp placement
-                        # Just mark chunk for update
-                        chunk = self.world.get_chunk(chunk_x, chunk_z)
-                        chunk.needs_update = True
-                        self.world.mark_adjacent_chunks_for_update(place_x, place_y, place_z)
+                        # Safe to place
+                        self.world.add_block(place_x, place_y, place_z, 3)
+                        self.particles.burst_place(place_x, place_y, place_z, 3)
                         print(f"Placed block at {place_x}, {place_y}, {place_z} on face {face_normal}")
                     else:
-                        # Would collide with player - remove the temporary block
-                        chunk = self.world.get_chunk(chunk_x, chunk_z)
-                        if (place_x, place_y, place_z) in chunk.blocks:
-                            del chunk.blocks[(place_x, place_y, place_z)]
                         print(f"Cannot place block at {place_x}, {place_y}, {place_z} - would collide with player")
 
     def get_target_block(self):
@@ -298,8 +500,8 @@ class MinecraftGame:
     
     def render(self):
         # Clear buffers
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glClearColor(0.5, 0.8, 1.0, 1.0)  # Sky blue
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         
         # Apply camera transform
         self.camera.apply_transform()
@@ -307,15 +509,21 @@ class MinecraftGame:
         # Get visible chunks sorted by proximity
         visible_chunks = self.world.get_visible_chunks(self.camera.x, self.camera.z)
         
-        # Compile chunks that need updating
-        for chunk in visible_chunks:
-            if chunk.needs_update or not chunk.is_compiled:
-                chunk.compile_chunk(self.world)
+        # Queue meshing for chunks that need updating and upload finished meshes
+        self.chunk_renderer.update(visible_chunks)
+        self.mesh_backlog = sum(1 for chunk in visible_chunks if chunk.needs_update)
         
         # Render chunks (closest first for better performance)
         chunks_rendered = 0
+        sections_drawn = 0
         total_blocks = 0
 
+        # Sections the camera could see through open space (occlusion culling)
+        visible_sections = self.chunk_renderer.visible_sections(*self.camera.get_camera_position())
+        
+        # One shader and texture bind covers every chunk and block type
+        self.chunk_renderer.begin()
+
         for chunk in visible_chunks:
             # Calculate distance to chunk for LOD (Level of Detail) if needed
             chunk_center_x = chunk.chunk_x * 16 + 8
@@ -326,26 +534,77 @@ class MinecraftGame:
             
             # Render the entire chunk at once
             if distance < self.world.render_distance * 16 + 32:  # Small buffer for smooth transitions
-                chunk.render()
-                chunks_rendered += 1
-                total_blocks += len(chunk.blocks)
+                drawn = self.chunk_renderer.render_chunk(chunk, visible_sections)
+                if drawn:
+                    sections_drawn += drawn
+                    chunks_rendered += 1
+                    total_blocks += chunk.block_count()
+
+        self.chunk_renderer.end()
+        self.draw_entities()
 
         # Render player in third person mode
         if self.camera.view_mode != "first_person":
             # Draw the player model at the camera's world position
             self.player.render(self.camera.x, self.camera.y, self.camera.z, self.camera.yaw)
 
+        # Leaves and other see-through blocks go last, blended over everything opaque
+        self.chunk_renderer.render_transparent(*self.camera.get_camera_position())
+        self.particle_renderer.render(self.particles)
+
         # Draw crosshair overlay
         self.draw_crosshair()
         
         # Display frame
-        pygame.display.flip()
+        self.present()
         
         # Print debug info occasionally
         if pygame.time.get_ticks() % 1000 < 50:  # Every second
             fps = self.clock.get_fps()
             loaded_chunks = len(self.world.chunks)
-            print(f"FPS: {fps:.1f}, Chunks rendered: {chunks_rendered}/{loaded_chunks}, Total blocks: {total_blocks}, Camera: ({self.camera.x:.1f}, {self.camera.y:.1f}, {self.camera.z:.1f})")
+            print(f"FPS: {fps:.1f}, Chunks rendered: {chunks_rendered}/{loaded_chunks}, Sections: {sections_drawn} in {self.chunk_renderer.draw_calls} draw calls (+{self.chunk_renderer.transparent_draw_calls} transparent), Total blocks: {total_blocks}, Render distance: {self.world.render_distance}, Entities: {len(self.entities)}, Particles: {len(self.particles)}, Block updates: {self.block_updates.pending_count()}, Memory: {self.world.memory.summary()}, Camera: ({self.camera.x:.1f}, {self.camera.y:.1f}, {self.camera.z:.1f})")
+    
+    def present(self):
+        """Show the finished frame; offscreen there is nothing to show, so just wait for the GPU"""
+        if self.offscreen:
+            glFinish()
+        else:
+            pygame.display.flip()
+    
+    def draw_entities(self):
+        """Draw every entity as a shaded box in one vertex array call"""
+        n = len(self.entities)
+        if n == 0:
+            return
+        entities = self.entities
+        half_width = entities.half_width[:n, None].astype(np.float32)
+        size = np.hstack([half_width * 2, entities.height[:n, None].astype(np.float32), half_width * 2])
+        corner = entities.position[:n].astype(np.float32) - np.hstack([half_width, np.zeros_like(half_width), half_width])
+        vertices = corner[:, None, :] + ENTITY_CORNERS[None, :, :] * size[:, None, :]
+        base_colors = np.array([MOB_COLOR if kind == ENTITY_MOB else BLOCK_TYPE_TABLE[block_type].color
+                                for kind, block_type in zip(entities.kind[:n].tolist(), entities.block_type[:n].tolist())],
+                               dtype=np.float32)
+        colors = base_colors[:, None, :] * ENTITY_SHADES[None, :, None]
+        
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, np.ascontiguousarray(vertices))
+        glColorPointer(3, GL_FLOAT, 0, np.ascontiguousarray(colors))
+        glDrawArrays(GL_QUADS, 0, n * len(ENTITY_CORNERS))
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+    
+    def mesh_dirty_chunks(self, chunks):
+        """Headless stand-in for ChunkRenderer.update(): mesh dirty chunks synchronously, CPU only"""
+        for chunk in chunks:
+            if chunk.needs_update:
+                build_chunk_mesh(self.world, chunk, self.mesh_cache)
+                chunk.needs_update = False
+    
+    def simulate(self):
+        """Headless frame: the world and meshing work of render() without any drawing"""
+        visible_chunks = self.world.get_visible_chunks(self.camera.x, self.camera.z)
+        self.mesh_dirty_chunks(visible_chunks)
     
     def run(self):
         print("Starting game loop...")
@@ -354,18 +613,73 @@ class MinecraftGame:
         
         while running:
             frame_count += 1
+            self.world.tick += 1
+            frame_start = time.perf_counter()
             running = self.handle_input()
-            self.render()
-            self.clock.tick(60)  # Target 60 FPS
+            if not running:
+                break
+            if self.headless:
+                self.simulate()
+            else:
+                self.render()
+            frame_time = time.perf_counter() - frame_start
+            self.frame_times.append(frame_time)
+            if self.quality is not None:
+                self.world.render_distance = self.quality.record(frame_time, self.mesh_backlog)
+            if self.world.journal is not None:
+                self.world.journal.update()
+            if frame_count == 1:
+                self.startup.checkpoint("first frame")
+                print(self.startup.report())
+            if self.replay is None:
+                self.clock.tick(self.target_fps)
             
             # Debug output for first few frames
             if frame_count <= 5:
                 print(f"Frame {frame_count} rendered")
         
         print("Game shutting down...")
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Recorded {self.recorder.frames} frames")
+        if self.replay is not None:
+            print(f"Replayed {self.replay.frames} frames: {format_frame_summary(summarize_frame_times(self.frame_times))}")
+            print(f"Memory: {self.world.memory.summary()}")
+        self.close()
+    
+    def close(self):
+        """Save the world, stop worker pools and release the mesh cache"""
+        if self.world.journal is not None:
+            self.world.journal.close()
+            print(f"World saved: {self.world.journal.stats()['edited_blocks']} edited blocks")
+        if self.chunk_renderer is not None:
+            self.chunk_renderer.shutdown()
+        if self.mesh_cache is not None:
+            print(f"Mesh cache: {self.mesh_cache.summary()}")
+            self.mesh_cache.close()
+        self.pathfinder.shutdown()
+        self.world.generator.shutdown()
         pygame.quit()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="PhilCraft")
+    parser.add_argument("--seed", type=int, help="World seed (random by default)")
+    parser.add_argument("--record", metavar="FILE", help="Record every frame's input to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="Play back input recorded with --record")
+    parser.add_argument("--headless", action="store_true", help="Replay without a window, simulating only")
+    parser.add_argument("--target-fps", type=int, default=60,
+                        help="Frame rate the adaptive render distance aims to hold (default 60)")
+    parser.add_argument("--render-distance", type=int, metavar="CHUNKS",
+                        help="Use a fixed render distance instead of adapting it")
+    parser.add_argument("--world", metavar="DIR",
+                        help="Save block edits to DIR as they happen and restore them on the next start")
+    parser.add_argument("--mesh-cache", metavar="DIR",
+                        help="Keep finished chunk meshes in DIR across runs (default: inside --world's DIR)")
+    parser.add_argument("--timings", metavar="FILE", help="Write per-frame timings as CSV when the game exits")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
         print("Minecraft Clone Controls:")
         print("WASD - Move around")
@@ -376,14 +690,21 @@ if __name__ == "__main__":
         print("Right Click - Place block")
         print("F - Cycle view mode (First Person/Third Person Back/Third Person Front)")
         print("R - Reset camera position")
+        print("M - Dump memory usage snapshot")
         print("ESC - Exit game")
         print("\nInitializing game...")
         
-        game = MinecraftGame()
+        game = MinecraftGame(seed=args.seed, record_path=args.record, replay_path=args.replay,
+                             headless=args.headless, target_fps=args.target_fps,
+                             render_distance=args.render_distance, save_dir=args.world,
+                             mesh_cache_dir=args.mesh_cache)
         game.run()
+        if args.timings:
+            write_frame_times(args.timings, game.frame_times)
         
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
-        input("Press Enter to exit...")
\ No newline at end of file
+        if not args.headless:
+            input("Press Enter to exit...")
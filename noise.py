@@ -0,0 +1,124 @@
+import numpy as np
+
+# Gradient directions for 2D noise (unit-ish vectors at 45 degree steps)
+GRADIENTS_2D = np.array([
+    (1, 0), (-1, 0), (0, 1), (0, -1),
+    (0.7071, 0.7071), (-0.7071, 0.7071), (0.7071, -0.7071), (-0.7071, -0.7071),
+], dtype=np.float64)
+
+# Ken Perlin's 12 cube-edge gradients, padded to 16 so the hash can use & 15
+GRADIENTS_3D = np.array([
+    (1, 1, 0), (-1, 1, 0), (1, -1, 0), (-1, -1, 0),
+    (1, 0, 1), (-1, 0, 1), (1, 0, -1), (-1, 0, -1),
+    (0, 1, 1), (0, -1, 1), (0, 1, -1), (0, -1, -1),
+    (1, 1, 0), (-1, 1, 0), (0, -1, 1), (0, -1, -1),
+], dtype=np.float64)
+
+def fade(t):
+    """Perlin's quintic smoothstep 6t^5 - 15t^4 + 10t^3"""
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+def lerp(a, b, t):
+    return a + t * (b - a)
+
+class PerlinNoise:
+    """Seeded gradient noise evaluated over whole NumPy arrays of coordinates.
+
+    Inputs broadcast against each other, so a chunk's worth of samples is
+    computed with a handful of array operations instead of a Python loop.
+    Output is roughly in [-1, 1].
+    """
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        # Doubled permutation table avoids wrapping when indexing perm[perm[x] + y]
+        self.perm = np.tile(rng.permutation(256), 2).astype(np.int64)
+
+    def noise2(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        x0 = np.floor(x)
+        y0 = np.floor(y)
+        xf = x - x0
+        yf = y - y0
+        xi = x0.astype(np.int64) & 255
+        yi = y0.astype(np.int64) & 255
+        perm = self.perm
+
+        def corner(ox, oy):
+            g = GRADIENTS_2D[perm[perm[xi + ox] + yi + oy] & 7]
+            return g[..., 0] * (xf - ox) + g[..., 1] * (yf - oy)
+
+        u = fade(xf)
+        v = fade(yf)
+        bottom = lerp(corner(0, 0), corner(1, 0), u)
+        top = lerp(corner(0, 1), corner(1, 1), u)
+        return lerp(bottom, top, v) * 1.4142
+
+    def noise3(self, x, y, z):
+        x, y, z = np.broadcast_arrays(np.asarray(x, dtype=np.float64),
+                                      np.asarray(y, dtype=np.float64),
+                                      np.asarray(z, dtype=np.float64))
+        x0 = np.floor(x)
+        y0 = np.floor(y)
+        z0 = np.floor(z)
+        xf = x - x0
+        yf = y - y0
+        zf = z - z0
+        xi = x0.astype(np.int64) & 255
+        yi = y0.astype(np.int64) & 255
+        zi = z0.astype(np.int64) & 255
+        perm = self.perm
+
+        def corner(ox, oy, oz):
+            g = GRADIENTS_3D[perm[perm[perm[xi + ox] + yi + oy] + zi + oz] & 15]
+            return g[..., 0] * (xf - ox) + g[..., 1] * (yf - oy) + g[..., 2] * (zf - oz)
+
+        u = fade(xf)
+        v = fade(yf)
+        w = fade(zf)
+        x00 = lerp(corner(0, 0, 0), corner(1, 0, 0), u)
+        x10 = lerp(corner(0, 1, 0), corner(1, 1, 0), u)
+        x01 = lerp(corner(0, 0, 1), corner(1, 0, 1), u)
+        x11 = lerp(corner(0, 1, 1), corner(1, 1, 1), u)
+        return lerp(lerp(x00, x10, v), lerp(x01, x11, v), w)
+
+    def fbm2(self, x, y, octaves=4, persistence=0.5, lacunarity=2.0):
+        """Fractal (multi-octave) 2D noise, normalised back to roughly [-1, 1]"""
+        total = 0.0
+        amplitude = 1.0
+        frequency = 1.0
+        norm = 0.0
+        for octave in range(octaves):
+            # Offset each octave so their lattices do not line up
+            total = total + amplitude * self.noise2(x * frequency + octave * 17.31, y * frequency - octave * 11.97)
+            norm += amplitude
+            amplitude *= persistence
+            frequency *= lacunarity
+        return total / norm
+
+    def fbm3(self, x, y, z, octaves=2, persistence=0.5, lacunarity=2.0):
+        """Fractal (multi-octave) 3D noise, normalised back to roughly [-1, 1]"""
+        total = 0.0
+        amplitude = 1.0
+        frequency = 1.0
+        norm = 0.0
+        for octave in range(octaves):
+            total = total + amplitude * self.noise3(x * frequency + octave * 17.31,
+                                                    y * frequency - octave * 11.97,
+                                                    z * frequency + octave * 5.43)
+            norm += amplitude
+            amplitude *= persistence
+            frequency *= lacunarity
+        return total / norm
+
+def upsample_linear(coarse, factor, axis):
+    """Linearly interpolate an array sampled every `factor` cells back to full resolution along one axis.
+
+    An axis of n + 1 samples becomes n * factor cells.
+    """
+    coarse = np.moveaxis(coarse, axis, 0)
+    t = (np.arange(factor) / factor).reshape((1, factor) + (1,) * (coarse.ndim - 1))
+    start = coarse[:-1][:, None]
+    end = coarse[1:][:, None]
+    fine = (start + (end - start) * t).reshape((-1,) + coarse.shape[1:])
+    return np.moveaxis(fine, 0, axis)
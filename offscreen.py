@@ -0,0 +1,88 @@
+import ctypes
+import os
+import sys
+
+import numpy as np
+
+# PyOpenGL picks its platform (GLX, EGL, OSMesa) when OpenGL is first imported,
+# so an offscreen backend has to be chosen before anything imports OpenGL.GL.
+OFFSCREEN_PLATFORMS = ("egl", "osmesa")
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+
+def select_offscreen_platform(platform):
+    """Route PyOpenGL to an offscreen platform and pygame to its dummy video driver"""
+    if platform not in OFFSCREEN_PLATFORMS:
+        raise ValueError(f"unknown offscreen platform {platform!r}")
+    if "OpenGL.GL" in sys.modules and os.environ.get("PYOPENGL_PLATFORM") != platform:
+        raise RuntimeError(f"OpenGL was imported before the {platform} platform was selected")
+    os.environ["PYOPENGL_PLATFORM"] = platform
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+class OffscreenContext:
+    """A GL context with no window, rendering into a width x height offscreen buffer.
+
+    EGL draws into a pbuffer (on Mesa without a display server this is the
+    llvmpipe software rasterizer); OSMesa draws into a buffer in client
+    memory. Either way the context is current once constructed, so the game
+    and ChunkRenderer run unchanged. select_offscreen_platform() must have
+    been called with the same platform first.
+    """
+    def __init__(self, width=800, height=600, platform="egl"):
+        self.width = width
+        self.height = height
+        self.platform = platform
+        if platform == "egl":
+            self.create_egl()
+        else:
+            self.create_osmesa()
+
+    def create_egl(self):
+        from OpenGL import EGL
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        try:
+            EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor))
+        except EGL.EGLError:
+            # No display server: Mesa can still render without one
+            display = EGL.eglGetPlatformDisplayEXT(EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None)
+            EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor))
+        attributes = (EGL.EGLint * 7)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                      EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                                      EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_NONE)
+        config, count = EGL.EGLConfig(), EGL.EGLint()
+        EGL.eglChooseConfig(display, attributes, ctypes.pointer(config), 1, ctypes.pointer(count))
+        if count.value == 0:
+            raise RuntimeError("EGL has no config with a pbuffer and a depth buffer")
+        size = (EGL.EGLint * 5)(EGL.EGL_WIDTH, self.width, EGL.EGL_HEIGHT, self.height, EGL.EGL_NONE)
+        self.surface = EGL.eglCreatePbufferSurface(display, config, size)
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+        EGL.eglMakeCurrent(display, self.surface, self.surface, self.context)
+        self.display = display
+
+    def create_osmesa(self):
+        from OpenGL import GL, arrays, osmesa
+        self.context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not self.context:
+            raise RuntimeError("OSMesa could not create a context")
+        self.buffer = arrays.GLubyteArray.zeros((self.height, self.width, 4))
+        if not osmesa.OSMesaMakeCurrent(self.context, self.buffer, GL.GL_UNSIGNED_BYTE, self.width, self.height):
+            raise RuntimeError("OSMesa could not make its context current")
+
+    def read_pixels(self):
+        """The finished frame as a (height, width, 3) uint8 array, top row first"""
+        from OpenGL import GL
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        data = GL.glReadPixels(0, 0, self.width, self.height, GL.GL_RGB, GL.GL_UNSIGNED_BYTE)
+        return np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)[::-1]
+
+    def close(self):
+        if self.platform == "egl":
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroySurface(self.display, self.surface)
+            EGL.eglDestroyContext(self.display, self.context)
+            EGL.eglTerminate(self.display)
+        else:
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self.context)
@@ -0,0 +1,228 @@
+import numpy as np
+
+from block import *
+from camera import GRAVITY, TERMINAL_VELOCITY, GROUND_FRICTION
+from entities import VoxelWindow
+
+MAX_PARTICLE_DT = 0.05  # Longer frames are simulated as this long, so particles never skip through a block
+BOUNCE = 0.3            # Fraction of vertical speed kept when a particle hits a floor or ceiling
+REST_SPEED = 1.0        # Bounces slower than this (blocks per second) stop dead instead
+FADE_START = 0.5        # Fraction of its lifetime after which a particle fades out
+
+def block_color_table():
+    """0-1 RGB per block type id, for tinting particles"""
+    colors = np.zeros((256, 3), dtype=np.float32)
+    for type_id, block_type in enumerate(BLOCK_TYPE_TABLE):
+        if block_type is not None:
+            colors[type_id] = block_type.color
+    return colors
+
+class ParticleSystem:
+    """Short-lived cosmetic particles (block break and place effects) in preallocated ring buffers.
+
+    Particles are written at the ring's head, overwriting the oldest ones
+    once all capacity slots are in use, so emitting never allocates.
+    Everything spawned within the last particle lifetime sits in one window
+    that ends at the head (two slices once it wraps). step() integrates
+    gravity, ages and collides that window with whole-array operations,
+    then trims dead particles off its old end. Particles are points that
+    bounce off floors and ceilings and stop at walls. They never touch game
+    state, so nothing they do needs to be replayed exactly.
+
+    positions holds rows of x, y, z and point size (in blocks) and
+    velocities rows of x, y, z, so every update works on contiguous arrays;
+    colors holds RGBA bytes per particle whose alpha fades it out (0 once
+    it is dead). ParticleRenderer uploads positions and colors as they are.
+    """
+    def __init__(self, world, capacity=1 << 16, seed=0):
+        self.world = world
+        self.capacity = capacity
+        self.positions = np.zeros((4, capacity), dtype=np.float32)  # Rows: x, y, z, size
+        self.velocities = np.zeros((3, capacity), dtype=np.float32)
+        self.colors = np.zeros((capacity, 4), dtype=np.uint8)
+        self.ages = np.zeros(capacity, dtype=np.float32)
+        self.lifetimes = np.zeros(capacity, dtype=np.float32)
+        # Scratch space for step(): every intermediate is written into these instead of new arrays
+        self.scratch = np.zeros((6, capacity), dtype=np.float32)
+        self.flags = np.zeros((2, capacity), dtype=bool)
+        self.cells = np.zeros(capacity, dtype=np.int32)
+        self.head = 0      # Slot the next particle is written to
+        self.live = 0      # Slots before the head that may hold live particles
+        self.emitted = 0
+        self.overwritten = 0  # Particles replaced while still alive because the ring was full
+        self.block_colors = block_color_table()
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return int(sum(np.count_nonzero(self.ages[part] < self.lifetimes[part]) for part in self.window()))
+
+    def window(self):
+        """Slices of the ring that may hold live particles, oldest first"""
+        if not self.live:
+            return []
+        start = (self.head - self.live) % self.capacity
+        if start < self.head:
+            return [slice(start, self.head)]
+        return [slice(start, self.capacity)] + ([slice(0, self.head)] if self.head else [])
+
+    def ranges(self):
+        """(first, count) of each window slice, for drawing"""
+        return [(part.start, part.stop - part.start) for part in self.window()]
+
+    def emit(self, positions, velocities, tints, lifetimes, sizes):
+        """Add particles (equal-length arrays; tints are 0-1 RGB)"""
+        count = len(positions)
+        if count > self.capacity:
+            positions, velocities, tints = positions[-self.capacity:], velocities[-self.capacity:], tints[-self.capacity:]
+            lifetimes, sizes = lifetimes[-self.capacity:], sizes[-self.capacity:]
+            self.emitted += count - self.capacity
+            count = self.capacity
+        overflow = self.live + count - self.capacity
+        if overflow > 0:
+            # The oldest slots of the window are about to be reused
+            oldest = (self.head - self.live + np.arange(overflow)) % self.capacity
+            self.overwritten += int(np.count_nonzero(self.ages[oldest] < self.lifetimes[oldest]))
+        written = 0
+        while written < count:
+            first = self.head
+            n = min(count - written, self.capacity - first)
+            slots = slice(first, first + n)
+            self.positions[:3, slots] = positions[written:written + n].T
+            self.positions[3, slots] = sizes[written:written + n]
+            self.velocities[:, slots] = velocities[written:written + n].T
+            self.colors[slots, :3] = np.clip(tints[written:written + n] * 255, 0, 255)
+            self.colors[slots, 3] = 255
+            self.ages[slots] = 0
+            self.lifetimes[slots] = lifetimes[written:written + n]
+            self.head = (first + n) % self.capacity
+            written += n
+        self.live = min(self.live + count, self.capacity)
+        self.emitted += count
+
+    def burst_block(self, x, y, z, block_type, count=64):
+        """Debris flying out of a broken block at (x, y, z)"""
+        rng = self.rng
+        positions = np.array((x, y, z), dtype=np.float32) + rng.uniform(0.1, 0.9, (count, 3)).astype(np.float32)
+        velocities = (positions - np.array((x + 0.5, y + 0.5, z + 0.5), dtype=np.float32)) * 4
+        velocities[:, 1] += rng.uniform(2.0, 5.0, count)
+        self.emit(positions, velocities, self.tinted(block_type, count),
+                  rng.uniform(0.6, 1.4, count), rng.uniform(0.08, 0.16, count))
+
+    def burst_place(self, x, y, z, block_type, count=32):
+        """A puff of dust around the sides and top of a block just placed at (x, y, z)"""
+        rng = self.rng
+        axes = rng.integers(0, 3, count)
+        sides = np.where(axes == 1, 1, rng.integers(0, 2, count))  # Never the bottom, which usually rests on something
+        rows = np.arange(count)
+        offsets = rng.uniform(0.0, 1.0, (count, 3)).astype(np.float32)
+        offsets[rows, axes] = np.where(sides, 1.02, -0.02)
+        velocities = rng.normal(0.0, 0.3, (count, 3)).astype(np.float32)
+        velocities[rows, axes] += np.where(sides, 1.0, -1.0) * rng.uniform(0.5, 1.5, count)
+        velocities[:, 1] += 1.5
+        self.emit(np.array((x, y, z), dtype=np.float32) + offsets, velocities, self.tinted(block_type, count),
+                  rng.uniform(0.3, 0.7, count), rng.uniform(0.06, 0.12, count))
+
+    def tinted(self, block_type, count):
+        """The block's colour with per-particle brightness jitter"""
+        return self.block_colors[block_type] * self.rng.uniform(0.7, 1.1, (count, 1)).astype(np.float32)
+
+    def step(self, dt):
+        """Advance every live particle by dt seconds"""
+        parts = self.window()
+        if not parts or dt <= 0:
+            return
+        dt = min(dt, MAX_PARTICLE_DT)
+        # One solidity window covers everything the particles can reach this step
+        reach = max(float(np.abs(self.velocities[:, part]).max()) for part in parts) * dt + 1
+        low = np.min([self.positions[:3, part].min(axis=1) for part in parts], axis=0) - reach
+        high = np.max([self.positions[:3, part].max(axis=1) for part in parts], axis=0) + reach
+        voxels = VoxelWindow(self.world, low, high)
+        for part in parts:
+            self.step_slice(part, dt, voxels)
+        self.trim()
+
+    def step_slice(self, part, dt, voxels):
+        # Branch-free: every choice is a multiply by a 0/1 mask, which is much faster than masked writes
+        n = part.stop - part.start
+        x, y, z = self.positions[0, part], self.positions[1, part], self.positions[2, part]
+        vx, vy, vz = self.velocities[0, part], self.velocities[1, part], self.velocities[2, part]
+        delta, delta_z, moved, moved_z = self.scratch[:4, :n]
+        hit, free = self.flags[:, :n]
+        self.ages[part] += dt
+        vy += GRAVITY * dt
+        np.maximum(vy, TERMINAL_VELOCITY, out=vy)
+
+        # Vertical move: bounce off floors and ceilings, losing most of the speed
+        np.multiply(vy, dt, out=delta)
+        np.add(y, delta, out=moved)
+        self.solid_cells(voxels, x, moved, z, hit)
+        np.logical_not(hit, out=free)
+        delta *= free
+        y += delta
+        bounced = np.multiply(vy, -BOUNCE, out=moved)
+        landed = np.greater(bounced, 0, out=free)
+        landed &= hit
+        friction = np.multiply(landed, GROUND_FRICTION - 1, out=delta)
+        friction += 1
+        vx *= friction
+        vz *= friction
+        bounced *= np.greater_equal(np.abs(bounced, out=delta), REST_SPEED, out=free)
+        bounced *= hit
+        vy *= np.logical_not(hit, out=free)
+        vy += bounced
+
+        # Horizontal move: stop at walls
+        np.multiply(vx, dt, out=delta)
+        np.multiply(vz, dt, out=delta_z)
+        np.add(x, delta, out=moved)
+        np.add(z, delta_z, out=moved_z)
+        self.solid_cells(voxels, moved, y, moved_z, hit)
+        np.logical_not(hit, out=free)
+        delta *= free
+        delta_z *= free
+        x += delta
+        z += delta_z
+        vx *= free
+        vz *= free
+
+        # Fade out over the end of the lifetime; a dead particle's alpha is 0
+        remaining = np.divide(self.ages[part], self.lifetimes[part], out=delta)
+        np.subtract(1, remaining, out=remaining)
+        remaining *= 255 / (1 - FADE_START)
+        np.clip(remaining, 0, 255, out=remaining)
+        np.copyto(self.colors[part, 3], remaining, casting="unsafe")
+
+    def solid_cells(self, voxels, xs, ys, zs, out):
+        """Whether the cell holding each point is solid, written to out"""
+        n = len(xs)
+        index, cell = self.scratch[4, :n], self.scratch[5, :n]
+        size_x, size_y, size_z = voxels.solid.shape
+        origin_x, origin_y, origin_z = voxels.origin.tolist()
+        # Flat indices into the window are small enough to stay exact in float32
+        np.floor(np.subtract(xs, origin_x, out=index), out=index)
+        index *= size_y * size_z
+        np.floor(np.subtract(ys, origin_y, out=cell), out=cell)
+        cell *= size_z
+        index += cell
+        np.floor(np.subtract(zs, origin_z, out=cell), out=cell)
+        index += cell
+        np.copyto(self.cells[:n], index, casting="unsafe")
+        np.take(voxels.solid.ravel(), self.cells[:n], out=out, mode="clip")
+
+    def trim(self):
+        """Drop dead particles from the old end of the window"""
+        for part in self.window():
+            alive = np.flatnonzero(self.ages[part] < self.lifetimes[part])
+            if len(alive):
+                self.live -= int(alive[0])
+                return
+            self.live -= part.stop - part.start
+
+    def stats(self):
+        return {
+            "live": len(self),
+            "window": self.live,
+            "capacity": self.capacity,
+            "emitted": self.emitted,
+            "overwritten": self.overwritten,
+        }
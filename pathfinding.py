@@ -0,0 +1,386 @@
+import heapq
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from block import *
+from entities import solid_block_table
+from mcchunk import STAGE_FULL
+
+HEADROOM_CAP = 8           # Free cells counted above a floor at most (uint8, plenty for any agent)
+DIAGONAL_COST = math.sqrt(2)
+CLIMB_COST = 1.0           # Extra cost of jumping up one block
+DROP_COST = 0.5            # Extra cost per block dropped
+MAX_CACHED_LINKS = 16384
+
+# (dx, dz, cost) of the moves tried from every node: four straight, then four diagonal
+MOVES = [(1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+         (1, 1, DIAGONAL_COST), (1, -1, DIAGONAL_COST), (-1, 1, DIAGONAL_COST), (-1, -1, DIAGONAL_COST)]
+
+class AgentShape:
+    """How much room a walker needs and how far it can climb or drop, in whole blocks"""
+    def __init__(self, height=1.8, step_height=0.6, jump_height=0.0, max_drop=3):
+        self.clearance = math.ceil(height)                  # Free cells needed above a floor
+        self.climb = max(int(step_height + jump_height), 0)  # Highest ledge it can get onto
+        self.max_drop = max_drop                            # Deepest drop it will walk off
+
+    @classmethod
+    def from_camera(cls, camera, max_drop=3):
+        """The player's dimensions: step height plus the height a jump reaches"""
+        jump_height = camera.jump_force ** 2 / (2 * -camera.gravity)
+        return cls(camera.player_height, camera.step_height, jump_height, max_drop)
+
+class WalkGrid:
+    """Where an agent can stand in one chunk.
+
+    columns maps world (x, z) to a tuple of the floors in that column, and
+    cells maps each floor's (x, y, z) to its headroom: y is the feet cell
+    (the block below it is solid) and headroom the number of free cells
+    from y up, capped at HEADROOM_CAP. Both are keyed by world coordinates
+    so a search can merge the grids it needs into one lookup. Grids are
+    immutable once built, so searches on the worker thread can share them
+    with the main thread.
+    """
+    __slots__ = ("chunk_x", "chunk_z", "version", "columns", "cells")
+
+    def __init__(self, chunk_x, chunk_z, version, columns, cells):
+        self.chunk_x = chunk_x
+        self.chunk_z = chunk_z
+        self.version = version  # Chunk.version the grid was built from
+        self.columns = columns
+        self.cells = cells
+
+def build_walk_grid(chunk, solid_table, clearance):
+    """Find every standable cell of a chunk at once; must run on the thread that owns the world"""
+    free = ~solid_table[chunk.voxels]
+    # headroom[x, y, z]: consecutive free cells from y upwards (above the world counts as free)
+    run = free.copy()
+    headroom = free.astype(np.uint8)
+    for k in range(1, HEADROOM_CAP):
+        run[:, :-k, :] &= free[:, k:, :]
+        headroom += run
+    standable = np.zeros_like(free)
+    standable[:, 1:, :] = ~free[:, :-1, :] & (headroom[:, 1:, :] >= clearance)
+    xs, ys, zs = np.nonzero(standable)
+    rooms = headroom[xs, ys, zs].tolist()
+    xs, ys, zs = (xs + chunk.origin_x).tolist(), ys.tolist(), (zs + chunk.origin_z).tolist()
+    columns = {}
+    for x, y, z, room in zip(xs, ys, zs, rooms):
+        columns.setdefault((x, z), []).append((y, room))
+    columns = {column: tuple(floors) for column, floors in columns.items()}
+    cells = dict(zip(zip(xs, ys, zs), rooms))
+    return WalkGrid(chunk.chunk_x, chunk.chunk_z, chunk.version, columns, cells)
+
+class PathResult:
+    """Outcome of one query: path is a list of (x, y, z) feet cells from start to goal, or None"""
+    __slots__ = ("start", "goal", "path", "expanded", "seconds", "hierarchical")
+
+    def __init__(self, start, goal, path, expanded, seconds, hierarchical):
+        self.start = start
+        self.goal = goal
+        self.path = path
+        self.expanded = expanded          # Nodes taken off the open list
+        self.seconds = seconds            # Search time on the worker
+        self.hierarchical = hierarchical  # Whether a chunk-level route narrowed the search
+
+    @property
+    def found(self):
+        return self.path is not None
+
+class GridLookup(dict):
+    """One field of many walk grids as a single dict keyed by world cell.
+
+    A chunk's entries are merged in the first time a key inside it is
+    looked up, so a search only pays for the chunks it reaches. Keys are
+    (x, z) columns or (x, y, z) cells; missing keys read as default.
+    """
+    def __init__(self, grids, field, chunks, default):
+        super().__init__()
+        self.grids = grids
+        self.field = field    # WalkGrid attribute to merge: "columns" or "cells"
+        self.chunks = chunks  # Chunks that may be merged, or None for all of them
+        self.default = default
+        self.merged = set()
+
+    def __missing__(self, key):
+        coords = (key[0] >> 4, key[-1] >> 4)
+        if coords in self.merged:
+            return self.default
+        self.merged.add(coords)
+        grid = self.grids.get(coords)
+        if grid is None or (self.chunks is not None and coords not in self.chunks):
+            return self.default
+        self.update(getattr(grid, self.field))
+        return self.get(key, self.default)
+
+class PathSearch:
+    """A* over a fixed set of walk grids; pure Python with no world access, so it runs on any thread"""
+    def __init__(self, grids, shape, max_nodes, heuristic_weight=1.0):
+        self.grids = grids  # (chunk_x, chunk_z) -> WalkGrid
+        self.shape = shape
+        self.max_nodes = max_nodes
+        self.heuristic_weight = heuristic_weight  # Above 1 expands far fewer nodes for slightly longer paths
+
+    def lookup(self, chunks=None):
+        """Floors by column and headroom by cell over some chunks (default: all grids)"""
+        return GridLookup(self.grids, "columns", chunks, ()), GridLookup(self.grids, "cells", chunks, 0)
+
+    def moves(self, columns, cells, x, y, z, room):
+        """(cell, cost, headroom) of every cell one step away from the floor at (x, y, z)"""
+        shape = self.shape
+        clearance = shape.clearance
+        result = []
+        for dx, dz, cost in MOVES:
+            nx, nz = x + dx, z + dz
+            if dx and dz:
+                # Diagonals only on the level, and only if neither corner is blocked
+                target_room = cells[(nx, y, nz)]
+                if target_room >= clearance and cells[(nx, y, z)] >= clearance and cells[(x, y, nz)] >= clearance:
+                    result.append(((nx, y, nz), cost, target_room))
+                continue
+            for floor_y, floor_room in columns[(nx, nz)]:
+                rise = floor_y - y
+                if rise > 0:
+                    # Jumping up needs room overhead before moving across
+                    if rise <= shape.climb and room >= clearance + rise:
+                        result.append(((nx, floor_y, nz), cost + CLIMB_COST * rise, floor_room))
+                elif rise < 0:
+                    # Walking off a ledge needs room in the target column down to the floor
+                    if -rise <= shape.max_drop and floor_room >= clearance - rise:
+                        result.append(((nx, floor_y, nz), cost - DROP_COST * rise, floor_room))
+                else:
+                    result.append(((nx, floor_y, nz), cost, floor_room))
+        return result
+
+    def search(self, start, goal, chunks=None):
+        """A* from start to goal (feet cells), optionally only through some chunks; returns (path or None, nodes expanded)"""
+        columns, cells = self.lookup(chunks)
+        if not cells[start] or not cells[goal]:
+            return None, 0
+        goal_x, goal_y, goal_z = goal
+        weight = self.heuristic_weight
+        diagonal_saving = DIAGONAL_COST - 1
+
+        open_list = [(0.0, 0.0, start)]
+        came_from = {start: None}
+        best_cost = {start: 0.0}
+        expanded = 0
+        moves = self.moves
+        while open_list and expanded < self.max_nodes:
+            _, cost, node = heapq.heappop(open_list)
+            if cost > best_cost[node]:
+                continue  # A cheaper route to this node was already expanded
+            if node == goal:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = came_from[node]
+                return path[::-1], expanded
+            expanded += 1
+            for neighbour, step_cost, _ in moves(columns, cells, *node, cells[node]):
+                new_cost = cost + step_cost
+                if new_cost < best_cost.get(neighbour, math.inf):
+                    best_cost[neighbour] = new_cost
+                    came_from[neighbour] = node
+                    x, y, z = neighbour
+                    dx, dz = abs(x - goal_x), abs(z - goal_z)
+                    estimate = (dx if dx > dz else dz) + diagonal_saving * (dz if dx > dz else dx) + abs(y - goal_y)
+                    heapq.heappush(open_list, (new_cost + weight * estimate, new_cost, neighbour))
+        return None, expanded
+
+    def chunks_linked(self, a, b):
+        """Whether any floor on the border of chunk a steps straight into chunk b"""
+        (ax, az), (bx, bz) = a, b
+        columns, cells = self.lookup((a, b))
+        if ax != bx:
+            edge_x = ax * 16 + (15 if bx > ax else 0)
+            border = [(edge_x, az * 16 + i) for i in range(16)]
+        else:
+            edge_z = az * 16 + (15 if bz > az else 0)
+            border = [(ax * 16 + i, edge_z) for i in range(16)]
+        for x, z in border:
+            for y, room in columns[(x, z)]:
+                for (nx, _, nz), _, _ in self.moves(columns, cells, x, y, z, room):
+                    if (nx >> 4, nz >> 4) == b:
+                        return True
+        return False
+
+    def chunk_route(self, start_chunk, goal_chunk, links):
+        """A* over chunks joined by border crossings; returns the chunks on the route, or None"""
+        if start_chunk not in self.grids:
+            return None
+        open_list = [(0, 0, start_chunk)]
+        came_from = {start_chunk: None}
+        while open_list:
+            _, steps, chunk = heapq.heappop(open_list)
+            if chunk == goal_chunk:
+                route = []
+                while chunk is not None:
+                    route.append(chunk)
+                    chunk = came_from[chunk]
+                return route
+            for dx, dz in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                neighbour = (chunk[0] + dx, chunk[1] + dz)
+                if neighbour in came_from or neighbour not in self.grids:
+                    continue
+                key = (chunk, neighbour, self.grids[chunk].version, self.grids[neighbour].version)
+                linked = links.get(key)
+                if linked is None:
+                    linked = links[key] = self.chunks_linked(chunk, neighbour)
+                if linked:
+                    came_from[neighbour] = chunk
+                    estimate = abs(neighbour[0] - goal_chunk[0]) + abs(neighbour[1] - goal_chunk[1])
+                    heapq.heappush(open_list, (steps + 1 + estimate, steps + 1, neighbour))
+        return None
+
+class PathRequest:
+    """A query waiting for grids on the main thread, then searched on the worker"""
+    __slots__ = ("start", "goal", "chunks", "future")
+
+    def __init__(self, start, goal, chunks):
+        self.start = start
+        self.goal = goal
+        self.chunks = chunks  # Chunks the search may walk through
+        self.future = None    # Set once dispatched; resolves to a PathResult
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+class Pathfinder:
+    """Path queries over cached per-chunk walkability grids.
+
+    Grids are built on the main thread (they read chunk voxels) and rebuilt
+    whenever a chunk's version shows it was edited; they are dropped when
+    the chunk unloads. request() queues a query; update(), called once per
+    frame, builds the grids its area needs and hands the query to a worker
+    thread along with the grids, which are immutable, so the search never
+    touches the world. Routes spanning several chunks are first planned
+    over a chunk-level graph (chunks joined where the agent can walk across
+    their border), and the A* over cells is confined to that corridor.
+    """
+    def __init__(self, world, shape=None, margin_chunks=2, max_nodes=20000, hierarchy_chunks=3,
+                 heuristic_weight=1.5, grid_builds_per_frame=8):
+        self.world = world
+        self.shape = shape or AgentShape()
+        self.margin_chunks = margin_chunks            # Chunks around start and goal a path may wander through
+        self.max_nodes = max_nodes                    # Expansions per search before giving up
+        self.hierarchy_chunks = hierarchy_chunks      # Chunk distance from which routes are planned per chunk first
+        self.heuristic_weight = heuristic_weight      # See PathSearch
+        self.grid_builds_per_frame = grid_builds_per_frame
+        self.solid_table = solid_block_table()
+        self.grids = {}          # (chunk_x, chunk_z) -> WalkGrid
+        self.links = {}          # Chunk border crossings, keyed by both chunks and their grid versions
+        self.waiting = []        # PathRequests still missing grids
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pathfinder")
+        self.grids_built = 0
+        self.queries = 0
+        world.unload_listeners.append(self.on_unload)
+
+    def on_unload(self, chunk):
+        self.grids.pop((chunk.chunk_x, chunk.chunk_z), None)
+
+    def grid(self, chunk_x, chunk_z):
+        """Up-to-date walk grid of a generated chunk (building it if needed), or None"""
+        chunk = self.world.chunks.get((chunk_x, chunk_z))
+        if chunk is None or chunk.stage != STAGE_FULL:
+            return None
+        grid = self.grids.get((chunk_x, chunk_z))
+        if grid is None or grid.version != chunk.version:
+            grid = self.grids[(chunk_x, chunk_z)] = build_walk_grid(chunk, self.solid_table, self.shape.clearance)
+            self.grids_built += 1
+        return grid
+
+    def is_stale(self, coords):
+        chunk = self.world.chunks.get(coords)
+        if chunk is None or chunk.stage != STAGE_FULL:
+            return False  # Nothing to build; the search treats it as a wall
+        grid = self.grids.get(coords)
+        return grid is None or grid.version != chunk.version
+
+    def search_area(self, start, goal):
+        """Chunks a path between two cells may use: their bounding box plus a margin"""
+        margin = self.margin_chunks
+        x0, x1 = sorted((start[0] >> 4, goal[0] >> 4))
+        z0, z1 = sorted((start[2] >> 4, goal[2] >> 4))
+        return [(chunk_x, chunk_z) for chunk_x in range(x0 - margin, x1 + margin + 1)
+                for chunk_z in range(z0 - margin, z1 + margin + 1)]
+
+    def request(self, start, goal):
+        """Queue a path query between two feet cells; poll the returned request's done()"""
+        start, goal = tuple(map(int, start)), tuple(map(int, goal))
+        request = PathRequest(start, goal, self.search_area(start, goal))
+        self.waiting.append(request)
+        return request
+
+    def update(self):
+        """Call once per frame: build grids for waiting queries (within a budget) and dispatch the ready ones"""
+        builds = self.grid_builds_per_frame
+        still_waiting = []
+        for request in self.waiting:
+            stale = [coords for coords in request.chunks if self.is_stale(coords)]
+            for coords in stale[:builds]:
+                self.grid(*coords)
+            if len(stale) > builds:
+                builds = 0
+                still_waiting.append(request)
+                continue
+            builds -= len(stale)
+            grids = {coords: self.grids[coords] for coords in request.chunks if coords in self.grids}
+            request.future = self.executor.submit(self.run, request.start, request.goal, grids)
+        self.waiting = still_waiting
+
+    def find_path(self, start, goal):
+        """Search synchronously on the calling (main) thread"""
+        start, goal = tuple(map(int, start)), tuple(map(int, goal))
+        chunks = self.search_area(start, goal)
+        grids = {}
+        for coords in chunks:
+            grid = self.grid(*coords)
+            if grid is not None:
+                grids[coords] = grid
+        return self.run(start, goal, grids)
+
+    def run(self, start, goal, grids):
+        started = time.perf_counter()
+        search = PathSearch(grids, self.shape, self.max_nodes, self.heuristic_weight)
+        start_chunk, goal_chunk = (start[0] >> 4, start[2] >> 4), (goal[0] >> 4, goal[2] >> 4)
+        distance = max(abs(start_chunk[0] - goal_chunk[0]), abs(start_chunk[1] - goal_chunk[1]))
+        path, expanded, hierarchical = None, 0, False
+        if distance >= self.hierarchy_chunks:
+            if len(self.links) > MAX_CACHED_LINKS:
+                self.links = {}  # Mostly entries for old grid versions
+            route = search.chunk_route(start_chunk, goal_chunk, self.links)
+            if route is None:
+                # No chain of chunks connects them, so no path can exist
+                self.queries += 1
+                return PathResult(start, goal, None, 0, time.perf_counter() - started, True)
+            corridor = set(route)
+            for chunk_x, chunk_z in route:
+                corridor.update(((chunk_x + 1, chunk_z), (chunk_x - 1, chunk_z), (chunk_x, chunk_z + 1), (chunk_x, chunk_z - 1)))
+            path, expanded = search.search(start, goal, corridor)
+            hierarchical = True
+        if path is None:
+            path, more = search.search(start, goal)
+            expanded += more
+        self.queries += 1
+        return PathResult(start, goal, path, expanded, time.perf_counter() - started, hierarchical)
+
+    def pending_count(self):
+        return len(self.waiting)
+
+    def stats(self):
+        return {
+            "grids": len(self.grids),
+            "grids_built": self.grids_built,
+            "floors": sum(len(grid.cells) for grid in self.grids.values()),
+            "queries": self.queries,
+            "waiting": len(self.waiting),
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
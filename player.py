@@ -1,12 +1,137 @@
-import pygame
-import numpy as np
-from OpenGL.GL import *
-from OpenGL.GLU import *
 import math
-import random
-from collections import defaultdict
+
+from OpenGL.GL import *
+
+def draw_cube_part(x, y, z, width, height, depth, color):
+    """Draw a cube part of a model with specified dimensions"""
+    # Adjust coordinates to center the part
+    x -= width / 2
+    z -= depth / 2
+    
+    glColor3f(*color)
+    
+    # Define vertices for the cube
+    vertices = [
+        [x, y, z], [x + width, y, z], [x + width, y + height, z], [x, y + height, z],  # Front
+        [x, y, z + depth], [x + width, y, z + depth], [x + width, y + height, z + depth], [x, y + height, z + depth]  # Back
+    ]
+    
+    # Define faces
+    faces = [
+        [0, 1, 2, 3],  # Front
+        [4, 7, 6, 5],  # Back
+        [0, 4, 5, 1],  # Bottom
+        [2, 6, 7, 3],  # Top
+        [0, 3, 7, 4],  # Left
+        [1, 5, 6, 2]   # Right
+    ]
+    
+    # Draw faces
+    glBegin(GL_QUADS)
+    for face in faces:
+        for vertex in face:
+            glVertex3f(*vertices[vertex])
+    glEnd()
+
+class HumanoidModel:
+    """Humanoid mesh compiled once into display lists and animated only by per-part transforms.
+
+    A single instance can draw any number of players or mobs: each one costs
+    five glCallList draws (torso + four limbs) plus matrix setup.
+    """
+    def __init__(self, head_size=0.5, body_width=0.4, body_height=0.75,
+                 arm_width=0.2, arm_height=0.75, leg_width=0.2, leg_height=0.75,
+                 skin_color=(0.9, 0.7, 0.6), shirt_color=(0.0, 0.5, 1.0), pants_color=(0.0, 0.0, 0.5)):
+        self.head_size = head_size
+        self.body_width = body_width
+        self.body_height = body_height
+        self.arm_width = arm_width
+        self.arm_height = arm_height
+        self.leg_width = leg_width
+        self.leg_height = leg_height
+        self.skin_color = skin_color
+        self.shirt_color = shirt_color
+        self.pants_color = pants_color
+        
+        # Display lists are created lazily, once a GL context exists
+        self.torso_list = None
+        self.arm_list = None
+        self.leg_list = None
+        
+        # Pivot points (shoulders and hips) relative to the model origin
+        self.hip_y = self.leg_height / 2
+        self.shoulder_y = self.body_height
+        self.shoulder_x = self.body_width / 2 + self.arm_width / 2
+        self.hip_x = self.leg_width / 2
+    
+    def compile(self):
+        """Build the body part meshes once"""
+        if self.torso_list is not None:
+            return
+        
+        # Body and head never move relative to the root, so they share one list
+        self.torso_list = glGenLists(1)
+        glNewList(self.torso_list, GL_COMPILE)
+        draw_cube_part(0, self.body_height / 2, 0, self.body_width, self.body_height, self.body_width, self.shirt_color)
+        draw_cube_part(0, self.body_height + self.head_size / 2, 0, self.head_size, self.head_size, self.head_size, self.skin_color)
+        glEndList()
+        
+        # Limbs hang down from their pivot at the origin
+        self.arm_list = glGenLists(1)
+        glNewList(self.arm_list, GL_COMPILE)
+        draw_cube_part(0, -self.arm_height / 2, 0, self.arm_width, self.arm_height, self.arm_width, self.skin_color)
+        glEndList()
+        
+        self.leg_list = glGenLists(1)
+        glNewList(self.leg_list, GL_COMPILE)
+        draw_cube_part(0, -self.leg_height / 2, 0, self.leg_width, self.leg_height, self.leg_width, self.pants_color)
+        glEndList()
+    
+    def draw_limb(self, display_list, pivot_x, pivot_y, swing):
+        glPushMatrix()
+        glTranslatef(pivot_x, pivot_y, 0)
+        glRotatef(swing, 1, 0, 0)
+        glCallList(display_list)
+        glPopMatrix()
+    
+    def draw(self, x, y, z, yaw, walk_animation=0.0, is_walking=False):
+        """Draw one humanoid at the given position, facing and walk phase"""
+        self.compile()
+        
+        # Calculate animation values
+        arm_swing = math.sin(walk_animation) * 30 if is_walking else 0
+        leg_swing = math.sin(walk_animation) * 45 if is_walking else 0
+        
+        glPushMatrix()
+        glTranslatef(x, y, z)
+        glRotatef(-yaw, 0, 1, 0)
+        
+        self.draw_limb(self.leg_list, -self.hip_x, self.hip_y, -leg_swing)
+        self.draw_limb(self.leg_list, self.hip_x, self.hip_y, leg_swing)
+        self.draw_limb(self.arm_list, -self.shoulder_x, self.shoulder_y, arm_swing)
+        self.draw_limb(self.arm_list, self.shoulder_x, self.shoulder_y, -arm_swing)
+        glCallList(self.torso_list)
+        
+        glPopMatrix()
+    
+    def draw_many(self, instances):
+        """Draw many humanoids sharing this mesh; instances are (x, y, z, yaw, walk_animation, is_walking)"""
+        for x, y, z, yaw, walk_animation, is_walking in instances:
+            self.draw(x, y, z, yaw, walk_animation, is_walking)
+    
+    def cleanup(self):
+        """Clean up OpenGL resources"""
+        for display_list in (self.torso_list, self.arm_list, self.leg_list):
+            if display_list is not None:
+                glDeleteLists(display_list, 1)
+        self.torso_list = None
+        self.arm_list = None
+        self.leg_list = None
 
 class Player:
+    # Shared by every Player so the mesh is only ever built once
+    model = None
+    
     def __init__(self):
         self.width = 0.6
         self.height = 1.8
@@ -25,6 +150,9 @@ class Player:
         self.walk_animation = 0.0
         self.is_walking = False
         
+        if Player.model is None:
+            Player.model = HumanoidModel(self.head_size, self.body_width, self.body_height,
+                                         self.arm_width, self.arm_height, self.leg_width, self.leg_height)
         
     def update_animation(self, is_moving, dt):
         """Update walking animation"""
@@ -34,96 +162,6 @@ class Player:
         else:
             self.walk_animation = 0.0
     
-    def draw_cube_part(self, x, y, z, width, height, depth, color):
-        """Draw a cube part of the player with specified dimensions"""
-        # Adjust coordinates to center the part
-        x -= width / 2
-        z -= depth / 2
-        
-        glColor3f(*color)
-        
-        # Define vertices for the cube
-        vertices = [
-            [x, y, z], [x + width, y, z], [x + width, y + height, z], [x, y + height, z],  # Front
-            [x, y, z + depth], [x + width, y, z + depth], [x + width, y + height, z + depth], [x, y + height, z + depth]  # Back
-        ]
-        
-        # Define faces
-        faces = [
-            [0, 1, 2, 3],  # Front
-            [4, 7, 6, 5],  # Back
-            [0, 4, 5, 1],  # Bottom
-            [2, 6, 7, 3],  # Top
-            [0, 3, 7, 4],  # Left
-            [1, 5, 6, 2]   # Right
-        ]
-        
-        # Draw faces
-        glBegin(GL_QUADS)
-        for face in faces:
-            for vertex in face:
-                glVertex3f(*vertices[vertex])
-        glEnd()
-    
     def render(self, x, y, z, yaw):
         """Render the player model at the given position"""
-        glPushMatrix()
-        
-        # Move to player position
-        glTranslatef(x, y, z)
-        
-        # Rotate player to face the right direction
-        glRotatef(-yaw, 0, 1, 0)
-        
-        # Calculate animation values
-        arm_swing = math.sin(self.walk_animation) * 30 if self.is_walking else 0
-        leg_swing = math.sin(self.walk_animation) * 45 if self.is_walking else 0
-        
-        # Draw legs
-        leg_y = self.leg_height / 2
-
-        # Left leg
-        glPushMatrix()
-        glTranslatef(-self.leg_width/2, leg_y, 0)
-        glRotatef(-leg_swing, 1, 0, 0)
-        glTranslatef(0, -self.leg_height/2, 0)
-        self.draw_cube_part(0, 0, 0, self.leg_width, self.leg_height, self.leg_width, (0.0, 0.0, 0.5))  # Dark blue pants
-        glPopMatrix()
-        
-        # Right leg
-        glPushMatrix()
-        glTranslatef(self.leg_width/2, leg_y, 0)
-        glRotatef(leg_swing, 1, 0, 0)
-        glTranslatef(0, -self.leg_height/2, 0)
-        self.draw_cube_part(0, 0, 0, self.leg_width, self.leg_height, self.leg_width, (0.0, 0.0, 0.5))
-        glPopMatrix()
-
-        # Draw arms
-        arm_y = self.body_height - self.arm_height / 2
-        
-        # Left arm
-        glPushMatrix()
-        glTranslatef(-self.body_width/2 - self.arm_width/2, arm_y + self.arm_height/2, 0)
-        glRotatef(arm_swing, 1, 0, 0)
-        glTranslatef(0, -self.arm_height/2, 0)
-        self.draw_cube_part(0, 0, 0, self.arm_width, self.arm_height, self.arm_width, (0.9, 0.7, 0.6))
-        glPopMatrix()
-        
-        # Right arm
-        glPushMatrix()
-        glTranslatef(self.body_width/2 + self.arm_width/2, arm_y + self.arm_height/2, 0)
-        glRotatef(-arm_swing, 1, 0, 0)
-        glTranslatef(0, -self.arm_height/2, 0)
-        self.draw_cube_part(0, 0, 0, self.arm_width, self.arm_height, self.arm_width, (0.9, 0.7, 0.6))
-        glPopMatrix()
-
-        # Draw body
-        body_y = self.body_height / 2
-        self.draw_cube_part(0, body_y, 0, self.body_width, self.body_height, self.body_width, (0.0, 0.5, 1.0))  # Blue shirt
-
-        # Draw head
-        head_y = self.body_height + self.head_size / 2
-        self.draw_cube_part(0, head_y, 0, self.head_size, self.head_size, self.head_size, (0.9, 0.7, 0.6))  # Skin color
-        
-      
-        glPopMatrix()
+        self.model.draw(x, y, z, yaw, self.walk_animation, self.is_walking)
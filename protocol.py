@@ -0,0 +1,75 @@
+import struct
+import zlib
+
+import numpy as np
+
+# Wire format: every message is a frame of
+#   uint8 message type | uint32 payload length | payload
+# All integers are little-endian.
+FRAME_HEADER = struct.Struct("<BI")
+
+# Client -> server
+MSG_HELLO = 1        # utf-8 player name
+MSG_POSITION = 2     # float32 x, y, z
+MSG_SET_BLOCK = 3    # int32 x, y, z, uint8 block type (0 removes the block)
+
+# Server -> client
+MSG_WELCOME = 64     # uint32 client id, uint8 view distance (in chunks)
+MSG_CHUNK = 65       # int32 chunk x, chunk z, zlib-compressed voxel column
+MSG_UNLOAD = 66      # int32 chunk x, chunk z
+MSG_BLOCK_DELTA = 67 # uint16 count, then count * (int32 x, y, z, uint8 type)
+
+CHUNK_SIZE = 16
+CHUNK_HEIGHT = 256
+MAX_PAYLOAD = 1 << 20
+
+POSITION = struct.Struct("<fff")
+SET_BLOCK = struct.Struct("<iiiB")
+WELCOME = struct.Struct("<IB")
+CHUNK_COORDS = struct.Struct("<ii")
+DELTA_COUNT = struct.Struct("<H")
+DELTA_ENTRY = SET_BLOCK
+
+class ProtocolError(Exception):
+    pass
+
+def encode_frame(msg_type, payload=b""):
+    return FRAME_HEADER.pack(msg_type, len(payload)) + payload
+
+async def read_frame(reader):
+    """Read one (msg_type, payload) frame from an asyncio StreamReader"""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    msg_type, length = FRAME_HEADER.unpack(header)
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f"Frame too large: {length} bytes")
+    payload = await reader.readexactly(length) if length else b""
+    return msg_type, payload
+
+def unpack_payload(layout, payload):
+    """Unpack a fixed-size message payload, rejecting one of the wrong length"""
+    if len(payload) != layout.size:
+        raise ProtocolError(f"Expected a {layout.size} byte payload, got {len(payload)}")
+    return layout.unpack(payload)
+
+def encode_chunk(chunk):
+    """Chunk message payload: coordinates plus the zlib-compressed voxel column"""
+    # Chunk storage is already a dense (x, y, z) uint8 array of type ids
+    return CHUNK_COORDS.pack(chunk.chunk_x, chunk.chunk_z) + zlib.compress(chunk.voxels.tobytes(), 6)
+
+def decode_chunk(payload):
+    """Inverse of encode_chunk: returns (chunk_x, chunk_z, voxels)"""
+    chunk_x, chunk_z = CHUNK_COORDS.unpack_from(payload)
+    raw = zlib.decompress(payload[CHUNK_COORDS.size:])
+    voxels = np.frombuffer(raw, dtype=np.uint8).reshape((CHUNK_SIZE, CHUNK_HEIGHT, CHUNK_SIZE))
+    return chunk_x, chunk_z, voxels
+
+def encode_deltas(deltas):
+    """Block delta payload for a list of (x, y, z, block_type) edits"""
+    parts = [DELTA_COUNT.pack(len(deltas))]
+    for x, y, z, block_type in deltas:
+        parts.append(DELTA_ENTRY.pack(x, y, z, block_type))
+    return b"".join(parts)
+
+def decode_deltas(payload):
+    (count,) = DELTA_COUNT.unpack_from(payload)
+    return [DELTA_ENTRY.unpack_from(payload, DELTA_COUNT.size + i * DELTA_ENTRY.size) for i in range(count)]
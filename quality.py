@@ -0,0 +1,64 @@
+from collections import deque
+
+class QualityController:
+    """Adjusts the render distance to hold a frame-time target.
+
+    Fed the work time of every frame (excluding the frame limiter's sleep)
+    and the number of chunks still waiting for a mesh. The distance shrinks
+    as soon as the slow end of the recent window misses the frame budget,
+    and grows only when the frame time predicted for the larger area (which
+    scales with distance squared) stays well inside the budget and meshing
+    has caught up. The gap between those thresholds, a cooldown after every
+    change and a temporary ceiling at a distance that just proved too
+    expensive keep it from oscillating.
+    """
+    def __init__(self, target_fps=60, initial_distance=4, min_distance=2, max_distance=12,
+                 window=60, grow_headroom=0.85, max_backlog=2, cooldown_frames=90, ceiling_frames=1800):
+        self.target_fps = target_fps
+        self.budget = 1.0 / target_fps
+        self.distance = initial_distance
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.grow_headroom = grow_headroom      # Grow only if the predicted frame time is under this share of the budget
+        self.max_backlog = max_backlog          # ...and at most this many chunks are waiting for meshes
+        self.cooldown_frames = cooldown_frames  # Frames to wait after any change before judging again
+        self.ceiling_frames = ceiling_frames    # How long a distance that was too slow stays off limits
+        self.frame_times = deque(maxlen=window)
+        self.frames_since_change = 0
+        self.ceiling = None
+        self.ceiling_frames_left = 0
+        self.changes = 0
+
+    def slow_frame_time(self):
+        """75th percentile of the window: ignores one-off spikes, catches sustained slowness"""
+        ordered = sorted(self.frame_times)
+        return ordered[len(ordered) * 3 // 4]
+
+    def record(self, frame_time, backlog=0):
+        """Add one frame's work time; returns the render distance to use"""
+        self.frame_times.append(frame_time)
+        self.frames_since_change += 1
+        if self.ceiling is not None:
+            self.ceiling_frames_left -= 1
+            if self.ceiling_frames_left <= 0:
+                self.ceiling = None
+        if self.frames_since_change < self.cooldown_frames or len(self.frame_times) < self.frame_times.maxlen:
+            return self.distance
+
+        slow = self.slow_frame_time()
+        if slow > self.budget and self.distance > self.min_distance:
+            self.ceiling = self.distance
+            self.ceiling_frames_left = self.ceiling_frames
+            self.set_distance(self.distance - 1)
+        elif self.distance < self.max_distance and backlog <= self.max_backlog:
+            grown = self.distance + 1
+            predicted = slow * (grown / self.distance) ** 2
+            if predicted < self.budget * self.grow_headroom and (self.ceiling is None or grown < self.ceiling):
+                self.set_distance(grown)
+        return self.distance
+
+    def set_distance(self, distance):
+        self.distance = distance
+        self.frames_since_change = 0
+        self.frame_times.clear()
+        self.changes += 1
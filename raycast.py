@@ -1,10 +1,4 @@
-import pygame
-import numpy as np
-from OpenGL.GL import *
-from OpenGL.GLU import *
 import math
-import random
-from collections import defaultdict
 
 class RaycastResult:
     def __init__(self, hit=False, block_pos=None, face_normal=None, hit_point=None, distance=None):
@@ -0,0 +1,733 @@
+import ctypes
+import math
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileProgram, compileShader
+
+from texture import *
+from mesher import *
+from allocator import *
+from mcchunk import *
+from visibility import *
+from memstats import *
+
+PAGE_SHIFT = 6                   # Arena pages hold 64 vertices
+PAGE_VERTICES = 1 << PAGE_SHIFT
+ARENA_PAGES = 1 << 16            # 4M vertices (16 MB) per arena; one page-table texel per page
+NEAR_SORT_DISTANCE = 24.0        # Transparent sections closer than this are re-sorted whenever the camera changes block
+
+CHUNK_VERTEX_SHADER = """
+#version 330
+
+layout(location = 0) in uint vertex_data;
+
+uniform mat4 view_projection;
+uniform isamplerBuffer page_origins;  // World origin of the section stored in each arena page
+
+out vec3 tex_coord;
+out float shade;
+
+const float FACE_BRIGHTNESS[6] = float[6](%s);
+
+void main() {
+    vec3 local = vec3(vertex_data & 31u, (vertex_data >> 5) & 31u, (vertex_data >> 10) & 31u);
+    uint face = (vertex_data >> %du) & 7u;
+    vec2 uv = vec2((vertex_data >> %du) & 1u, (vertex_data >> %du) & 1u);
+    float ao = float((vertex_data >> %du) & 3u) / 3.0;
+    float layer = float((vertex_data >> %du) & 255u);
+
+    vec3 section_origin = vec3(texelFetch(page_origins, gl_VertexID >> %d).xyz);
+    gl_Position = view_projection * vec4(section_origin + local, 1.0);
+    tex_coord = vec3(uv, layer);
+    shade = FACE_BRIGHTNESS[face] * (0.55 + 0.45 * ao);
+}
+""" % (", ".join(str(brightness) for _, _, brightness in FACES), FACE_SHIFT, U_SHIFT, V_SHIFT, AO_SHIFT, LAYER_SHIFT,
+       PAGE_SHIFT)
+
+CHUNK_FRAGMENT_SHADER = """
+#version 330
+
+uniform sampler2DArray block_textures;
+
+in vec3 tex_coord;
+in float shade;
+
+out vec4 frag_color;
+
+void main() {
+    vec4 texel = texture(block_textures, tex_coord);
+    if (texel.a < 0.1) {
+        discard;  // Holes in see-through textures such as leaves
+    }
+    frag_color = vec4(texel.rgb * shade, texel.a);
+}
+"""
+
+PARTICLE_VERTEX_SHADER = """
+#version 330
+
+// One point per particle; positions arrive as separate x, y, z and size streams (ParticleSystem rows)
+layout(location = 0) in float x;
+layout(location = 1) in float y;
+layout(location = 2) in float z;
+layout(location = 3) in float size;
+layout(location = 4) in vec4 color;
+
+uniform mat4 view_projection;
+uniform float point_scale;  // Pixels covered by one block at distance 1
+
+out vec4 particle_color;
+
+void main() {
+    gl_Position = view_projection * vec4(x, y, z, 1.0);
+    gl_PointSize = max(point_scale * size / gl_Position.w, 1.0);
+    particle_color = color;
+}
+"""
+
+PARTICLE_FRAGMENT_SHADER = """
+#version 330
+
+in vec4 particle_color;
+
+out vec4 frag_color;
+
+void main() {
+    if (particle_color.a == 0.0) {
+        discard;  // Dead particles still in the ring window
+    }
+    // Darken the lower right half so the square sprites read as little cubes
+    float shade = gl_PointCoord.x + gl_PointCoord.y > 1.0 ? 0.75 : 1.0;
+    frag_color = vec4(particle_color.rgb * shade, particle_color.a);
+}
+"""
+
+def camera_view_projection():
+    """The current fixed-function projection * modelview, laid out for glUniformMatrix4fv"""
+    # Column-major matrices read back from GL: (P * MV)^T == MV^T * P^T
+    modelview = glGetFloatv(GL_MODELVIEW_MATRIX)
+    projection = glGetFloatv(GL_PROJECTION_MATRIX)
+    return np.dot(modelview, projection).astype(np.float32)
+
+class BlockTextures:
+    """GPU 2D texture array holding every procedural block texture layer"""
+    def __init__(self, seed=1337):
+        self.layers = build_layer_stack(generate_layers(seed))
+        self.texture_id = None
+
+    def upload(self):
+        """Upload the layers to the GPU (requires a current GL context)"""
+        if self.texture_id is None:
+            self.texture_id = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self.texture_id)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage3D(GL_TEXTURE_2D_ARRAY, 0, GL_RGBA8, TILE_SIZE, TILE_SIZE, len(self.layers), 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, self.layers)
+        # Nearest filtering keeps the pixel-art look; layers never bleed into each other
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+
+    def bind(self):
+        """Bind the texture array once for all chunk rendering"""
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self.texture_id)
+
+    def cleanup(self):
+        if self.texture_id is not None:
+            glDeleteTextures([self.texture_id])
+            self.texture_id = None
+
+class ChunkShader:
+    """Compiled chunk shader program and its uniform locations"""
+    def __init__(self):
+        self.program = compileProgram(compileShader(CHUNK_VERTEX_SHADER, GL_VERTEX_SHADER),
+                                      compileShader(CHUNK_FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+                                      validate=False)
+        self.view_projection = glGetUniformLocation(self.program, "view_projection")
+        self.page_origins = glGetUniformLocation(self.program, "page_origins")
+        self.block_textures = glGetUniformLocation(self.program, "block_textures")
+
+    def use(self):
+        """Activate the program with the current fixed-function camera matrices"""
+        glUseProgram(self.program)
+        glUniformMatrix4fv(self.view_projection, 1, GL_FALSE, camera_view_projection())
+        glUniform1i(self.block_textures, 0)
+        glUniform1i(self.page_origins, 1)
+
+    def cleanup(self):
+        glDeleteProgram(self.program)
+
+class SectionAllocation:
+    """One section's vertex range inside a MeshArena"""
+    __slots__ = ("arena", "page", "vertex_count", "origin")
+
+    def __init__(self, arena, page, vertex_count, origin):
+        self.arena = arena
+        self.page = page                  # First page of the block
+        self.vertex_count = vertex_count
+        self.origin = origin              # World (x, y, z) of the section
+
+    @property
+    def first(self):
+        return self.page * PAGE_VERTICES
+
+    @property
+    def section_y(self):
+        return self.origin[1] // SECTION_SIZE
+
+class MeshArena:
+    """A large vertex buffer that section meshes are suballocated from.
+
+    Space is handed out in pages by a BuddyAllocator. A parallel page table
+    (a texture buffer of one ivec4 per page) stores the world origin of the
+    section occupying each page, so the vertex shader finds its section
+    origin from gl_VertexID and every section in the arena can be drawn
+    with a single glMultiDrawArrays call.
+    """
+    def __init__(self, pages=ARENA_PAGES):
+        self.allocator = BuddyAllocator(pages)
+        self.allocations = {}  # page -> SectionAllocation
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, pages * PAGE_VERTICES * BYTES_PER_VERTEX, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        self.page_table = glGenBuffers(1)
+        glBindBuffer(GL_TEXTURE_BUFFER, self.page_table)
+        glBufferData(GL_TEXTURE_BUFFER, pages * 16, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+        self.page_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_BUFFER, self.page_texture)
+        glTexBuffer(GL_TEXTURE_BUFFER, GL_RGBA32I, self.page_table)
+        glBindTexture(GL_TEXTURE_BUFFER, 0)
+
+        self.vertex_array = glGenVertexArrays(1)
+        glBindVertexArray(self.vertex_array)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableVertexAttribArray(0)
+        glVertexAttribIPointer(0, 1, GL_UNSIGNED_INT, BYTES_PER_VERTEX, ctypes.c_void_p(0))
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        # Draw ranges queued for this frame
+        self.draw_firsts = []
+        self.draw_counts = []
+
+    def allocate(self, vertex_count, origin):
+        """Reserve space for a section; returns a SectionAllocation or None when the arena is full"""
+        pages = -(-vertex_count // PAGE_VERTICES)
+        page = self.allocator.allocate(pages)
+        if page is None:
+            return None
+        allocation = SectionAllocation(self, page, vertex_count, origin)
+        self.allocations[page] = allocation
+        self.write_page_table(allocation)
+        return allocation
+
+    def write_page_table(self, allocation):
+        pages = self.allocator.block_pages(allocation.page)
+        entries = np.empty((pages, 4), dtype=np.int32)
+        entries[:] = (*allocation.origin, 0)
+        glBindBuffer(GL_TEXTURE_BUFFER, self.page_table)
+        glBufferSubData(GL_TEXTURE_BUFFER, allocation.page * 16, entries.nbytes, entries)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+    def write(self, allocation, vertices):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferSubData(GL_ARRAY_BUFFER, allocation.first * BYTES_PER_VERTEX, vertices.nbytes, vertices)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def free(self, allocation):
+        del self.allocations[allocation.page]
+        self.allocator.free(allocation.page)
+
+    def queue_draw(self, allocation):
+        self.draw_firsts.append(allocation.first)
+        self.draw_counts.append(allocation.vertex_count)
+
+    def flush(self):
+        """Draw every queued section with one call; returns the number of draw calls issued"""
+        if not self.draw_firsts:
+            return 0
+        glBindVertexArray(self.vertex_array)
+        glActiveTexture(GL_TEXTURE1)
+        glBindTexture(GL_TEXTURE_BUFFER, self.page_texture)
+        glActiveTexture(GL_TEXTURE0)
+        glMultiDrawArrays(GL_TRIANGLES, np.array(self.draw_firsts, dtype=np.int32),
+                          np.array(self.draw_counts, dtype=np.int32), len(self.draw_firsts))
+        self.draw_firsts = []
+        self.draw_counts = []
+        return 1
+
+    @property
+    def used_bytes(self):
+        return self.allocator.used_pages * PAGE_VERTICES * BYTES_PER_VERTEX
+
+    @property
+    def capacity_bytes(self):
+        return self.allocator.capacity_pages * PAGE_VERTICES * BYTES_PER_VERTEX
+
+    def cleanup(self):
+        glDeleteVertexArrays(1, [self.vertex_array])
+        glDeleteTextures([self.page_texture])
+        glDeleteBuffers(2, [self.vbo, self.page_table])
+
+class TransparentSection:
+    """One section's transparent faces: their arena allocation plus a CPU copy for re-sorting.
+
+    The arena holds the quads in the order of the last sort, farthest from
+    the camera first; sort_key records the camera block (or section, when
+    far away) that order was computed for.
+    """
+    __slots__ = ("allocation", "quads", "centers", "sort_key")
+
+    def __init__(self, allocation, quads, centers):
+        self.allocation = allocation
+        self.quads = quads      # (quads, 6) packed vertices in mesh order
+        self.centers = centers  # (quads, 3) world position of each quad's centre
+        self.sort_key = None
+
+    @property
+    def center(self):
+        x, y, z = self.allocation.origin
+        return (x + SECTION_SIZE / 2, y + SECTION_SIZE / 2, z + SECTION_SIZE / 2)
+
+    @property
+    def nbytes(self):
+        return self.quads.nbytes + self.centers.nbytes
+
+    def sort(self, camera_position, key):
+        """Rewrite the section's vertices back to front as seen from camera_position"""
+        distances = ((self.centers - np.array(camera_position, dtype=np.float32)) ** 2).sum(axis=1)
+        order = np.argsort(-distances, kind="stable")
+        self.allocation.arena.write(self.allocation, self.quads[order].reshape(-1))
+        self.sort_key = key
+
+class GpuMesh:
+    """An uploaded chunk mesh: one arena allocation per non-empty section, opaque and transparent"""
+    def __init__(self, version, sections, connectivity, transparent):
+        self.version = version
+        self.sections = sections          # SectionAllocations
+        self.connectivity = connectivity  # Face connectivity mask per section, for occlusion culling
+        self.transparent = transparent    # TransparentSections
+
+    @property
+    def vertex_count(self):
+        return (sum(allocation.vertex_count for allocation in self.sections)
+                + sum(section.allocation.vertex_count for section in self.transparent))
+
+    @property
+    def cpu_nbytes(self):
+        """Bytes kept on the CPU for re-sorting transparent faces"""
+        return sum(section.nbytes for section in self.transparent)
+
+class ChunkRenderer:
+    """Owns the GL side of chunks: mesh scheduling, buffer upload, drawing and cleanup.
+
+    Meshing runs on a MeshBuilder worker pool; this class only snapshots
+    dirty chunks and uploads finished vertex arrays on the main (GL) thread.
+    Chunks are drawn with a GLSL 3.3 shader from packed 4-byte vertices.
+    Section meshes live in a few large MeshArena buffers, so loading and
+    unloading chunks does not allocate GL objects and each arena is drawn
+    with one glMultiDrawArrays call. Kept out of mcchunk.py/world.py so the
+    world can run without a GL context (for example inside the headless
+    server). Requires a current GL context.
+    """
+    def __init__(self, world, mesh_builder=None, uploads_per_frame=8, arena_pages=ARENA_PAGES,
+                 defrag_moves_per_frame=16):
+        self.world = world
+        self.mesh_builder = mesh_builder if mesh_builder is not None else MeshBuilder()
+        self.uploads_per_frame = uploads_per_frame
+        self.arena_pages = arena_pages
+        self.defrag_moves_per_frame = defrag_moves_per_frame
+        self.ready = []  # Finished meshes waiting for an upload slot
+        self.stale_meshes_dropped = 0
+        self.arenas = []
+        self.arenas_created = 0
+        self.sections_moved = 0
+        self.draw_calls = 0  # Issued by the last end()
+        self.triangles = 0   # Drawn by the last end()
+        self.transparent_queue = []  # TransparentSections queued by render_chunk() for render_transparent()
+        self.transparent_draw_calls = 0
+        self.transparent_triangles = 0
+        self.transparent_sorts = 0
+        self.sorts_per_frame = 32    # Re-sorts of far sections per frame; the rest keep their old order a little longer
+        self.occlusion_culling = True
+        self.meshes_changed = 0  # Bumped on every upload/release so cached visibility can be invalidated
+        self.visibility_key = None
+        self.visible = None
+        self.textures = BlockTextures()
+        self.textures.upload()
+        self.shader = ChunkShader()
+        # Free GPU resources whenever the world drops a chunk
+        world.unload_listeners.append(self.cleanup_chunk)
+    
+    def update(self, chunks):
+        """Queue rebuilds for dirty chunks (in the given priority order) and upload finished meshes"""
+        # Keep the queue short so the nearest chunks are always built first
+        max_in_flight = self.mesh_builder.workers * 2
+        for chunk in chunks:
+            if self.mesh_builder.pending_count() >= max_in_flight:
+                break
+            if chunk.needs_update and not self.mesh_builder.is_building(chunk):
+                self.mesh_builder.submit(self.world, chunk)
+        
+        for mesh in self.mesh_builder.completed():
+            self.world.memory.add(MEM_MESH_CPU, (mesh.chunk_x, mesh.chunk_z), mesh.nbytes)
+            self.ready.append(mesh)
+        uploads = 0
+        while self.ready and uploads < self.uploads_per_frame:
+            mesh = self.ready.pop(0)
+            self.world.memory.add(MEM_MESH_CPU, (mesh.chunk_x, mesh.chunk_z), -mesh.nbytes)
+            chunk = self.world.chunks.get((mesh.chunk_x, mesh.chunk_z))
+            if chunk is None or mesh.version != chunk.version:
+                # Unloaded or edited while being built; a fresh build is queued next frame
+                self.stale_meshes_dropped += 1
+                continue
+            self.upload(chunk, mesh)
+            uploads += 1
+        self.defragment(self.defrag_moves_per_frame)
+    
+    def build_all(self, chunks, progress=None):
+        """Mesh and upload every listed chunk that needs it, blocking until done (for loading screens).
+
+        All builds are queued at once so the whole worker pool stays busy;
+        progress(done, total) is called as meshes are uploaded.
+        """
+        pending = [chunk for chunk in chunks if chunk.needs_update]
+        for chunk in pending:
+            self.mesh_builder.submit(self.world, chunk)
+        done = 0
+        while self.mesh_builder.pending_count():
+            self.mesh_builder.wait()
+            for mesh in self.mesh_builder.completed():
+                chunk = self.world.chunks.get((mesh.chunk_x, mesh.chunk_z))
+                if chunk is not None and mesh.version == chunk.version:
+                    self.upload(chunk, mesh)
+                done += 1
+                if progress is not None:
+                    progress(done, len(pending))
+    
+    def allocate(self, vertex_count, origin, exclude=None, grow=True):
+        """Find arena space for a section, opening a new arena (if grow) when the existing ones are full"""
+        for arena in self.arenas:
+            if arena is not exclude:
+                allocation = arena.allocate(vertex_count, origin)
+                if allocation is not None:
+                    return allocation
+        if not grow:
+            return None
+        arena = MeshArena(self.arena_pages)
+        self.arenas.append(arena)
+        self.arenas_created += 1
+        self.record_arena_memory()
+        return arena.allocate(vertex_count, origin)
+    
+    def record_arena_memory(self):
+        # Arena space is reserved from the driver up front; whatever sections do not fill is slack
+        reserved = sum(arena.capacity_bytes for arena in self.arenas)
+        self.world.memory.set(MEM_GPU_SLACK, "arenas", reserved - self.world.memory.totals.get(MEM_GPU_MESH, 0))
+    
+    def upload(self, chunk, mesh):
+        """Copy a finished CPU mesh into arena space, replacing the chunk's previous mesh"""
+        self.release(chunk)
+        sections = []
+        for section_y, first, count in mesh.sections:
+            allocation = self.allocate(count, (chunk.origin_x, section_y * SECTION_SIZE, chunk.origin_z))
+            allocation.arena.write(allocation, mesh.vertices[first:first + count])
+            sections.append(allocation)
+        transparent = []
+        origin = np.array((chunk.origin_x, 0, chunk.origin_z), dtype=np.float32)
+        for section_y, first, count in mesh.transparent_sections:
+            allocation = self.allocate(count, (chunk.origin_x, section_y * SECTION_SIZE, chunk.origin_z))
+            quads = mesh.transparent_vertices[first:first + count].reshape(-1, 6)
+            allocation.arena.write(allocation, quads)  # Sorted the first time it is drawn
+            transparent.append(TransparentSection(allocation, quads, mesh.transparent_centers[first // 6:(first + count) // 6] + origin))
+        chunk.mesh = GpuMesh(mesh.version, sections, mesh.connectivity, transparent)
+        self.meshes_changed += 1
+        self.world.memory.add(MEM_MESH_CPU, (chunk.chunk_x, chunk.chunk_z), chunk.mesh.cpu_nbytes)
+        self.world.memory.set(MEM_GPU_MESH, (chunk.chunk_x, chunk.chunk_z),
+                              mesh.vertices.nbytes + mesh.transparent_vertices.nbytes)
+        self.record_arena_memory()
+        chunk.needs_update = False
+        chunk.is_compiled = True
+    
+    def compile_chunk(self, chunk):
+        """Mesh and upload a chunk synchronously"""
+        self.upload(chunk, build_chunk_mesh(self.world, chunk, self.mesh_builder.cache))
+    
+    def defragment(self, max_moves):
+        """Evacuate the emptiest arena into the others once they have room, then delete it.
+
+        The buddy allocator already merges free space inside an arena; this
+        returns whole arenas to the driver after many chunks unload. Sections
+        are moved GPU-side with glCopyBufferSubData, at most max_moves per call.
+        """
+        if len(self.arenas) < 2:
+            return
+        emptiest = min(self.arenas, key=lambda arena: arena.allocator.used_pages)
+        spare = sum(arena.allocator.free_pages() for arena in self.arenas if arena is not emptiest)
+        # Leave headroom because buddy blocks round sizes up
+        if emptiest.allocator.used_pages * 2 > spare:
+            return
+        for allocation in list(emptiest.allocations.values())[:max_moves]:
+            target = self.allocate(allocation.vertex_count, allocation.origin, exclude=emptiest, grow=False)
+            if target is None:
+                return
+            self.move(allocation, target)
+        if not emptiest.allocations:
+            emptiest.cleanup()
+            self.arenas.remove(emptiest)
+            self.record_arena_memory()
+    
+    def move(self, allocation, target):
+        """Copy a section's vertices to a new allocation and repoint the allocation in place"""
+        source = allocation.arena
+        glBindBuffer(GL_COPY_READ_BUFFER, source.vbo)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, target.arena.vbo)
+        glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER, allocation.first * BYTES_PER_VERTEX,
+                            target.first * BYTES_PER_VERTEX, allocation.vertex_count * BYTES_PER_VERTEX)
+        glBindBuffer(GL_COPY_READ_BUFFER, 0)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, 0)
+        source.free(allocation)
+        # Chunks hold the allocation object, so update it rather than handing out the new one
+        target.arena.allocations[target.page] = allocation
+        allocation.arena = target.arena
+        allocation.page = target.page
+        self.sections_moved += 1
+    
+    def visible_sections(self, camera_x, camera_y, camera_z):
+        """Sections the camera could see past terrain, or None when occlusion culling is off.
+
+        The walk is redone only when the camera enters another section, a
+        mesh (and so possibly its connectivity) changed or the render
+        distance moved.
+        """
+        if not self.occlusion_culling:
+            return None
+        section_count = CHUNK_HEIGHT // SECTION_SIZE
+        start = camera_section(camera_x, camera_y, camera_z, section_count)
+        key = (start, self.meshes_changed, self.world.render_distance)
+        if key != self.visibility_key:
+            # Sections above the tallest column hold nothing to draw, and a walk that climbs into
+            # them can never come back down, so stop one all-air layer above the terrain
+            bounds = self.world.height_bounds()
+            top_section = bounds[1] // SECTION_SIZE + 1 if bounds is not None else 0
+            walk_sections = min(max(top_section, start[1]) + 1, section_count)
+            self.visible = find_visible_sections(start, self.chunk_connectivity,
+                                                 self.world.render_distance + 1, walk_sections)
+            self.visibility_key = key
+        return self.visible
+    
+    def chunk_connectivity(self, chunk_x, chunk_z):
+        chunk = self.world.chunks.get((chunk_x, chunk_z))
+        if chunk is None or chunk.mesh is None:
+            return None
+        return chunk.mesh.connectivity
+    
+    def begin(self):
+        """Bind the shader and textures shared by every chunk draw"""
+        self.shader.use()
+        glActiveTexture(GL_TEXTURE0)
+        self.textures.bind()
+    
+    def render_chunk(self, chunk, visible=None):
+        """Queue the chunk's sections for drawing (between begin() and end()); returns the sections queued.
+
+        visible is the set from visible_sections(); None draws every section.
+        """
+        if chunk.mesh is None or not chunk.is_compiled:
+            return 0
+        queued = 0
+        for allocation in chunk.mesh.sections:
+            if visible is None or (chunk.chunk_x, allocation.section_y, chunk.chunk_z) in visible:
+                allocation.arena.queue_draw(allocation)
+                queued += 1
+        for section in chunk.mesh.transparent:
+            if visible is None or (chunk.chunk_x, section.allocation.section_y, chunk.chunk_z) in visible:
+                self.transparent_queue.append(section)
+        return queued
+    
+    def end(self):
+        """Draw everything queued this frame, one glMultiDrawArrays per arena"""
+        self.triangles = sum(sum(arena.draw_counts) for arena in self.arenas) // 3
+        self.draw_calls = sum(arena.flush() for arena in self.arenas)
+        self.end_pass()
+    
+    def render_transparent(self, camera_x, camera_y, camera_z):
+        """Draw the transparent sections queued this frame, blended, farthest first.
+
+        Call after all opaque geometry (chunks and entities). Sections are
+        drawn in order of distance and the faces inside each one are kept
+        sorted back to front. A section is re-sorted only when the camera
+        has moved into another block (for sections within
+        NEAR_SORT_DISTANCE) or another section (for those farther away);
+        otherwise the order already in its buffer is reused.
+        """
+        queue = self.transparent_queue
+        self.transparent_queue = []
+        self.transparent_draw_calls = 0
+        self.transparent_triangles = sum(section.allocation.vertex_count for section in queue) // 3
+        if not queue:
+            return
+        camera = (camera_x, camera_y, camera_z)
+        camera_block = (math.floor(camera_x), math.floor(camera_y), math.floor(camera_z))
+        camera_section = tuple(coordinate // SECTION_SIZE for coordinate in camera_block)
+        distances = [sum((a - b) ** 2 for a, b in zip(section.center, camera)) for section in queue]
+        order = sorted(range(len(queue)), key=distances.__getitem__)
+        far_sorts = self.sorts_per_frame
+        for index in order:  # Nearest first, so the far-sort budget goes where errors show most
+            section = queue[index]
+            if distances[index] < NEAR_SORT_DISTANCE ** 2:
+                if section.sort_key != camera_block:
+                    section.sort(camera, camera_block)
+                    self.transparent_sorts += 1
+            elif section.sort_key != camera_section and (far_sorts > 0 or section.sort_key is None):
+                section.sort(camera, camera_section)
+                self.transparent_sorts += 1
+                far_sorts -= 1
+
+        self.begin()
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glDepthMask(GL_FALSE)
+        # Farthest first; consecutive sections in the same arena share one draw call
+        arena = None
+        for index in reversed(order):
+            allocation = queue[index].allocation
+            if arena is not None and allocation.arena is not arena:
+                self.transparent_draw_calls += arena.flush()
+            arena = allocation.arena
+            arena.queue_draw(allocation)
+        self.transparent_draw_calls += arena.flush()
+        glDepthMask(GL_TRUE)
+        glDisable(GL_BLEND)
+        self.end_pass()
+
+    def end_pass(self):
+        """Unbind what begin() and the draws bound"""
+        glBindVertexArray(0)
+        glActiveTexture(GL_TEXTURE1)
+        glBindTexture(GL_TEXTURE_BUFFER, 0)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        glUseProgram(0)
+
+    def release(self, chunk):
+        """Return a chunk's sections to their arenas"""
+        if chunk.mesh is not None:
+            for allocation in chunk.mesh.sections:
+                allocation.arena.free(allocation)
+            for section in chunk.mesh.transparent:
+                section.allocation.arena.free(section.allocation)
+            self.world.memory.add(MEM_MESH_CPU, (chunk.chunk_x, chunk.chunk_z), -chunk.mesh.cpu_nbytes)
+            chunk.mesh = None
+            self.meshes_changed += 1
+            self.world.memory.release(MEM_GPU_MESH, (chunk.chunk_x, chunk.chunk_z))
+            self.record_arena_memory()
+    
+    def cleanup_chunk(self, chunk):
+        """Release the chunk's GPU mesh and drop its finished meshes still waiting for upload"""
+        self.release(chunk)
+        chunk.is_compiled = False
+        coords = (chunk.chunk_x, chunk.chunk_z)
+        waiting = [mesh for mesh in self.ready if (mesh.chunk_x, mesh.chunk_z) == coords]
+        if waiting:
+            # Un-charge them now, before the world releases the chunk's memory accounting
+            self.ready = [mesh for mesh in self.ready if (mesh.chunk_x, mesh.chunk_z) != coords]
+            self.world.memory.add(MEM_MESH_CPU, coords, -sum(mesh.nbytes for mesh in waiting))
+            self.stale_meshes_dropped += len(waiting)
+    
+    def stats(self):
+        """Arena memory, allocation counters and the last frame's draw calls and triangles"""
+        return {
+            "arenas": len(self.arenas),
+            "arenas_created": self.arenas_created,
+            "used_bytes": sum(arena.used_bytes for arena in self.arenas),
+            "capacity_bytes": sum(arena.capacity_bytes for arena in self.arenas),
+            "sections_moved": self.sections_moved,
+            "draw_calls": self.draw_calls,
+            "transparent_draw_calls": self.transparent_draw_calls,
+            "triangles": self.triangles,
+            "transparent_triangles": self.transparent_triangles,
+            "transparent_sorts": self.transparent_sorts,
+        }
+    
+    def shutdown(self):
+        self.mesh_builder.shutdown()
+
+class ParticleRenderer:
+    """Draws every particle of a ParticleSystem as a point sprite with one glMultiDrawArrays call.
+
+    The vertex buffer mirrors the system's ring: four float streams (x, y,
+    z, size) followed by the RGBA bytes, each capacity entries long. Each
+    frame only the ring window is uploaded, into the same slots, and drawn
+    as at most two ranges. Particles are blended with depth writes off, so
+    they never hide each other or the transparent blocks drawn before them.
+    Requires a current GL context.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.program = compileProgram(compileShader(PARTICLE_VERTEX_SHADER, GL_VERTEX_SHADER),
+                                      compileShader(PARTICLE_FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+                                      validate=False)
+        self.view_projection = glGetUniformLocation(self.program, "view_projection")
+        self.point_scale = glGetUniformLocation(self.program, "point_scale")
+        self.color_offset = 4 * 4 * capacity
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.color_offset + 4 * capacity, None, GL_STREAM_DRAW)
+        self.vertex_array = glGenVertexArrays(1)
+        glBindVertexArray(self.vertex_array)
+        for row in range(4):
+            glEnableVertexAttribArray(row)
+            glVertexAttribPointer(row, 1, GL_FLOAT, GL_FALSE, 4, ctypes.c_void_p(row * 4 * capacity))
+        glEnableVertexAttribArray(4)
+        glVertexAttribPointer(4, 4, GL_UNSIGNED_BYTE, GL_TRUE, 4, ctypes.c_void_p(self.color_offset))
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.draw_calls = 0  # Issued by the last render()
+        self.points = 0      # Points submitted by the last render(), dead ones in the window included
+
+    def render(self, particles):
+        """Upload the live window of a ParticleSystem and draw it"""
+        ranges = particles.ranges()
+        self.draw_calls = 0
+        self.points = sum(count for _, count in ranges)
+        if not ranges:
+            return
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        for first, count in ranges:
+            for row in range(4):
+                glBufferSubData(GL_ARRAY_BUFFER, (row * self.capacity + first) * 4, count * 4,
+                                particles.positions[row, first:first + count])
+            glBufferSubData(GL_ARRAY_BUFFER, self.color_offset + first * 4, count * 4,
+                            particles.colors[first:first + count])
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glUseProgram(self.program)
+        glUniformMatrix4fv(self.view_projection, 1, GL_FALSE, camera_view_projection())
+        # projection[1][1] is cot(fov / 2): pixels per block at distance 1 is half the viewport height times that
+        viewport_height = glGetIntegerv(GL_VIEWPORT)[3]
+        glUniform1f(self.point_scale, viewport_height / 2 * glGetFloatv(GL_PROJECTION_MATRIX)[1][1])
+        glEnable(GL_PROGRAM_POINT_SIZE)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glDepthMask(GL_FALSE)
+        glBindVertexArray(self.vertex_array)
+        glMultiDrawArrays(GL_POINTS, np.array([first for first, _ in ranges], dtype=np.int32),
+                          np.array([count for _, count in ranges], dtype=np.int32), len(ranges))
+        self.draw_calls = 1
+        glBindVertexArray(0)
+        glDepthMask(GL_TRUE)
+        glDisable(GL_BLEND)
+        glDisable(GL_PROGRAM_POINT_SIZE)
+        glUseProgram(0)
+
+    def cleanup(self):
+        glDeleteVertexArrays(1, [self.vertex_array])
+        glDeleteBuffers(1, [self.vbo])
+        glDeleteProgram(self.program)
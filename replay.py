@@ -0,0 +1,100 @@
+import struct
+
+# Recording file layout (little-endian):
+#   header: magic, format version, world seed
+#   then one record per frame: dt, mouse dx, mouse dy, held-key bitmask, action count,
+#   followed by one byte per action
+MAGIC = b"PCIR"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHq")
+FRAME = struct.Struct("<fhhHB")
+
+# Discrete actions taken during a frame, in the order they happened
+ACTION_REMOVE_BLOCK = 1
+ACTION_PLACE_BLOCK = 2
+ACTION_RESET_CAMERA = 3
+ACTION_TOGGLE_MODE = 4
+ACTION_CYCLE_VIEW = 5
+ACTION_QUIT = 6
+ACTION_DUMP_MEMORY = 7
+
+class ReplayError(Exception):
+    pass
+
+class InputFrame:
+    """Everything the game loop consumed from the player in one frame"""
+    __slots__ = ("dt", "mouse_dx", "mouse_dy", "held_keys", "actions")
+
+    def __init__(self, dt, mouse_dx, mouse_dy, held_keys, actions):
+        self.dt = dt                # Simulation step in seconds
+        self.mouse_dx = mouse_dx
+        self.mouse_dy = mouse_dy
+        self.held_keys = held_keys  # Bitmask over the game's recorded key list
+        self.actions = actions      # List of ACTION_* codes
+
+    @property
+    def quit(self):
+        return ACTION_QUIT in self.actions
+
+class HeldKeys:
+    """Stand-in for pygame.key.get_pressed() built from a recorded bitmask"""
+    def __init__(self, mask, key_codes):
+        self.pressed = {code for bit, code in enumerate(key_codes) if mask >> bit & 1}
+
+    def __getitem__(self, key_code):
+        return key_code in self.pressed
+
+def pack_held_keys(pressed, key_codes):
+    """Bitmask of which of key_codes are down in a pygame.key.get_pressed() result"""
+    mask = 0
+    for bit, code in enumerate(key_codes):
+        if pressed[code]:
+            mask |= 1 << bit
+    return mask
+
+def clamp_int16(value):
+    return max(-32768, min(32767, int(value)))
+
+class InputRecorder:
+    """Appends input frames to a recording file"""
+    def __init__(self, path, seed):
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, seed))
+        self.frames = 0
+
+    def write(self, frame):
+        self.file.write(FRAME.pack(frame.dt, clamp_int16(frame.mouse_dx), clamp_int16(frame.mouse_dy),
+                                   frame.held_keys, len(frame.actions)))
+        self.file.write(bytes(frame.actions))
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+class InputReplay:
+    """Reads a recording back frame by frame"""
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        if len(self.data) < HEADER.size:
+            raise ReplayError("recording is too short")
+        magic, version, self.seed = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ReplayError("not an input recording")
+        if version != FORMAT_VERSION:
+            raise ReplayError(f"unsupported recording version {version}")
+        self.offset = HEADER.size
+        self.frames = 0
+
+    def next_frame(self):
+        """The next recorded frame, or None at the end of the recording"""
+        if self.offset + FRAME.size > len(self.data):
+            return None
+        dt, mouse_dx, mouse_dy, held_keys, action_count = FRAME.unpack_from(self.data, self.offset)
+        self.offset += FRAME.size
+        actions = list(self.data[self.offset:self.offset + action_count])
+        if len(actions) != action_count:
+            raise ReplayError("recording ends mid-frame")
+        self.offset += action_count
+        self.frames += 1
+        return InputFrame(dt, mouse_dx, mouse_dy, held_keys, actions)
@@ -0,0 +1,242 @@
+import argparse
+import asyncio
+import time
+from collections import deque
+
+from world import *
+from protocol import *
+from blockupdates import BlockUpdateScheduler
+
+class ClientSession:
+    def __init__(self, client_id, reader, writer):
+        self.client_id = client_id
+        self.reader = reader
+        self.writer = writer
+        self.name = ""
+        self.position = None       # Last reported (x, y, z), None until the first update
+        self.known_chunks = set()  # Chunks this client has been sent
+        self.pending_chunks = []   # Chunks in range but not sent yet, closest first
+        self.interest = set()      # Chunks currently inside the client's view distance
+        self.interest_center = None
+
+    def send(self, msg_type, payload=b""):
+        self.writer.write(encode_frame(msg_type, payload))
+
+    def backlog(self):
+        """Bytes queued on the socket that the client has not read yet"""
+        return self.writer.transport.get_write_buffer_size()
+
+class GameServer:
+    """Headless authoritative server: owns the World and runs the tick loop without GL.
+
+    Clients connect over TCP or a Unix socket (see protocol.py for the wire
+    format). Each tick the server applies queued block edits, runs block
+    updates (falling sand, spreading grass), streams chunks entering a
+    client's view distance, and broadcasts block deltas only to clients that
+    have the affected chunk loaded.
+    """
+    def __init__(self, world=None, tick_rate=20, view_distance=4, chunks_per_tick=4, max_backlog=1 << 20):
+        self.world = world if world is not None else World()
+        self.tick_rate = tick_rate
+        self.view_distance = view_distance
+        self.chunks_per_tick = chunks_per_tick  # Per-client chunk streaming budget
+        self.max_backlog = max_backlog          # Pause streaming to clients that fall behind
+        self.clients = {}
+        self.next_client_id = 1
+        self.pending_edits = []   # (client, (x, y, z, block_type)) in arrival order
+        self.encoded_chunks = {}  # Cached MSG_CHUNK payloads, dropped when a chunk changes
+        self.block_updates = BlockUpdateScheduler(self.world)
+        self.tick_count = 0
+        self.tick_times = deque(maxlen=200)
+        self.servers = []
+        self.running = False
+
+    async def start(self, host="127.0.0.1", port=25565):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        self.servers.append(server)
+        return server
+
+    async def start_unix(self, path):
+        server = await asyncio.start_unix_server(self.handle_client, path=path)
+        self.servers.append(server)
+        return server
+
+    async def handle_client(self, reader, writer):
+        client = ClientSession(self.next_client_id, reader, writer)
+        self.next_client_id += 1
+        self.clients[client.client_id] = client
+        client.send(MSG_WELCOME, WELCOME.pack(client.client_id, self.view_distance))
+        try:
+            while True:
+                msg_type, payload = await read_frame(reader)
+                self.handle_message(client, msg_type, payload)
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            del self.clients[client.client_id]
+            writer.close()
+
+    def handle_message(self, client, msg_type, payload):
+        if msg_type == MSG_HELLO:
+            client.name = payload.decode("utf-8", "replace")
+        elif msg_type == MSG_POSITION:
+            client.position = unpack_payload(POSITION, payload)
+        elif msg_type == MSG_SET_BLOCK:
+            self.pending_edits.append((client, unpack_payload(SET_BLOCK, payload)))
+        else:
+            raise ProtocolError(f"Unknown message type {msg_type}")
+
+    def apply_edits(self):
+        """Apply queued edits authoritatively and return the accepted (x, y, z, type) deltas"""
+        deltas = []
+        edits, self.pending_edits = self.pending_edits, []
+        for client, (x, y, z, block_type) in edits:
+            if y < 0 or y > 255:
+                continue
+            # Only chunks the sender has been sent are editable, so no edit can make the server generate terrain
+            if self.world.get_chunk_coords(x, z) not in client.known_chunks:
+                continue
+            if block_type == 0:
+                if not self.world.get_block(x, y, z):
+                    continue
+                self.world.remove_block(x, y, z)
+            else:
+                if block_type not in BLOCK_TYPES:
+                    continue
+                self.world.add_block(x, y, z, block_type)
+            self.encoded_chunks.pop(self.world.get_chunk_coords(x, z), None)
+            deltas.append((x, y, z, block_type))
+        return deltas
+
+    def run_block_updates(self):
+        """Run this tick's scheduled block updates and return their (x, y, z, type) deltas"""
+        deltas = []
+        for (x, y, z), block_type in self.block_updates.update(1 / self.tick_rate).items():
+            self.encoded_chunks.pop(self.world.get_chunk_coords(x, z), None)
+            deltas.append((x, y, z, block_type))
+        return deltas
+
+    def update_interest(self, client):
+        """Recompute the chunks a client should have when it crosses a chunk border"""
+        if client.position is None:
+            return
+        x, _, z = client.position
+        center = self.world.get_chunk_coords(x, z)
+        if center == client.interest_center:
+            return
+        client.interest_center = center
+
+        interest = []
+        for dx in range(-self.view_distance, self.view_distance + 1):
+            for dz in range(-self.view_distance, self.view_distance + 1):
+                if dx * dx + dz * dz <= self.view_distance * self.view_distance:
+                    interest.append((dx * dx + dz * dz, (center[0] + dx, center[1] + dz)))
+        interest.sort()
+        client.interest = {coords for _, coords in interest}
+        client.pending_chunks = [coords for _, coords in interest if coords not in client.known_chunks]
+
+        for coords in client.known_chunks - client.interest:
+            client.send(MSG_UNLOAD, CHUNK_COORDS.pack(*coords))
+        client.known_chunks &= client.interest
+
+    def stream_chunks(self, client):
+        if not client.pending_chunks or client.backlog() >= self.max_backlog:
+            return
+        batch = client.pending_chunks[:self.chunks_per_tick]
+        del client.pending_chunks[:self.chunks_per_tick]
+        # Only chunks whose generation is final are sent, so clients never miss neighbour decorations
+        for chunk in self.world.get_full_chunks(batch):
+            coords = (chunk.chunk_x, chunk.chunk_z)
+            payload = self.encoded_chunks.get(coords)
+            if payload is None:
+                payload = encode_chunk(chunk)
+                self.encoded_chunks[coords] = payload
+            client.send(MSG_CHUNK, payload)
+            client.known_chunks.add(coords)
+
+    def broadcast_deltas(self, deltas):
+        """Send each client only the edits inside chunks it has loaded"""
+        by_chunk = {}
+        for delta in deltas:
+            by_chunk.setdefault(self.world.get_chunk_coords(delta[0], delta[2]), []).append(delta)
+        for client in self.clients.values():
+            visible = [delta for coords, chunk_deltas in by_chunk.items()
+                       if coords in client.known_chunks for delta in chunk_deltas]
+            for start in range(0, len(visible), 0xFFFF):
+                client.send(MSG_BLOCK_DELTA, encode_deltas(visible[start:start + 0xFFFF]))
+
+    def unload_unwatched_chunks(self):
+        """Drop chunks that are outside every client's view distance (plus the generation margin)"""
+        keep_distance = self.view_distance + 2
+        centers = [client.interest_center for client in self.clients.values() if client.interest_center]
+        for chunk_x, chunk_z in list(self.world.chunks):
+            if not any(max(abs(chunk_x - cx), abs(chunk_z - cz)) <= keep_distance for cx, cz in centers):
+                self.world.unload_chunk(chunk_x, chunk_z)
+                self.encoded_chunks.pop((chunk_x, chunk_z), None)
+
+    def tick(self):
+        """Advance the simulation by one tick"""
+        start = time.perf_counter()
+        deltas = self.apply_edits()
+        deltas += self.run_block_updates()
+        for client in self.clients.values():
+            self.update_interest(client)
+            self.stream_chunks(client)
+        if deltas:
+            self.broadcast_deltas(deltas)
+        if self.tick_count % self.tick_rate == 0:
+            self.unload_unwatched_chunks()
+        self.tick_count += 1
+        self.tick_times.append(time.perf_counter() - start)
+
+    async def run(self):
+        """Fixed-rate tick loop; skips sleeping when a tick overruns"""
+        self.running = True
+        interval = 1.0 / self.tick_rate
+        next_tick = time.perf_counter()
+        while self.running:
+            self.tick()
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+                await asyncio.sleep(0)
+
+    def stop(self):
+        self.running = False
+        for server in self.servers:
+            server.close()
+
+    def stats(self):
+        """Mean and worst tick time (seconds) over the recent window"""
+        if not self.tick_times:
+            return {"clients": len(self.clients), "mean_tick": 0.0, "max_tick": 0.0}
+        return {
+            "clients": len(self.clients),
+            "mean_tick": sum(self.tick_times) / len(self.tick_times),
+            "max_tick": max(self.tick_times),
+        }
+
+async def main(args):
+    server = GameServer(tick_rate=args.tick_rate, view_distance=args.view_distance)
+    if args.unix:
+        await server.start_unix(args.unix)
+        print(f"Server listening on unix socket {args.unix}")
+    else:
+        await server.start(args.host, args.port)
+        print(f"Server listening on {args.host}:{args.port}")
+    await server.run()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless PhilCraft server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=25565)
+    parser.add_argument("--unix", help="Listen on a Unix socket path instead of TCP")
+    parser.add_argument("--tick-rate", type=int, default=20)
+    parser.add_argument("--view-distance", type=int, default=4)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        print("Server shutting down...")
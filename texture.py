@@ -0,0 +1,62 @@
+import numpy as np
+
+from block import *
+
+TILE_SIZE = 16  # Pixels per texture layer
+
+def _noise_tile(rng, base, variation):
+    """A tile of base color with per-pixel brightness noise"""
+    shade = 1.0 + rng.uniform(-variation, variation, (TILE_SIZE, TILE_SIZE, 1))
+    return np.clip(np.array(base) * shade, 0.0, 1.0)
+
+def generate_layers(seed=1337):
+    """Procedurally generate every texture layer as float RGB (or RGBA, for see-through blocks) images (row 0 is the top)"""
+    rng = np.random.default_rng(seed)
+    layers = [None] * TEXTURE_LAYER_COUNT
+
+    layers[TEX_GRASS_TOP] = _noise_tile(rng, (0.35, 0.75, 0.25), 0.15)
+    layers[TEX_DIRT] = _noise_tile(rng, (0.55, 0.38, 0.22), 0.2)
+
+    # Dirt with a ragged strip of grass along the top edge
+    grass_side = layers[TEX_DIRT].copy()
+    strip = rng.integers(2, 5, TILE_SIZE)
+    for x in range(TILE_SIZE):
+        grass_side[:strip[x], x] = layers[TEX_GRASS_TOP][:strip[x], x]
+    layers[TEX_GRASS_SIDE] = grass_side
+
+    layers[TEX_STONE] = _noise_tile(rng, (0.55, 0.55, 0.55), 0.12)
+
+    # Leaves: dark green speckle, slightly translucent, with see-through holes (alpha 0)
+    leaves = _noise_tile(rng, (0.15, 0.5, 0.12), 0.3)
+    alpha = np.full((TILE_SIZE, TILE_SIZE, 1), 0.85)
+    alpha[rng.random((TILE_SIZE, TILE_SIZE)) < 0.15] = 0.0
+    layers[TEX_LEAVES] = np.concatenate([leaves, alpha], axis=2)
+
+    # Bark: vertical stripes
+    bark = _noise_tile(rng, (0.42, 0.28, 0.14), 0.1)
+    bark[:, ::3] *= 0.75
+    layers[TEX_LOG_SIDE] = bark
+
+    # Log top: concentric rings
+    coords = np.arange(TILE_SIZE) - (TILE_SIZE - 1) / 2
+    radius = np.sqrt(coords[:, None] ** 2 + coords[None, :] ** 2)
+    rings = 0.85 + 0.15 * np.cos(radius * 1.6)
+    layers[TEX_LOG_TOP] = np.clip(np.array((0.65, 0.5, 0.3)) * rings[:, :, None], 0.0, 1.0)
+
+    # Magenta/black checkerboard for unknown block types
+    checker = (np.indices((TILE_SIZE, TILE_SIZE)) // (TILE_SIZE // 2)).sum(axis=0) % 2
+    layers[TEX_MISSING] = np.where(checker[:, :, None] == 0, (1.0, 0.0, 1.0), (0.0, 0.0, 0.0))
+
+    layers[TEX_SAND] = _noise_tile(rng, (0.86, 0.8, 0.55), 0.08)
+
+    return layers
+
+def build_layer_stack(layers):
+    """Stack texture layers into a (layers, TILE_SIZE, TILE_SIZE, 4) uint8 RGBA array for a 2D texture array.
+
+    RGB layers get full alpha. Each layer is flipped so row 0 is the bottom,
+    as GL expects.
+    """
+    opaque = np.ones((TILE_SIZE, TILE_SIZE, 1))
+    return np.stack([(np.flipud(image if image.shape[2] == 4 else np.concatenate([image, opaque], axis=2)) * 255)
+                     .astype(np.uint8) for image in layers])
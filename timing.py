@@ -0,0 +1,52 @@
+import time
+
+class StartupTimer:
+    """Times consecutive startup phases from a fixed starting point"""
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.last = self.start
+        self.phases = []  # (name, seconds)
+
+    def checkpoint(self, name):
+        """End the current phase, naming it"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases)
+        return f"Startup: {phases} (total {self.total():.2f}s)"
+
+def summarize_frame_times(frame_times):
+    """Frame count plus mean and percentile frame times in milliseconds"""
+    if not frame_times:
+        return {"frames": 0}
+    ordered = sorted(frame_times)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        "frames": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+def format_frame_summary(summary):
+    if not summary["frames"]:
+        return "no frames"
+    return (f"mean {summary['mean_ms']:.1f} ms, p50 {summary['p50_ms']:.1f} ms, p95 {summary['p95_ms']:.1f} ms, "
+            f"p99 {summary['p99_ms']:.1f} ms, max {summary['max_ms']:.1f} ms")
+
+def write_frame_times(path, frame_times):
+    """Write per-frame timings as CSV (frame, milliseconds) for comparing runs"""
+    with open(path, "w") as f:
+        f.write("frame,ms\n")
+        for frame, seconds in enumerate(frame_times):
+            f.write(f"{frame},{seconds * 1000:.3f}\n")
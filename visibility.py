@@ -0,0 +1,40 @@
+from collections import deque
+
+from mesher import FACES, face_pair_bit
+
+def camera_section(x, y, z, section_count, size=16):
+    """Section (chunk_x, section_y, chunk_z) containing a world position, clamped to the world's height"""
+    section_y = min(max(int(y // size), 0), section_count - 1)
+    return int(x // size), section_y, int(z // size)
+
+def find_visible_sections(start, connectivity_of, max_distance, section_count):
+    """Sections that could be seen from the start section, by a breadth-first walk through open space.
+
+    connectivity_of(chunk_x, chunk_z) returns the chunk's per-section face
+    connectivity masks, or None when unknown (treated as fully open). The
+    walk enters a neighbour only through a face connected to the face it came
+    in by, and never steps back against a direction it has already travelled,
+    so sections sealed off by terrain from the camera's side are never
+    reached. max_distance limits the walk in chunks around the start.
+    """
+    start_x, _, start_z = start
+    visible = {start}
+    queue = deque([(start, None, 0)])  # section, face it was entered by, directions travelled
+    while queue:
+        (chunk_x, section_y, chunk_z), entry_face, travelled = queue.popleft()
+        masks = connectivity_of(chunk_x, chunk_z)
+        for exit_face, (direction, _, _) in enumerate(FACES):
+            # FACES pairs opposite directions as (2k, 2k + 1)
+            if travelled & (1 << (exit_face ^ 1)):
+                continue
+            if entry_face is not None and masks is not None and not masks[section_y] & face_pair_bit(entry_face, exit_face):
+                continue
+            dx, dy, dz = direction
+            neighbour = (chunk_x + dx, section_y + dy, chunk_z + dz)
+            if not 0 <= neighbour[1] < section_count or neighbour in visible:
+                continue
+            if max(abs(neighbour[0] - start_x), abs(neighbour[2] - start_z)) > max_distance:
+                continue
+            visible.add(neighbour)
+            queue.append((neighbour, exit_face ^ 1, travelled | (1 << exit_face)))
+    return visible
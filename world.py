@@ -1,30 +1,77 @@
-import pygame
-import numpy as np
-from OpenGL.GL import *
-from OpenGL.GLU import *
 import math
-import random
-from collections import defaultdict
+import time
+
+import numpy as np
 
 from mcchunk import *
+from worldgen import *
+from memstats import *
+from journal import *
+
+def surrounded(mask):
+    """Cells of a 3D boolean mask whose six face neighbours are all set too (outside the mask counts as unset)"""
+    padded = np.pad(mask, 1)
+    inner = padded[2:, 1:-1, 1:-1] & padded[:-2, 1:-1, 1:-1]
+    inner &= padded[1:-1, 2:, 1:-1] & padded[1:-1, :-2, 1:-1]
+    inner &= padded[1:-1, 1:-1, 2:] & padded[1:-1, 1:-1, :-2]
+    return inner
+
+class Clipboard:
+    """Block type ids copied out of a world region, indexed [dx, dy, dz] from its minimum corner"""
+    def __init__(self, voxels):
+        self.voxels = voxels
+        self.size = voxels.shape
 
 class World:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.chunks = {}
         self.render_distance = 4  # Render distance in chunks
         self.loaded_chunks = set()  # Track which chunks are currently loaded
+        self.unload_listeners = []  # Called with each chunk before it is dropped (e.g. to free GPU resources)
+        self.edit_listeners = []  # Called with (xs, ys, zs) arrays of the blocks each edit touched (see edit_region)
+        self.memory = MemoryTracker()  # Bytes held per chunk by the world and renderer
+        self.cold_seconds = 10.0  # Generated chunks unused this long have their voxels compressed
+        self.compressions_per_frame = 4  # Limits the time compression takes from any one frame
+        self.compressed_chunks = set()  # Coordinates of chunks compressed by compress_cold_chunks
+        self.journal = None  # EditJournal that records edits and restores them into regenerated chunks
+        self.tick = 0  # Advanced once per frame by the game; stamped on journal records
+        self.generator = WorldGenerator(self, seed)
         
     def get_chunk_coords(self, x, z):
         # Use consistent chunk size with Chunk class
         return int(x // 16), int(z // 16)
     
+    def create_chunk(self, chunk_x, chunk_z):
+        """Allocate an empty chunk; the generator fills it in"""
+        chunk = Chunk(chunk_x, chunk_z)
+        self.chunks[(chunk_x, chunk_z)] = chunk
+        self.memory.set(MEM_VOXELS, (chunk_x, chunk_z), chunk.voxels.nbytes)
+        return chunk
+    
     def get_chunk(self, chunk_x, chunk_z):
-        if (chunk_x, chunk_z) not in self.chunks:
-            self.chunks[(chunk_x, chunk_z)] = Chunk(chunk_x, chunk_z)
-        return self.chunks[(chunk_x, chunk_z)]
+        """Get a chunk, generating at least its terrain if needed"""
+        chunk = self.chunks.get((chunk_x, chunk_z))
+        if chunk is None or chunk.stage == STAGE_EMPTY:
+            self.generator.ensure_terrain([(chunk_x, chunk_z)])
+            chunk = self.chunks[(chunk_x, chunk_z)]
+        return chunk
+    
+    def get_full_chunks(self, coords_list):
+        """Get chunks whose generation is final (decorated, with decorated neighbours).
+
+        Chunks that become final here get their journaled edits back.
+        """
+        fresh = []
+        if self.journal is not None:
+            fresh = [coords for coords in coords_list
+                     if coords not in self.chunks or self.chunks[coords].stage != STAGE_FULL]
+        self.generator.ensure_full(coords_list)
+        if fresh:
+            self.apply_chunk_edits({coords: self.journal.chunk_edits(coords) for coords in fresh}, journal=False)
+        return [self.chunks[coords] for coords in coords_list]
     
     def get_block(self, x, y, z):
-        """Get block at world coordinates, handling chunk boundaries properly"""
+        """Get the shared BlockType at world coordinates (None for air), handling chunk boundaries properly"""
         # Handle Y bounds
         if y < 0 or y > 255:
             return None
@@ -35,18 +82,80 @@ class World:
             return chunk.get_block(x, y, z)
         return None
     
+    def block_type_ids(self, xs, ys, zs):
+        """Vectorized get_block_type_id over flat integer arrays of world coordinates"""
+        types = np.zeros(len(xs), dtype=np.uint8)
+        inside = np.flatnonzero((ys >= 0) & (ys < CHUNK_HEIGHT))
+        if len(inside) == 0:
+            return types
+        xs, ys, zs = xs[inside], ys[inside], zs[inside]
+        chunk_xs, chunk_zs = xs // 16, zs // 16
+        keys = chunk_xs * (1 << 32) + (chunk_zs & 0xFFFFFFFF)
+        _, first, group, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+        # Each chunk's positions form one run of this order, so no chunk scans the whole array
+        order = np.argsort(group, kind="stable")
+        ends = np.cumsum(counts)
+        for group_id, index in enumerate(first):
+            chunk = self.chunks.get((int(chunk_xs[index]), int(chunk_zs[index])))
+            if chunk is None:
+                continue
+            selected = order[ends[group_id] - counts[group_id]:ends[group_id]]
+            types[inside[selected]] = chunk.voxels[xs[selected] - chunk.origin_x, ys[selected],
+                                                   zs[selected] - chunk.origin_z]
+        return types
+    
+    def get_block_type_id(self, x, y, z):
+        """Type id at world coordinates (0 for air or unloaded chunks)"""
+        block_type = self.get_block(x, y, z)
+        return block_type.id if block_type is not None else AIR
+    
+    def surface_height(self, x, z):
+        """Highest non-air y of a world column (-1 if the column is empty or not loaded)"""
+        chunk = self.chunks.get(self.get_chunk_coords(x, z))
+        if chunk is None:
+            return -1
+        return int(chunk.top[x - chunk.origin_x, z - chunk.origin_z])
+    
+    def height_bounds(self, coords_list=None):
+        """(lowest, highest) non-air y over some chunks (default: all loaded), or None if all are empty"""
+        chunks = self.chunks.values() if coords_list is None else [self.chunks[coords] for coords in coords_list if coords in self.chunks]
+        low, high = CHUNK_HEIGHT, -1
+        for chunk in chunks:
+            low = min(low, chunk.min_height)
+            high = max(high, chunk.max_height)
+        return (low, high) if high >= 0 else None
+    
+    def get_block_view(self, x, y, z):
+        """Block view carrying coordinates along with the type, or None for air"""
+        block_type = self.get_block(x, y, z)
+        return Block(x, y, z, block_type.id) if block_type is not None else None
+    
     def add_block(self, x, y, z, block_type=1):
+        if y < 0 or y > 255:
+            return
         chunk_x, chunk_z = self.get_chunk_coords(x, z)
         chunk = self.get_chunk(chunk_x, chunk_z)
+        old_type = chunk.get_block_type_id(x, y, z)
         chunk.add_block(x, y, z, block_type)
+        if old_type != block_type:
+            if self.journal is not None:
+                self.journal.log(x, y, z, old_type, block_type, self.tick)
+            self.notify_edits(np.array([x]), np.array([y]), np.array([z]))
         # Mark adjacent chunks for update if block is on chunk boundary
         self.mark_adjacent_chunks_for_update(x, y, z)
     
     def remove_block(self, x, y, z):
+        if y < 0 or y > 255:
+            return
         chunk_x, chunk_z = self.get_chunk_coords(x, z)
         if (chunk_x, chunk_z) in self.chunks:
             chunk = self.chunks[(chunk_x, chunk_z)]
+            old_type = chunk.get_block_type_id(x, y, z)
             chunk.remove_block(x, y, z)
+            if old_type != AIR:
+                if self.journal is not None:
+                    self.journal.log(x, y, z, old_type, AIR, self.tick)
+                self.notify_edits(np.array([x]), np.array([y]), np.array([z]))
             # Mark adjacent chunks for update if block is on chunk boundary
             self.mark_adjacent_chunks_for_update(x, y, z)
     
@@ -58,20 +167,218 @@ class World:
         
         # Check if block is on chunk boundary and mark adjacent chunks
         if local_x == 0 and (chunk_x - 1, chunk_z) in self.chunks:
-            self.chunks[(chunk_x - 1, chunk_z)].needs_update = True
-            self.chunks[(chunk_x - 1, chunk_z)].is_compiled = False
+            self.chunks[(chunk_x - 1, chunk_z)].mark_dirty()
         if local_x == 15 and (chunk_x + 1, chunk_z) in self.chunks:
-            self.chunks[(chunk_x + 1, chunk_z)].needs_update = True
-            self.chunks[(chunk_x + 1, chunk_z)].is_compiled = False
+            self.chunks[(chunk_x + 1, chunk_z)].mark_dirty()
         if local_z == 0 and (chunk_x, chunk_z - 1) in self.chunks:
-            self.chunks[(chunk_x, chunk_z - 1)].needs_update = True
-            self.chunks[(chunk_x, chunk_z - 1)].is_compiled = False
+            self.chunks[(chunk_x, chunk_z - 1)].mark_dirty()
         if local_z == 15 and (chunk_x, chunk_z + 1) in self.chunks:
-            self.chunks[(chunk_x, chunk_z + 1)].needs_update = True
-            self.chunks[(chunk_x, chunk_z + 1)].is_compiled = False
+            self.chunks[(chunk_x, chunk_z + 1)].mark_dirty()
+    
+    def mark_chunks_for_update(self, chunk_coords):
+        """Flag each loaded chunk in chunk_coords for recompilation exactly once"""
+        for coords in chunk_coords:
+            chunk = self.chunks.get(coords)
+            if chunk is not None:
+                chunk.mark_dirty()
+    
+    def normalize_region(self, x0, y0, z0, x1, y1, z1):
+        """Sort an inclusive box's corners and clamp it to the world height"""
+        x0, x1 = sorted((x0, x1))
+        y0, y1 = sorted((y0, y1))
+        z0, z1 = sorted((z0, z1))
+        return x0, max(0, y0), z0, x1, min(255, y1), z1
+    
+    def region_chunks(self, x0, z0, x1, z1):
+        """Yield (chunk_coords, (x0, z0, x1, z1)) for each chunk column an inclusive box overlaps"""
+        chunk_x0, chunk_z0 = self.get_chunk_coords(x0, z0)
+        chunk_x1, chunk_z1 = self.get_chunk_coords(x1, z1)
+        for chunk_x in range(chunk_x0, chunk_x1 + 1):
+            for chunk_z in range(chunk_z0, chunk_z1 + 1):
+                yield (chunk_x, chunk_z), (max(x0, chunk_x * 16), max(z0, chunk_z * 16),
+                                           min(x1, chunk_x * 16 + 15), min(z1, chunk_z * 16 + 15))
+    
+    def touched_chunks(self, chunk_x, chunk_z, local_x0, local_z0, local_x1, local_z1):
+        """A chunk edited within local columns [x0, x1] x [z0, z1], plus neighbours sharing an edited border"""
+        touched = {(chunk_x, chunk_z)}
+        if local_x0 == 0:
+            touched.add((chunk_x - 1, chunk_z))
+        if local_x1 == 15:
+            touched.add((chunk_x + 1, chunk_z))
+        if local_z0 == 0:
+            touched.add((chunk_x, chunk_z - 1))
+        if local_z1 == 15:
+            touched.add((chunk_x, chunk_z + 1))
+        return touched
+    
+    def apply_chunk_edits(self, edits_by_chunk, journal=True):
+        """Write per-chunk {(x, y, z): block_type} edits straight into chunk storage.
+
+        Every edited chunk, plus any neighbour sharing an edited border, is
+        marked for recompilation once no matter how many blocks changed.
+        Changes are journaled unless journal is False (e.g. when restoring).
+        Returns the number of edits applied.
+        """
+        dirty = set()
+        count = 0
+        for (chunk_x, chunk_z), edits in edits_by_chunk.items():
+            if not edits:
+                continue
+            chunk = self.get_chunk(chunk_x, chunk_z)
+            positions = np.array(list(edits.keys()), dtype=np.int64)
+            if journal and self.journal is not None:
+                new_types = np.array([block_type or AIR for block_type in edits.values()], dtype=np.uint8)
+                old_types = chunk.voxels[positions[:, 0] - chunk.origin_x, positions[:, 1], positions[:, 2] - chunk.origin_z]
+                self.log_changes(positions[:, 0], positions[:, 1], positions[:, 2], old_types, new_types)
+            chunk.set_blocks(edits)
+            self.notify_edits(positions[:, 0], positions[:, 1], positions[:, 2])
+            count += len(edits)
+            local_xs = [x - chunk_x * 16 for x, _, _ in edits]
+            local_zs = [z - chunk_z * 16 for _, _, z in edits]
+            dirty |= self.touched_chunks(chunk_x, chunk_z, min(local_xs), min(local_zs), max(local_xs), max(local_zs))
+        
+        self.mark_chunks_for_update(dirty)
+        return count
+    
+    def set_blocks(self, edits):
+        """Bulk version of add_block/remove_block for {(x, y, z): block_type} (0 removes)"""
+        edits_by_chunk = {}
+        for (x, y, z), block_type in edits.items():
+            if 0 <= y <= 255:
+                edits_by_chunk.setdefault(self.get_chunk_coords(x, z), {})[(x, y, z)] = block_type
+        return self.apply_chunk_edits(edits_by_chunk)
+    
+    def edit_region(self, x0, y0, z0, x1, y1, z1, edit):
+        """Run edit(chunk, local_slices, xs, ys, zs) on every chunk an inclusive box overlaps.
+
+        The slices index chunk.voxels; xs/ys/zs are broadcastable world
+        coordinate grids for the same cells. edit returns a boolean mask of
+        the cells it changed (or None if nothing changed), which is used to
+        mark the chunk and its affected neighbours for update once.
+        Edit listeners are told only about the shell of the changed volume:
+        a changed cell whose six face neighbours all changed too sits inside
+        a uniform edit and has nothing new next to it.
+        Returns the number of changed blocks.
+        """
+        x0, y0, z0, x1, y1, z1 = self.normalize_region(x0, y0, z0, x1, y1, z1)
+        if y0 > y1:
+            return 0
+        dirty = set()
+        count = 0
+        changed_box = np.zeros((x1 - x0 + 1, y1 - y0 + 1, z1 - z0 + 1), dtype=bool) if self.edit_listeners else None
+        for (chunk_x, chunk_z), (bx0, bz0, bx1, bz1) in self.region_chunks(x0, z0, x1, z1):
+            chunk = self.get_chunk(chunk_x, chunk_z)
+            local = (slice(bx0 - chunk.origin_x, bx1 - chunk.origin_x + 1),
+                     slice(y0, y1 + 1),
+                     slice(bz0 - chunk.origin_z, bz1 - chunk.origin_z + 1))
+            xs, ys, zs = np.ogrid[bx0:bx1 + 1, y0:y1 + 1, bz0:bz1 + 1]
+            before = chunk.voxels[local].copy() if self.journal is not None else None
+            changed = edit(chunk, local, xs, ys, zs)
+            if changed is None or not changed.any():
+                continue
+            count += int(np.count_nonzero(changed))
+            chunk.update_heightmap(local[0].start, local[2].start, local[0].stop, local[2].stop)
+            cells = np.nonzero(changed)
+            if before is not None:
+                self.log_changes(cells[0] + bx0, cells[1] + y0, cells[2] + bz0,
+                                 before[cells], chunk.voxels[local][cells])
+            if changed_box is not None:
+                changed_box[bx0 - x0:bx1 - x0 + 1, :, bz0 - z0:bz1 - z0 + 1] = changed
+            # Only the columns that actually changed decide which borders were touched
+            columns_x = np.nonzero(changed.any(axis=(1, 2)))[0] + local[0].start
+            columns_z = np.nonzero(changed.any(axis=(0, 1)))[0] + local[2].start
+            dirty |= self.touched_chunks(chunk_x, chunk_z, columns_x[0], columns_z[0], columns_x[-1], columns_z[-1])
+        if count and changed_box is not None:
+            cells = np.nonzero(changed_box & ~surrounded(changed_box))
+            self.notify_edits(cells[0] + x0, cells[1] + y0, cells[2] + z0)
+        self.mark_chunks_for_update(dirty)
+        return count
+    
+    def notify_edits(self, xs, ys, zs):
+        """Tell edit listeners which blocks were just written"""
+        for listener in self.edit_listeners:
+            listener(xs, ys, zs)
+    
+    def log_changes(self, xs, ys, zs, old_types, new_types):
+        """Journal the blocks whose type actually changed (arrays of world coordinates and types)"""
+        changed = old_types != new_types
+        if changed.any():
+            self.journal.log_many(xs[changed], ys[changed], zs[changed],
+                                  old_types[changed], new_types[changed], self.tick)
+    
+    def fill_shape(self, x0, y0, z0, x1, y1, z1, block_type, contains=None):
+        """Set every cell in an inclusive box where contains(xs, ys, zs) is true (all if None).
+
+        contains is evaluated once per chunk on NumPy coordinate grids and
+        must return a boolean array.
+        """
+        block_type = block_type or AIR
+        def edit(chunk, local, xs, ys, zs):
+            region = chunk.voxels[local]
+            mask = np.ones(region.shape, dtype=bool) if contains is None else np.broadcast_to(contains(xs, ys, zs), region.shape)
+            changed = mask & (region != block_type)
+            region[changed] = block_type
+            return changed
+        return self.edit_region(x0, y0, z0, x1, y1, z1, edit)
+    
+    def fill(self, x0, y0, z0, x1, y1, z1, block_type):
+        """Fill an inclusive box with block_type (0 or None clears it)"""
+        return self.fill_shape(x0, y0, z0, x1, y1, z1, block_type)
+    
+    def fill_sphere(self, center_x, center_y, center_z, radius, block_type):
+        """Fill a sphere brush centred on a block"""
+        r = int(math.ceil(radius))
+        radius_sq = radius * radius
+        def contains(xs, ys, zs):
+            return (xs - center_x) ** 2 + (ys - center_y) ** 2 + (zs - center_z) ** 2 <= radius_sq
+        return self.fill_shape(center_x - r, center_y - r, center_z - r,
+                               center_x + r, center_y + r, center_z + r, block_type, contains)
+    
+    def fill_cylinder(self, center_x, base_y, center_z, radius, height, block_type):
+        """Fill a vertical cylinder brush standing on base_y"""
+        r = int(math.ceil(radius))
+        radius_sq = radius * radius
+        def contains(xs, ys, zs):
+            return (xs - center_x) ** 2 + (zs - center_z) ** 2 <= radius_sq
+        return self.fill_shape(center_x - r, base_y, center_z - r,
+                               center_x + r, base_y + height - 1, center_z + r, block_type, contains)
+    
+    def replace(self, x0, y0, z0, x1, y1, z1, from_type, to_type):
+        """Swap every from_type block in an inclusive box for to_type (0 removes)"""
+        to_type = to_type or AIR
+        def edit(chunk, local, xs, ys, zs):
+            region = chunk.voxels[local]
+            changed = region == from_type
+            region[changed] = to_type
+            return changed
+        return self.edit_region(x0, y0, z0, x1, y1, z1, edit)
+    
+    def copy(self, x0, y0, z0, x1, y1, z1):
+        """Copy the blocks of an inclusive box into a Clipboard"""
+        x0, y0, z0, x1, y1, z1 = self.normalize_region(x0, y0, z0, x1, y1, z1)
+        voxels = np.zeros((x1 - x0 + 1, y1 - y0 + 1, z1 - z0 + 1), dtype=np.uint8)
+        for coords, (bx0, bz0, bx1, bz1) in self.region_chunks(x0, z0, x1, z1):
+            chunk = self.get_chunk(*coords)
+            voxels[bx0 - x0:bx1 - x0 + 1, :, bz0 - z0:bz1 - z0 + 1] = chunk.voxels[
+                bx0 - chunk.origin_x:bx1 - chunk.origin_x + 1, y0:y1 + 1, bz0 - chunk.origin_z:bz1 - chunk.origin_z + 1]
+        return Clipboard(voxels)
+    
+    def paste(self, clipboard, x, y, z, include_air=False):
+        """Paste a Clipboard with its minimum corner at (x, y, z); include_air also clears empty cells"""
+        size_x, size_y, size_z = clipboard.size
+        def edit(chunk, local, xs, ys, zs):
+            region = chunk.voxels[local]
+            source = clipboard.voxels[xs - x, ys - y, zs - z]
+            changed = region != source
+            if not include_air:
+                changed &= source != AIR
+            region[changed] = source[changed]
+            return changed
+        # The paste box is clamped to world height, so only part of the clipboard may land
+        return self.edit_region(x, y, z, x + size_x - 1, y + size_y - 1, z + size_z - 1, edit)
     
     def is_block_visible(self, x, y, z):
-        """Check if any face is visible (not surrounded by blocks)"""
+        """Check if any face is visible (not surrounded by opaque blocks; leaves can be seen through)"""
         # Check if block exists
         if not self.get_block(x, y, z):
             return False
@@ -79,13 +386,13 @@ class World:
         # Check all 6 directions
         directions = [(0,1,0), (0,-1,0), (1,0,0), (-1,0,0), (0,0,1), (0,0,-1)]
         for dx, dy, dz in directions:
-            if not self.get_block(x+dx, y+dy, z+dz):
+            neighbour = self.get_block(x+dx, y+dy, z+dz)
+            if neighbour is None or neighbour.transparent:
                 return True
         return False
     
-    def get_visible_chunks(self, camera_x, camera_z):
-        """Get chunks within render distance, sorted by proximity to player"""
-        visible_chunks = []
+    def chunks_in_range(self, camera_x, camera_z):
+        """Coordinates of chunks within render distance, sorted by proximity to the player"""
         cam_chunk_x, cam_chunk_z = self.get_chunk_coords(camera_x, camera_z)
         
         # Collect chunks within render distance
@@ -103,21 +410,41 @@ class World:
                 
                 # Only include chunks within circular render distance
                 if distance <= self.render_distance * 16:
-                    if (chunk_x, chunk_z) not in self.chunks:
-                        # Generate chunk on demand
-                        self.get_chunk(chunk_x, chunk_z)
-                    
-                    chunk_distances.append((distance, self.chunks[(chunk_x, chunk_z)]))
+                    chunk_distances.append((distance, (chunk_x, chunk_z)))
         
         # Sort by distance (closest first)
         chunk_distances.sort(key=lambda x: x[0])
-        visible_chunks = [chunk for distance, chunk in chunk_distances]
+        return [coords for distance, coords in chunk_distances]
+    
+    def pregenerate(self, camera_x, camera_z, progress=None, batch_size=8):
+        """Generate every chunk in render distance up front, nearest first; returns them.
+
+        Each batch runs on the generator's thread pool; progress(done, total)
+        is called after every batch so a loading screen can stay responsive.
+        """
+        coords_list = self.chunks_in_range(camera_x, camera_z)
+        for start in range(0, len(coords_list), batch_size):
+            self.get_full_chunks(coords_list[start:start + batch_size])
+            if progress is not None:
+                progress(min(start + batch_size, len(coords_list)), len(coords_list))
+        return [self.chunks[coords] for coords in coords_list]
+    
+    def get_visible_chunks(self, camera_x, camera_z):
+        """Get chunks within render distance, sorted by proximity to player"""
+        cam_chunk_x, cam_chunk_z = self.get_chunk_coords(camera_x, camera_z)
+        
+        # Generate chunks on demand; only chunks whose generation is final get rendered
+        visible_chunks = self.get_full_chunks(self.chunks_in_range(camera_x, camera_z))
         
         # Update loaded chunks set
         self.loaded_chunks = {(chunk.chunk_x, chunk.chunk_z) for chunk in visible_chunks}
+        now = time.monotonic()
+        for chunk in visible_chunks:
+            chunk.last_used = now
         
-        # Clean up chunks that are too far away
+        # Clean up chunks that are too far away, and compress the ones kept around but unused
         self.cleanup_distant_chunks(cam_chunk_x, cam_chunk_z)
+        self.compress_cold_chunks(now, self.compressions_per_frame)
         
         return visible_chunks
     
@@ -131,57 +458,57 @@ class World:
             if distance > cleanup_distance:
                 chunks_to_remove.append((chunk_x, chunk_z))
         
-        for chunk_coords in chunks_to_remove:
-            chunk = self.chunks[chunk_coords]
-            chunk.cleanup()  # Clean up OpenGL resources
-            del self.chunks[chunk_coords]
-            if chunk_coords in self.loaded_chunks:
-                self.loaded_chunks.remove(chunk_coords)
-    
-    def draw_cube_for_chunk(self, x, y, z, block_type, chunk):
-        """Draw a cube for chunk compilation with proper face culling"""
-        color = {
-            1: (0.2, 0.8, 0.2),  # Grass green
-            2: (0.1, 0.6, 0.1),  # Dark green (leaves)
-            3: (0.6, 0.6, 0.6),  # Stone gray
-            4: (0.4, 0.2, 0.1)   # Brown (tree trunk)
-        }.get(block_type, (0.5, 0.5, 0.5))
-        
-        # Define cube vertices
-        vertices = [
-            [x,   y,   z  ],  # 0: front-bottom-left
-            [x+1, y,   z  ],  # 1: front-bottom-right
-            [x+1, y+1, z  ],  # 2: front-top-right
-            [x,   y+1, z  ],  # 3: front-top-left
-            [x,   y,   z+1],  # 4: back-bottom-left
-            [x+1, y,   z+1],  # 5: back-bottom-right
-            [x+1, y+1, z+1],  # 6: back-top-right
-            [x,   y+1, z+1]   # 7: back-top-left
-        ]
-        
-        # Define faces with correct winding order
-        faces = [
-            # Face indices, direction offset, normal, brightness
-            ([0, 3, 2, 1], (0, 0, -1), (0, 0, -1), 0.8),   # Front face
-            ([5, 6, 7, 4], (0, 0, 1),  (0, 0, 1),  0.8),   # Back face
-            ([0, 1, 5, 4], (0, -1, 0), (0, -1, 0), 0.6),   # Bottom face
-            ([3, 7, 6, 2], (0, 1, 0),  (0, 1, 0),  1.0),   # Top face
-            ([0, 4, 7, 3], (-1, 0, 0), (-1, 0, 0), 0.7),   # Left face
-            ([1, 2, 6, 5], (1, 0, 0),  (1, 0, 0),  0.9)    # Right face
-        ]
+        for chunk_x, chunk_z in chunks_to_remove:
+            self.unload_chunk(chunk_x, chunk_z)
+    
+    def compress_cold_chunks(self, now=None, max_chunks=None):
+        """Run-length encode generated chunks unused for cold_seconds; returns how many were compressed.
+
+        Compressed chunks decompress themselves on their next voxel access;
+        their memory accounting is brought up to date on the following call.
+        """
+        if now is None:
+            now = time.monotonic()
+        for coords in [coords for coords in self.compressed_chunks if not self.chunks[coords].is_compressed]:
+            self.compressed_chunks.discard(coords)
+            self.memory.set(MEM_VOXELS, coords, self.chunks[coords].voxel_nbytes)
         
-        # Draw faces that are not occluded by adjacent blocks
-        for face_indices, direction, normal, brightness in faces:
-            dx, dy, dz = direction
-            # Check adjacent block using proper world lookup
-            adjacent_block = self.get_block(x + dx, y + dy, z + dz)
-            
-            # If there's no adjacent block in this direction, draw the face
-            if not adjacent_block:
-                glColor3f(color[0] * brightness, color[1] * brightness, color[2] * brightness)
-                glNormal3f(*normal)
-                
-                glBegin(GL_QUADS)
-                for idx in face_indices:
-                    glVertex3f(*vertices[idx])
-                glEnd()
+        compressed = 0
+        for coords, chunk in self.chunks.items():
+            if max_chunks is not None and compressed >= max_chunks:
+                break
+            if coords in self.compressed_chunks or chunk.stage == STAGE_EMPTY or now - chunk.last_used < self.cold_seconds:
+                continue
+            if chunk.compress():
+                self.compressed_chunks.add(coords)
+                self.memory.set(MEM_VOXELS, coords, chunk.voxel_nbytes)
+                compressed += 1
+            else:
+                chunk.last_used = now  # Did not shrink; try again after another cold period
+        return compressed
+    
+    def compression_stats(self):
+        """How much the currently compressed chunks save"""
+        raw = compressed = 0
+        for coords in self.compressed_chunks:
+            chunk = self.chunks[coords]
+            if chunk.is_compressed:
+                raw += chunk.compressed.raw_nbytes
+                compressed += chunk.compressed.nbytes
+        return {
+            "chunks": len(self.compressed_chunks),
+            "raw_bytes": raw,
+            "compressed_bytes": compressed,
+            "ratio": raw / compressed if compressed else 1.0,
+        }
+    
+    def unload_chunk(self, chunk_x, chunk_z):
+        """Drop a chunk from memory, notifying listeners first"""
+        chunk = self.chunks.pop((chunk_x, chunk_z), None)
+        if chunk is None:
+            return
+        for listener in self.unload_listeners:
+            listener(chunk)
+        self.loaded_chunks.discard((chunk_x, chunk_z))
+        self.compressed_chunks.discard((chunk_x, chunk_z))
+        self.memory.release_owner((chunk_x, chunk_z))
@@ -0,0 +1,229 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from mcchunk import *
+from noise import *
+
+CAVE_SAMPLE_STEP = 4  # Cave noise is sampled every 4 blocks and interpolated
+SAND_LEVEL = 46       # Columns whose surface is this low or lower are sand flats (roughly the lowest 5%)
+SAND_DEPTH = 3        # Layers of sand on top of sand flats
+
+NEIGHBOUR_OFFSETS = [(dx, dz) for dx in (-1, 0, 1) for dz in (-1, 0, 1) if dx or dz]
+
+class WorldGenerator:
+    """Staged chunk generator.
+
+    The terrain stage only touches the chunk being generated, so it runs in
+    parallel on a thread pool. The decoration stage places trees that may
+    overlap neighbouring chunks; it runs once all neighbours have terrain and
+    writes each block into the chunk that owns it. Decoration is scheduled in
+    phases by (chunk_x % 3, chunk_z % 3): chunks in the same phase are at
+    least three chunks apart, so their 3x3 write footprints never overlap and
+    they can be decorated concurrently without locks.
+
+    Decorations are a pure function of the seed and chunk coordinates, so a
+    chunk that is unloaded and regenerated gets the blocks its already
+    decorated neighbours placed into it back. Re-decorating it never writes
+    into FULL neighbours: they received its trees the first time round, and
+    edits made to them since must not be undone.
+    """
+    def __init__(self, world, seed=None, workers=None):
+        self.world = world
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.height_noise = PerlinNoise(self.seed)
+        self.biome_noise = PerlinNoise(self.seed + 1)
+        self.cave_noise = PerlinNoise(self.seed + 2)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="worldgen")
+
+    def column_heights(self, chunk_x, chunk_z, size=16):
+        """Surface height for every column of a chunk as a (size, size) int array"""
+        world_x = (chunk_x * size + np.arange(size))[:, None].astype(np.float64)
+        world_z = (chunk_z * size + np.arange(size))[None, :].astype(np.float64)
+        
+        # Low-frequency biome noise blends smoothly between plains and hills
+        biome = self.biome_noise.fbm2(world_x / 256.0, world_z / 256.0, octaves=2)
+        hills_weight = np.clip((biome + 0.2) / 0.4, 0.0, 1.0)
+        hills_weight = hills_weight * hills_weight * (3 - 2 * hills_weight)
+        
+        detail = self.height_noise.fbm2(world_x / 96.0, world_z / 96.0, octaves=5)
+        plains = 48 + 6 * detail
+        hills = 58 + 30 * detail
+        height = plains + (hills - plains) * hills_weight
+        return np.clip(height.astype(np.int64), 1, CHUNK_HEIGHT - 16)
+    
+    def cave_mask(self, chunk, max_y):
+        """Boolean (size, max_y, size) array of cells carved out by caves.
+
+        3D noise is sampled every CAVE_SAMPLE_STEP blocks and linearly
+        upsampled, which is far cheaper than sampling every voxel and just as
+        smooth at cave scale.
+        """
+        step = CAVE_SAMPLE_STEP
+        samples_xz = chunk.size // step + 1
+        samples_y = -(-max_y // step) + 1
+        xs = (chunk.origin_x + np.arange(samples_xz) * step)[:, None, None] / 48.0
+        ys = (np.arange(samples_y) * step)[None, :, None] / 32.0
+        zs = (chunk.origin_z + np.arange(samples_xz) * step)[None, None, :] / 48.0
+        
+        # Spaghetti tunnels follow the intersection of two noise isosurfaces
+        tunnel_a = self.cave_noise.fbm3(xs, ys, zs)
+        tunnel_b = self.cave_noise.fbm3(xs + 100.0, ys + 100.0, zs + 100.0)
+        tunnels = tunnel_a * tunnel_a + tunnel_b * tunnel_b
+        # Rarer large caverns where a third noise peaks
+        caverns = self.cave_noise.noise3(xs * 0.5 - 50.0, ys * 0.75, zs * 0.5 - 50.0)
+        density = np.minimum(tunnels - 0.012, 0.45 - caverns)
+        
+        for axis in range(3):
+            density = upsample_linear(density, step, axis)
+        return density[:, :max_y, :] < 0
+    
+    def generate_terrain(self, chunk):
+        """Terrain stage: fill the chunk's own voxels"""
+        heights = self.column_heights(chunk.chunk_x, chunk.chunk_z, chunk.size)
+        max_y = int(heights.max()) + 1
+        ys = np.arange(max_y)[None, :, None]
+        surface = heights[:, None, :]
+        
+        # Grass on top of a few layers of dirt, stone below; low-lying columns are sand instead
+        column = np.where(ys > surface - 4, DIRT.id, STONE.id).astype(np.uint8)
+        column[ys == surface] = GRASS.id
+        column[(ys > surface - SAND_DEPTH) & (surface <= SAND_LEVEL)] = SAND.id
+        column[ys > surface] = AIR
+        
+        # Carve caves, keeping the bottom layer and a crust below the surface intact
+        carve = self.cave_mask(chunk, max_y) & (ys > 0) & (ys < surface - 4)
+        column[carve] = AIR
+        
+        chunk.voxels[:, :max_y, :] = column
+        # Caves never reach the surface or the bottom layer, so the heightmap is known without a scan
+        chunk.top[:] = heights
+        chunk.bottom[:] = 0
+        chunk.stage = STAGE_TERRAIN
+    
+    def surface_height(self, x, z):
+        """Generated surface height of a single world column"""
+        chunk_x, chunk_z = x // 16, z // 16
+        return int(self.column_heights(chunk_x, chunk_z)[x - chunk_x * 16, z - chunk_z * 16])
+    
+    def decoration_plan(self, chunk_x, chunk_z, size=16):
+        """Blocks placed by a chunk's decorations as (x, y, z, block_type, overwrite) in world coordinates"""
+        rng = random.Random(hash((self.seed, chunk_x, chunk_z)))
+        heights = self.column_heights(chunk_x, chunk_z, size)
+        plan = []
+        for local_x in range(size):
+            for local_z in range(size):
+                # Generate trees on top of terrain (2% chance), but not on sand
+                if rng.random() < 0.02 and heights[local_x, local_z] > SAND_LEVEL:
+                    world_x = chunk_x * size + local_x
+                    world_z = chunk_z * size + local_z
+                    self.plan_tree(rng, plan, world_x, int(heights[local_x, local_z]) + 1, world_z)
+        return plan
+
+    def plan_tree(self, rng, plan, x, base_y, z):
+        """Generate a simple tree structure"""
+        # Tree trunk height (3-5 blocks)
+        trunk_height = rng.randint(3, 5)
+
+        # Generate trunk
+        for y in range(base_y, base_y + trunk_height):
+            plan.append((x, y, z, LOG.id, True))
+
+        # Generate leaves (simple cross pattern around top of trunk)
+        leaf_y = base_y + trunk_height
+        leaf_positions = [
+            # Center leaves
+            (x, leaf_y, z),
+            (x, leaf_y + 1, z),
+            # Cardinal directions
+            (x + 1, leaf_y, z), (x - 1, leaf_y, z),
+            (x, leaf_y, z + 1), (x, leaf_y, z - 1),
+            # Diagonals
+            (x + 1, leaf_y, z + 1), (x - 1, leaf_y, z + 1),
+            (x + 1, leaf_y, z - 1), (x - 1, leaf_y, z - 1),
+            # Some upper leaves
+            (x, leaf_y + 1, z + 1), (x, leaf_y + 1, z - 1),
+            (x + 1, leaf_y + 1, z), (x - 1, leaf_y + 1, z),
+        ]
+
+        # Add leaf blocks (with some randomness); leaves never replace existing blocks
+        for leaf_x, leaf_y_pos, leaf_z in leaf_positions:
+            if rng.random() < 0.8:  # 80% chance for each leaf block
+                plan.append((leaf_x, leaf_y_pos, leaf_z, LEAVES.id, False))
+
+    def apply_plan(self, plan, only_chunk=None):
+        """Write planned blocks into the chunks that own them; returns the chunk coords touched"""
+        touched = set()
+        for x, y, z, block_type, overwrite in plan:
+            coords = self.world.get_chunk_coords(x, z)
+            if only_chunk is not None and coords != only_chunk:
+                continue
+            chunk = self.world.chunks.get(coords)
+            # FULL chunks already hold every decoration that reaches them (and may have been edited since)
+            if chunk is None or chunk.stage == STAGE_FULL or not 0 <= y < chunk.voxels.shape[1]:
+                continue
+            if overwrite or not chunk.get_block_type_id(x, y, z):
+                chunk.set_block_type(x, y, z, block_type)
+                touched.add(coords)
+        return touched
+
+    def decorate(self, chunk):
+        """Decoration stage: requires terrain in all eight neighbours"""
+        touched = self.apply_plan(self.decoration_plan(chunk.chunk_x, chunk.chunk_z, chunk.size))
+        chunk.stage = STAGE_DECORATED
+        return touched
+
+    def ensure_terrain(self, coords_list):
+        """Run the terrain stage (in parallel) for any listed chunk that has not had it"""
+        new_chunks = []
+        for coords in coords_list:
+            chunk = self.world.chunks.get(coords)
+            if chunk is None:
+                chunk = self.world.create_chunk(*coords)
+            if chunk.stage == STAGE_EMPTY:
+                new_chunks.append(chunk)
+        if not new_chunks:
+            return
+        list(self.executor.map(self.generate_terrain, new_chunks))
+
+        # Restore blocks that already decorated neighbours placed into regenerated chunks
+        for chunk in new_chunks:
+            for dx, dz in NEIGHBOUR_OFFSETS:
+                neighbour = self.world.chunks.get((chunk.chunk_x + dx, chunk.chunk_z + dz))
+                if neighbour is not None and neighbour.stage >= STAGE_DECORATED:
+                    plan = self.decoration_plan(neighbour.chunk_x, neighbour.chunk_z, neighbour.size)
+                    self.apply_plan(plan, only_chunk=(chunk.chunk_x, chunk.chunk_z))
+
+    def ensure_decorated(self, coords_list):
+        """Run terrain for the chunks and their neighbours, then decorate them phase by phase"""
+        coords_list = set(coords_list)
+        needed = set(coords_list)
+        for chunk_x, chunk_z in coords_list:
+            needed.update((chunk_x + dx, chunk_z + dz) for dx, dz in NEIGHBOUR_OFFSETS)
+        self.ensure_terrain(needed)
+
+        pending = [coords for coords in coords_list if self.world.chunks[coords].stage < STAGE_DECORATED]
+        if not pending:
+            return
+        phases = {}
+        for chunk_x, chunk_z in pending:
+            phases.setdefault((chunk_x % 3, chunk_z % 3), []).append(self.world.chunks[(chunk_x, chunk_z)])
+        touched = set()
+        for phase_chunks in phases.values():
+            for chunk_touched in self.executor.map(self.decorate, phase_chunks):
+                touched |= chunk_touched
+        self.world.mark_chunks_for_update(touched)
+
+    def ensure_full(self, coords_list):
+        """Make every listed chunk final: it and all eight neighbours decorated"""
+        coords_list = set(coords_list)
+        needed = set(coords_list)
+        for chunk_x, chunk_z in coords_list:
+            needed.update((chunk_x + dx, chunk_z + dz) for dx, dz in NEIGHBOUR_OFFSETS)
+        self.ensure_decorated(needed)
+        for coords in coords_list:
+            self.world.chunks[coords].stage = STAGE_FULL
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)